@@ -0,0 +1,365 @@
+## @file areas
+#  Hierarchical routing over areas of the topology.
+#  The routers are split into areas, read from a file or grown from the
+#  topology. Each area keeps the shortest path trees of its routers over its own
+#  links. Border routers, the ones with a link to another area, form a backbone
+#  joined by the links between areas and by summary links carrying the cost
+#  between two borders of the same area. A route leaves the area of its source
+#  through a border, crosses the backbone and enters the area of its target
+#  through a border, so the costs are those of the flat topology. Ties between
+#  paths of equal cost may be broken differently.
+#  A link change recomputes the trees of its area and the backbone, the trees
+#  of the other areas are kept, and the rows of the tables are only rebuilt for
+#  the areas whose routes can have changed.
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+from itertools import count
+
+import instrumentation
+from graph import INFINITY, RoutingTable
+from topology import edge_key
+
+## Number of routers of an area grown from the topology, by default.
+DEFAULT_AREA_SIZE = 64
+
+## Read the areas of the routers from a file.
+#  @param file_path Path to the file with one 'router area' pair per line,
+#         blank lines and lines starting with # are skipped.
+#  @return Dictionary mapping router IDs to area names.
+def read_areas(file_path):
+    areas = {}
+    with open(file_path) as file:
+        for number, line in enumerate(file, 1):
+            parts = line.split()
+            if not parts or parts[0].startswith('#'):
+                continue
+            if len(parts) != 2 or not parts[0].lstrip('-').isdigit():
+                raise ValueError(f"{file_path}:{number}: expected 'router area'")
+            areas[int(parts[0])] = parts[1]
+    return areas
+
+## Split the routers of a topology into connected areas of about the same size.
+#  Each area is grown breadth first from the smallest router not in an area
+#  yet, visiting neighbours in the order of their IDs, until it holds size routers.
+#  @param links Iterable of (r1, r2, cost) links.
+#  @param size Number of routers per area.
+#  @return Dictionary mapping router IDs to area numbers.
+def partition(links, size=DEFAULT_AREA_SIZE):
+    neighbours = {}
+    for r1, r2, _ in links:
+        neighbours.setdefault(r1, set()).add(r2)
+        neighbours.setdefault(r2, set()).add(r1)
+    areas = {}
+    number = 0
+    for root in sorted(neighbours):
+        if root in areas:
+            continue
+        areas[root] = number
+        members = 1
+        queue = deque([root])
+        while queue and members < size:
+            for router in sorted(neighbours[queue.popleft()]):
+                if router not in areas and members < size:
+                    areas[router] = number
+                    members += 1
+                    queue.append(router)
+        number += 1
+    return areas
+
+## Compute a shortest path tree over adjacency lists.
+#  Entries with equal cost leave the heap in the order they were pushed, so with
+#  sorted adjacency lists the tree only depends on the links, not on their history.
+#  @param adjacency List of lists of (neighbour, cost, tag) tuples.
+#  @param source Index of the root.
+#  @return Tuple (cost, predecessor, tag) of arrays, tag holding the tag of the
+#          link each node is reached through.
+def _tree(adjacency, source):
+    n = len(adjacency)
+    cost = array('d', [INFINITY]) * n
+    predecessor = array('q', [-1]) * n
+    tag = array('q', [-1]) * n
+    visited = bytearray(n)
+    counter = count()
+    cost[source] = 0
+    queue = [(0, next(counter), source)]
+    while queue:
+        cost_to_u, _, u = heappop(queue)
+        if visited[u]:
+            continue
+        visited[u] = 1
+        for v, link_cost, link_tag in adjacency[u]:
+            cost_to_v = cost_to_u + link_cost
+            if cost_to_v < cost[v]:
+                cost[v] = cost_to_v
+                predecessor[v] = u
+                tag[v] = link_tag
+                heappush(queue, (cost_to_v, next(counter), v))
+    return cost, predecessor, tag
+
+## Derive the first hops of a row from its predecessors.
+#  @param predecessor Array of predecessor indices, -1 for the source and unreachable nodes.
+#  @param source Index of the source.
+#  @return Array of first hop indices, -1 where unreachable.
+def _first_hops(predecessor, source):
+    first_hop = array('q', [-1]) * len(predecessor)
+    first_hop[source] = source
+    for t in range(len(predecessor)):
+        if first_hop[t] >= 0 or predecessor[t] < 0:
+            continue
+        # Walk up to a node whose first hop is known, or to a neighbour of the source
+        chain = []
+        u = t
+        while first_hop[u] < 0 and predecessor[u] != source:
+            chain.append(u)
+            u = predecessor[u]
+        if first_hop[u] < 0:
+            first_hop[u] = u
+        for v in chain:
+            first_hop[v] = first_hop[u]
+    return first_hop
+
+class _Area:
+    """Routers of an area and their shortest path trees over the links of the area."""
+    def __init__(self, number, members):
+        self.number = number
+        # Indices of the routers in the routing, in increasing order
+        self.members = members
+        self.local = {g: i for i, g in enumerate(members)}
+        # Local indices of the routers with a link to another area
+        self.borders = []
+        self.is_border = bytearray(len(members))
+        # Row i * len(members) + j holds the route of members[i] to members[j]
+        self.cost = None
+        self.predecessor = None
+
+class AreaRouting:
+    """
+    Routing tables of a topology computed area by area.
+    The table holds costs, first hops and predecessors like the table of
+    linkstate.calculate_shortest_paths, and is updated in place by update.
+    """
+    ## Route a topology.
+    #  @param links Iterable of (r1, r2, cost) links.
+    #  @param areas Dictionary mapping router IDs to areas, a router it does not
+    #         list is an area of its own.
+    #  @param sources Routers the table has rows and columns for, by default the
+    #         routers that have a link, in increasing order.
+    def __init__(self, links, areas, sources=None):
+        self.areas = areas
+        self.fixed_sources = None if sources is None else list(sources)
+        self._build(self._link_costs(links))
+
+    ## Map each undirected link to its cost.
+    @staticmethod
+    def _link_costs(links):
+        return {edge_key(r1, r2): cost for r1, r2, cost in links}
+
+    ## Routers the table has rows for.
+    def _sources(self):
+        if self.fixed_sources is not None:
+            return self.fixed_sources
+        return sorted({router for key in self.links for router in key})
+
+    ## Route every area, the backbone and every row from scratch.
+    def _build(self, links):
+        self.links = links
+        routers = {router for key in links for router in key}.union(self.fixed_sources or ())
+        self.ids = sorted(routers)
+        self.index = {router: i for i, router in enumerate(self.ids)}
+        self.neighbours = [{} for _ in self.ids]
+        for (r1, r2), cost in links.items():
+            self.neighbours[self.index[r1]][self.index[r2]] = cost
+            self.neighbours[self.index[r2]][self.index[r1]] = cost
+        numbers = {}
+        self.area_of = array('q', (numbers.setdefault(self.areas.get(router, ('router', router)), len(numbers))
+                                   for router in self.ids))
+        members = [[] for _ in numbers]
+        for g, number in enumerate(self.area_of):
+            members[number].append(g)
+        self.area_list = [_Area(number, routers) for number, routers in enumerate(members)]
+        for area in self.area_list:
+            self._route_area(area)
+        self._route_backbone()
+        self.table = RoutingTable(self.ids, self._sources(), with_predecessors=True)
+        for source in self.table.sources:
+            self._compose(source)
+
+    ## Find the borders of an area.
+    def _find_borders(self, area):
+        area.borders = [i for i, g in enumerate(area.members)
+                        if any(self.area_of[v] != area.number for v in self.neighbours[g])]
+        area.is_border = bytearray(len(area.members))
+        for i in area.borders:
+            area.is_border[i] = 1
+
+    ## Compute the trees of every router of an area over the links of the area.
+    def _route_area(self, area):
+        instrumentation.count('areas_recomputed')
+        adjacency = [sorted((area.local[v], cost, -1) for v, cost in self.neighbours[g].items()
+                            if self.area_of[v] == area.number) for g in area.members]
+        k = len(area.members)
+        area.cost = array('d')
+        area.predecessor = array('q')
+        for i in range(k):
+            cost, predecessor, _ = _tree(adjacency, i)
+            area.cost.extend(cost)
+            area.predecessor.extend(predecessor)
+        self._find_borders(area)
+
+    ## Compute the trees of every border over the backbone.
+    #  A summary link is tagged with the number of its area, a link between two
+    #  areas with -1.
+    def _route_backbone(self):
+        nodes = sorted(area.members[i] for area in self.area_list for i in area.borders)
+        index = {g: b for b, g in enumerate(nodes)}
+        adjacency = [[] for _ in nodes]
+        for area in self.area_list:
+            k = len(area.members)
+            for i in area.borders:
+                links = adjacency[index[area.members[i]]]
+                for j in area.borders:
+                    cost = area.cost[i * k + j]
+                    if i != j and cost != INFINITY:
+                        links.append((index[area.members[j]], cost, area.number))
+        for b, g in enumerate(nodes):
+            adjacency[b].extend((index[v], cost, -1) for v, cost in self.neighbours[g].items()
+                                if self.area_of[v] != self.area_of[g])
+            adjacency[b].sort()
+        self.backbone_nodes = nodes
+        self.backbone_index = index
+        self.backbone = [_tree(adjacency, b) for b in range(len(nodes))]
+
+    ## Get the router before a border on the backbone route from another border.
+    #  @param entry Backbone index of the border the route starts from.
+    #  @param b Backbone index of the border reached.
+    #  @return Index of the router before it on the links of the topology.
+    def _backbone_predecessor(self, entry, b):
+        _, predecessor, tag = self.backbone[entry]
+        previous = self.backbone_nodes[predecessor[b]]
+        if tag[b] < 0:
+            return previous
+        area = self.area_list[tag[b]]
+        position = area.local[previous] * len(area.members) + area.local[self.backbone_nodes[b]]
+        return area.members[area.predecessor[position]]
+
+    ## Compute the row of a source in the table.
+    #  @param source Router ID of the source.
+    #  @param areas Numbers of the areas whose routes can have changed while the
+    #         area of the source and the backbone routes from its borders did not,
+    #         None to compute the whole row.
+    #  @return Whether the row changed.
+    def _compose(self, source, areas=None):
+        table = self.table
+        g = self.index[source]
+        home = self.area_list[self.area_of[g]]
+        k = len(home.members)
+        row = home.local[g] * k
+        start, end = table.bounds(source)
+        if areas is None:
+            cost = array('d', [INFINITY]) * len(self.ids)
+            predecessor = array('q', [-1]) * len(self.ids)
+        else:
+            cost = table.cost[start:end]
+            predecessor = table.predecessor[start:end]
+
+        # Borders: inside the area of the source, or over the backbone from one of its borders
+        entries = [(home.cost[row + i], self.backbone_index[home.members[i]]) for i in home.borders
+                   if home.cost[row + i] != INFINITY]
+        moved = set()
+        for b, target in enumerate(self.backbone_nodes):
+            area = self.area_of[target]
+            best, before, entry = INFINITY, -1, -1
+            if area == home.number:
+                j = home.local[target]
+                best = home.cost[row + j]
+                if home.predecessor[row + j] >= 0:
+                    before = home.members[home.predecessor[row + j]]
+            for d, e in entries:
+                through = d + self.backbone[e][0][b]
+                if through < best:
+                    best, entry = through, e
+            if entry >= 0:
+                before = self._backbone_predecessor(entry, b)
+            if cost[target] != best:
+                moved.add(area)
+            cost[target] = best
+            predecessor[target] = before
+
+        # Other routers: inside the area of the source, or through a border of their area
+        for area in self.area_list if areas is None else [self.area_list[a] for a in sorted(moved.union(areas))]:
+            k = len(area.members)
+            borders = [(cost[area.members[i]], i * k) for i in area.borders if cost[area.members[i]] != INFINITY]
+            for j, target in enumerate(area.members):
+                if area.is_border[j]:
+                    continue
+                best, before = INFINITY, -1
+                if area is home and home.cost[row + j] != INFINITY:
+                    best = home.cost[row + j]
+                    if home.predecessor[row + j] >= 0:
+                        before = home.members[home.predecessor[row + j]]
+                for d, offset in borders:
+                    through = d + area.cost[offset + j]
+                    if through < best:
+                        best, before = through, area.members[area.predecessor[offset + j]]
+                cost[target] = best
+                predecessor[target] = before
+
+        if cost == table.cost[start:end] and predecessor == table.predecessor[start:end]:
+            return False
+        table.set_row(source, cost, _first_hops(predecessor, g), predecessor)
+        return True
+
+    ## Bring the routing to a new topology.
+    #  Only the areas with a changed link between two of their routers are
+    #  routed again. A router that was not in the topology before routes
+    #  everything from scratch.
+    #  @param links Iterable of (r1, r2, cost) links of the new topology.
+    #  @return Set of the sources whose row changed, or None if the table was
+    #          replaced by one with other rows.
+    def update(self, links):
+        links = self._link_costs(links)
+        changed = [key for key in self.links.keys() | links.keys() if self.links.get(key) != links.get(key)]
+        if not changed:
+            return set()
+        if any(router not in self.index for key in changed for router in key):
+            self._build(links)
+            return None
+        self.links = links
+        routed = set()
+        bordered = set()
+        for r1, r2 in changed:
+            i, j = self.index[r1], self.index[r2]
+            cost = links.get((r1, r2))
+            if cost is None:
+                self.neighbours[i].pop(j, None)
+                self.neighbours[j].pop(i, None)
+            else:
+                self.neighbours[i][j] = self.neighbours[j][i] = cost
+            if self.area_of[i] == self.area_of[j]:
+                routed.add(self.area_of[i])
+            else:
+                bordered.update((self.area_of[i], self.area_of[j]))
+        for number in sorted(routed):
+            self._route_area(self.area_list[number])
+        for number in sorted(bordered - routed):
+            self._find_borders(self.area_list[number])
+        self._route_backbone()
+
+        dirty = routed | bordered
+        sources = self._sources()
+        if sources != self.table.sources:
+            # Routers left or joined the table
+            self.table = RoutingTable(self.ids, sources, with_predecessors=True)
+            for source in sources:
+                self._compose(source)
+            return None
+        changed_sources = set()
+        for source in sources:
+            if self.area_of[self.index[source]] in dirty:
+                instrumentation.count('sources_recomputed')
+                if self._compose(source):
+                    changed_sources.add(source)
+            elif self._compose(source, dirty):
+                changed_sources.add(source)
+        return changed_sources
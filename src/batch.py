@@ -0,0 +1,108 @@
+## @file batch
+#  Run many routing scenarios in one interpreter.
+#  A manifest lists one scenario per line as
+#      protocol topology messages changes output [options]
+#  where protocol is ls or dv and options are the command line options of
+#  linkstate.py or distancevector.py. The four file paths are relative to the
+#  directory of the manifest, paths given as options to the current directory.
+#  Blank lines and lines starting with # are skipped. Each scenario calls the
+#  main function of its script, so its output file is the one a separate run
+#  writes, without paying for an interpreter start per scenario.
+import argparse
+import multiprocessing
+import os
+import shlex
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import distancevector
+import instrumentation
+import linkstate
+
+## Entry points of the protocols of a manifest.
+ENTRY_POINTS = {'ls': linkstate.main, 'dv': distancevector.main}
+
+## Scenario of a manifest, options is a tuple of command line options.
+Scenario = namedtuple('Scenario', 'protocol topology messages changes output options')
+
+## Outcome of a scenario, error is None if it ran to the end.
+Result = namedtuple('Result', 'scenario seconds error')
+
+## Read the scenarios of a manifest.
+#  @param file_path Path of the manifest.
+#  @return List of Scenario tuples with paths resolved against the manifest's directory.
+def read_manifest(file_path):
+    directory = os.path.dirname(os.path.abspath(file_path))
+    scenarios = []
+    with open(file_path) as file:
+        for number, line in enumerate(file, 1):
+            fields = shlex.split(line, comments=True)
+            if not fields:
+                continue
+            if len(fields) < 5 or fields[0] not in ENTRY_POINTS:
+                raise ValueError(f"{file_path}:{number}: expected 'ls|dv topology messages changes output [options]'")
+            paths = [os.path.join(directory, path) for path in fields[1:5]]
+            scenarios.append(Scenario(fields[0], *paths, tuple(fields[5:])))
+    return scenarios
+
+## Build the command line arguments of a scenario.
+#  @return List of arguments for the main function of its script.
+def scenario_arguments(scenario):
+    return [scenario.topology, scenario.messages, scenario.changes, '--output', scenario.output, *scenario.options]
+
+## Run a scenario in this process.
+#  Errors, including invalid options, are returned instead of raised so one
+#  broken scenario does not stop the others.
+#  @param scenario Scenario tuple.
+#  @return Result of the scenario.
+def run_scenario(scenario):
+    start = time.perf_counter()
+    error = None
+    try:
+        ENTRY_POINTS[scenario.protocol](scenario_arguments(scenario))
+    except SystemExit as exit:
+        # argparse exits on invalid options, after printing the usage
+        if exit.code:
+            error = f"exit status {exit.code}"
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+    finally:
+        # A failed --stats run must not leave its collector to the next scenario
+        instrumentation.disable()
+    return Result(scenario, time.perf_counter() - start, error)
+
+## Run scenarios, in this process or spread over a pool of processes.
+#  Scenarios writing to the same output file must not run in parallel, link
+#  state appends to its output file.
+#  @param scenarios Iterable of Scenario tuples.
+#  @param workers Number of worker processes, 1 runs every scenario in this process.
+#  @return List of Result tuples in the order of the scenarios.
+def run_batch(scenarios, workers=1):
+    scenarios = list(scenarios)
+    if workers <= 1 or len(scenarios) < 2:
+        return [run_scenario(scenario) for scenario in scenarios]
+    # Pool workers are not daemons, so scenarios can still use --workers
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        return list(pool.map(run_scenario, scenarios))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the routing scenarios of a manifest in one interpreter.")
+    parser.add_argument('manifest', help="File with one 'ls|dv topology messages changes output [options]' scenario per line.")
+    parser.add_argument('--workers', type=int, default=1, help="Number of processes the scenarios are spread over.")
+    args = parser.parse_args()
+
+    try:
+        scenarios = read_manifest(args.manifest)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    start = time.perf_counter()
+    results = run_batch(scenarios, args.workers)
+    for result in results:
+        status = 'ok' if result.error is None else f"failed: {result.error}"
+        print(f"{result.scenario.protocol} {result.scenario.output}: {status} in {result.seconds:.3f}s")
+    failed = sum(result.error is not None for result in results)
+    print(f"{len(results)} scenarios, {failed} failed, {time.perf_counter() - start:.3f}s")
+    sys.exit(1 if failed else 0)
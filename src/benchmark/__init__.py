@@ -0,0 +1,3 @@
+## @package benchmark
+#  Synthetic workload generators and timed benchmarks of the routing modules.
+#  Run from src with: python -m benchmark --sizes 100 1000 --report results.json
@@ -0,0 +1,31 @@
+## @file __main__
+#  Command line entry point of the benchmarks, run from src as python -m benchmark.
+import argparse
+import json
+
+from benchmark.generators import TOPOLOGIES
+from benchmark.suite import ROUTING_LIMIT, run_suite
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description="Benchmark parsing, routing and output.")
+    parser.add_argument('--topologies', nargs='+', choices=sorted(TOPOLOGIES), default=sorted(TOPOLOGIES),
+                        help="Topology generators to benchmark.")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[100, 1000],
+                        help="Numbers of routers of the generated topologies.")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs of each phase, the best time is reported.")
+    parser.add_argument('--messages', type=int, default=1000, help="Number of messages routed in the output phases.")
+    parser.add_argument('--changes', type=int, default=100, help="Number of changes written with each workload.")
+    parser.add_argument('--routing-limit', type=int, default=ROUTING_LIMIT,
+                        help="Largest topology the all-pairs routing and output phases run on.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the workload generators.")
+    parser.add_argument('--workdir', help="Keep the generated workload files in this directory.")
+    parser.add_argument('--report', help="File the JSON report is written to, standard output by default.")
+    args = parser.parse_args()
+
+    report = run_suite(args.topologies, args.sizes, args.workdir, repeat=args.repeat, messages=args.messages,
+                       changes=args.changes, routing_limit=args.routing_limit, seed=args.seed)
+    if args.report:
+        with open(args.report, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
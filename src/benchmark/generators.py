@@ -0,0 +1,147 @@
+## @file generators
+#  Synthetic workloads for the benchmarks.
+#  Topologies are lists of (r1, r2, cost) links over routers 1..n, every
+#  generator returns a connected topology without parallel links. All
+#  generators take a seed so a workload can be rebuilt exactly.
+import random
+
+from topology import REMOVE_COST
+
+## Build a random connected topology.
+#  A random spanning tree keeps the topology connected, the remaining links
+#  join random pairs of routers until the average degree is reached.
+#  @param n Number of routers.
+#  @param degree Average number of links per router.
+#  @param max_cost Largest link cost, costs are drawn from 1..max_cost.
+#  @param seed Seed of the random generator.
+#  @return List of tuples (r1, r2, cost).
+def random_topology(n, degree=4, max_cost=10, seed=0):
+    rng = random.Random(seed)
+    pairs = set()
+    links = []
+    for router in range(2, n + 1):
+        peer = rng.randint(1, router - 1)
+        pairs.add((peer, router))
+        links.append((peer, router, rng.randint(1, max_cost)))
+    target = min(n * degree // 2, n * (n - 1) // 2)
+    while len(links) < target:
+        r1, r2 = sorted(rng.sample(range(1, n + 1), 2))
+        if (r1, r2) not in pairs:
+            pairs.add((r1, r2))
+            links.append((r1, r2, rng.randint(1, max_cost)))
+    return links
+
+## Build a grid topology.
+#  Router (row, column) has ID row * columns + column + 1 and is linked to its
+#  right and lower neighbours.
+#  @param rows Number of rows.
+#  @param columns Number of columns, defaults to rows.
+#  @param max_cost Largest link cost, costs are drawn from 1..max_cost.
+#  @param seed Seed of the random generator.
+#  @return List of tuples (r1, r2, cost).
+def grid_topology(rows, columns=None, max_cost=10, seed=0):
+    rng = random.Random(seed)
+    columns = rows if columns is None else columns
+    links = []
+    for row in range(rows):
+        for column in range(columns):
+            router = row * columns + column + 1
+            if column + 1 < columns:
+                links.append((router, router + 1, rng.randint(1, max_cost)))
+            if row + 1 < rows:
+                links.append((router, router + columns, rng.randint(1, max_cost)))
+    return links
+
+## Build a ring topology.
+#  @param n Number of routers, at least 3.
+#  @param max_cost Largest link cost, costs are drawn from 1..max_cost.
+#  @param seed Seed of the random generator.
+#  @return List of tuples (r1, r2, cost).
+def ring_topology(n, max_cost=10, seed=0):
+    rng = random.Random(seed)
+    return [(router, router % n + 1, rng.randint(1, max_cost)) for router in range(1, n + 1)]
+
+## Build a scale-free topology by preferential attachment (Barabasi-Albert).
+#  Each new router links to m distinct routers picked with a probability
+#  proportional to their degree.
+#  @param n Number of routers.
+#  @param m Number of links of each new router.
+#  @param max_cost Largest link cost, costs are drawn from 1..max_cost.
+#  @param seed Seed of the random generator.
+#  @return List of tuples (r1, r2, cost).
+def scale_free_topology(n, m=2, max_cost=10, seed=0):
+    rng = random.Random(seed)
+    m = max(1, min(m, n - 1))
+    # Start from a fully linked core of m + 1 routers
+    links = [(r1, r2, rng.randint(1, max_cost)) for r1 in range(1, m + 2) for r2 in range(r1 + 1, m + 2)]
+    # Every router appears once per link end, sampling it is sampling by degree
+    ends = [router for r1, r2, _ in links for router in (r1, r2)]
+    for router in range(m + 2, n + 1):
+        peers = set()
+        while len(peers) < m:
+            peers.add(rng.choice(ends))
+        for peer in sorted(peers):
+            links.append((peer, router, rng.randint(1, max_cost)))
+            ends.extend((peer, router))
+    return links
+
+## Build a square grid topology of about n routers.
+def square_grid_topology(n, seed=0):
+    return grid_topology(max(2, round(n ** 0.5)), seed=seed)
+
+## Topology generators by name, each called as generator(n, seed=seed).
+TOPOLOGIES = {
+    'random': random_topology,
+    'grid': square_grid_topology,
+    'ring': ring_topology,
+    'scale_free': scale_free_topology,
+}
+
+## Build a stream of messages between random routers.
+#  @param links Topology the messages are sent over.
+#  @param count Number of messages.
+#  @param seed Seed of the random generator.
+#  @return List of tuples (source, destination, message).
+def message_stream(links, count, seed=0):
+    rng = random.Random(seed)
+    routers = sorted({router for r1, r2, _ in links for router in (r1, r2)})
+    return [(rng.choice(routers), rng.choice(routers), f"message {i}") for i in range(count)]
+
+## Build a stream of link changes.
+#  Changes update the cost of an existing link, remove it (REMOVE_COST) or add a
+#  link between two routers.
+#  @param links Topology the changes apply to.
+#  @param count Number of changes.
+#  @param remove_ratio Share of the changes that remove a link.
+#  @param add_ratio Share of the changes that add a link between random routers.
+#  @param max_cost Largest link cost, costs are drawn from 1..max_cost.
+#  @param seed Seed of the random generator.
+#  @return List of tuples (r1, r2, cost).
+def change_stream(links, count, remove_ratio=0.1, add_ratio=0.1, max_cost=10, seed=0):
+    rng = random.Random(seed)
+    routers = sorted({router for r1, r2, _ in links for router in (r1, r2)})
+    changes = []
+    for _ in range(count):
+        draw = rng.random()
+        if draw < add_ratio and len(routers) > 1:
+            r1, r2 = rng.sample(routers, 2)
+            changes.append((r1, r2, rng.randint(1, max_cost)))
+        else:
+            r1, r2, _ = rng.choice(links)
+            cost = REMOVE_COST if draw < add_ratio + remove_ratio else rng.randint(1, max_cost)
+            changes.append((r1, r2, cost))
+    return changes
+
+## Write links or changes to a file, one 'r1 r2 cost' per line.
+#  @param file_path Path of the file.
+#  @param links Iterable of (r1, r2, cost) tuples.
+def write_links(file_path, links):
+    with open(file_path, 'w') as file:
+        file.write(''.join(f"{r1} {r2} {cost}\n" for r1, r2, cost in links))
+
+## Write messages to a file, one 'source destination message' per line.
+#  @param file_path Path of the file.
+#  @param messages Iterable of (source, destination, message) tuples.
+def write_messages(file_path, messages):
+    with open(file_path, 'w') as file:
+        file.write(''.join(f"{src} {dest} {message}\n" for src, dest, message in messages))
@@ -0,0 +1,115 @@
+## @file suite
+#  Timed benchmarks of parsing, routing and output on synthetic workloads.
+#  Every phase is run a few times on the same files and the best time is kept.
+#  The report is a JSON document that can be stored and compared across versions.
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import distancevector
+import linkstate
+from benchmark.generators import TOPOLOGIES, change_stream, message_stream, write_links, write_messages
+from message_router import MessageRouter
+from output import OutputWriter
+from parsers import read_topology
+
+## Largest number of routers the all-pairs routing phases are run for.
+#  Routing tables hold one entry per pair of routers, so larger topologies are
+#  only generated and parsed.
+ROUTING_LIMIT = 2000
+
+## Time a function.
+#  @param function Function called without arguments.
+#  @param repeat Number of runs.
+#  @return Tuple (best time in seconds, result of the last run).
+def best_time(function, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+## Benchmark one topology.
+#  @param kind Name of the topology generator in TOPOLOGIES.
+#  @param routers Requested number of routers.
+#  @param directory Directory the workload files are written to.
+#  @param repeat Number of runs of each phase.
+#  @param messages Number of messages routed in the output phase.
+#  @param changes Number of changes in the change stream written with the workload.
+#  @param routing_limit Largest number of routers the routing phases are run for.
+#  @param seed Seed of the generators.
+#  @return Dictionary with the size of the workload and the best time of each phase.
+def benchmark_topology(kind, routers, directory, repeat=3, messages=1000, changes=100,
+                       routing_limit=ROUTING_LIMIT, seed=0):
+    links = TOPOLOGIES[kind](routers, seed=seed)
+    prefix = os.path.join(directory, f"{kind}_{routers}")
+    topology_path = prefix + '_topology.txt'
+    messages_path = prefix + '_messages.txt'
+    write_links(topology_path, links)
+    write_messages(messages_path, message_stream(links, messages, seed))
+    write_links(prefix + '_changes.txt', change_stream(links, changes, seed=seed))
+
+    nodes = {router for r1, r2, _ in links for router in (r1, r2)}
+    result = {'topology': kind, 'routers': len(nodes), 'links': len(links), 'messages': messages, 'phases': {}}
+    phases = result['phases']
+    phases['parse'], _ = best_time(lambda: read_topology(topology_path), repeat)
+    phases['parse_messages'], _ = best_time(lambda: MessageRouter.from_file(messages_path, unique_pairs=True), repeat)
+    if len(nodes) > routing_limit:
+        return result
+
+    phases['populate_linkstate_info'], complete_edges = best_time(
+        lambda: linkstate.populate_linkstate_info(links), repeat)
+    phases['build_graph'], graph = best_time(lambda: linkstate.build_graph(complete_edges, sorted(nodes)), repeat)
+    phases['calculate_shortest_paths'], paths = best_time(
+        lambda: linkstate.calculate_shortest_paths(graph, nodes), repeat)
+    phases['distance_vector_routing'], (distance_vectors, next_hops) = best_time(
+        lambda: distancevector.distance_vector_routing(links), repeat)
+
+    output_file_path = prefix + '_output.txt'
+    def write_linkstate():
+        with OutputWriter(output_file_path, 'w') as output:
+            linkstate.print_shortest_paths1(paths, output)
+            linkstate.print_shortest_paths(paths, messages_path, output)
+    def write_distance_vector():
+        with OutputWriter(output_file_path, 'w') as output:
+            distancevector.write_output_file(distance_vectors, next_hops,
+                                             MessageRouter.from_file(messages_path, follow_next_hops=True), output)
+    phases['linkstate_output'], _ = best_time(write_linkstate, repeat)
+    phases['distance_vector_output'], _ = best_time(write_distance_vector, repeat)
+    return result
+
+## Get the revision of the working tree the benchmarks run on.
+#  @return Output of git describe, or None outside of a git checkout.
+def revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+## Run the benchmarks of every topology kind and size.
+#  @param kinds Names of topology generators.
+#  @param sizes Numbers of routers.
+#  @param directory Directory for the workload files, a temporary one by default.
+#  @return Report dictionary with the environment and one result per workload.
+def run_suite(kinds, sizes, directory=None, **options):
+    report = {
+        'revision': revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [],
+    }
+    with tempfile.TemporaryDirectory() as scratch:
+        for kind in kinds:
+            for routers in sizes:
+                result = benchmark_topology(kind, routers, directory or scratch, **options)
+                report['results'].append(result)
+                print(f"{kind} {result['routers']} routers: " +
+                      ', '.join(f"{phase} {seconds:.4f}s" for phase, seconds in result['phases'].items()),
+                      file=sys.stderr)
+    return report
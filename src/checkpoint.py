@@ -0,0 +1,87 @@
+## @file checkpoint
+#  Checkpoints of runs over long changes files.
+#  A checkpoint holds the routing state reached after a window of changes, the
+#  byte offset just after that window in the changes file and the size of the
+#  output file once the window was written. A resumed run cuts the output back
+#  to that size and goes on with the next window, so it writes the output of an
+#  uninterrupted run without recomputing the windows before the checkpoint.
+#  Checkpoints are pickles, only resume checkpoints written by your own runs.
+import os
+import pickle
+import time
+
+## Format version of checkpoints.
+VERSION = 1
+## Seconds between two checkpoints by default.
+DEFAULT_INTERVAL = 300.0
+
+## Describe a run, a checkpoint is only resumed by a run with the same description.
+#  @param script Name of the script.
+#  @param files Paths of the input and output files.
+#  @param args Parsed command line arguments.
+#  @param options Names of the arguments that change the output.
+#  @return Dictionary of the settings.
+def run_settings(script, files, args, options):
+    settings = {'script': script, 'files': [os.path.abspath(path) for path in files]}
+    settings.update((name, getattr(args, name)) for name in options)
+    return settings
+
+class Checkpointer:
+    """
+    Writes the checkpoints of a run, at most one per interval.
+    Each checkpoint is written to a temporary file and moved over the previous
+    one, so an interrupted write leaves the previous checkpoint intact.
+    """
+    ## Create the writer, the interval starts now.
+    #  @param file_path Path of the checkpoint.
+    #  @param settings Settings of the run, as returned by run_settings.
+    #  @param interval Seconds between two checkpoints, 0 to write one after every window.
+    def __init__(self, file_path, settings, interval=DEFAULT_INTERVAL):
+        self.file_path = file_path
+        self.settings = settings
+        self.interval = interval
+        self.last = time.monotonic()
+
+    ## Tell whether the interval since the last checkpoint has passed.
+    def due(self):
+        return time.monotonic() - self.last >= self.interval
+
+    ## Write a checkpoint.
+    #  @param output OutputWriter of the run, written through to the disk first.
+    #  @param changes_offset Byte offset in the changes file just after the last window applied.
+    #  @param state Dictionary of the routing state to restore.
+    def save(self, output, changes_offset, state):
+        checkpoint = {'version': VERSION, 'settings': self.settings, 'changes_offset': changes_offset,
+                      'output_size': output.checkpoint(), 'state': state}
+        temporary = self.file_path + '.tmp'
+        with open(temporary, 'wb') as file:
+            pickle.dump(checkpoint, file, pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.file_path)
+        self.last = time.monotonic()
+
+## Load a checkpoint and cut the output of the run back to its size.
+#  @param file_path Path of the checkpoint.
+#  @param settings Settings of the resuming run, they must be those of the checkpoint.
+#  @param output_path Path of the output file of the run.
+#  @return Tuple (byte offset to read the changes file from, state dictionary).
+def resume(file_path, settings, output_path):
+    try:
+        with open(file_path, 'rb') as file:
+            checkpoint = pickle.load(file)
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError) as error:
+        raise ValueError(f"{file_path} is not a checkpoint: {error}") from error
+    if not isinstance(checkpoint, dict) or checkpoint.get('version') != VERSION:
+        raise ValueError(f"{file_path} is not a checkpoint of version {VERSION}")
+    saved = checkpoint['settings']
+    changed = sorted(name for name in settings.keys() | saved.keys() if settings.get(name) != saved.get(name))
+    if changed:
+        raise ValueError(f"{file_path} was written by a run with other {', '.join(changed)}")
+    size = checkpoint['output_size']
+    if not os.path.exists(output_path) or os.path.getsize(output_path) < size:
+        raise ValueError(f"{output_path} is shorter than when {file_path} was written")
+    # Drop what was written after the checkpoint, the run writes it again
+    with open(output_path, 'r+b') as file:
+        file.truncate(size)
+    return checkpoint['changes_offset'], checkpoint['state']
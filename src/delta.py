@@ -0,0 +1,208 @@
+## @file delta
+#  Delta log of forwarding tables.
+#  Instead of rewriting every forwarding table after each change, a delta log
+#  holds the full tables once and then only the entries that changed. Each
+#  block starts with a 'table N' line followed by N 'router destination next_hop
+#  cost' entries, an entry whose route was lost reads 'router destination None
+#  inf' and a router that left the network is a line with its ID alone. The
+#  message lines of the block follow unchanged. The first line of the log tells
+#  whether the tables are written with routers and destinations sorted or in
+#  table order. In table order a block whose routers or destinations are ordered
+#  differently from the previous one, the first one included, reads 'table N
+#  order' and is followed by a line of its routers and a line of its destinations
+#  before the entries, so the full text output can be rebuilt exactly.
+import argparse
+import gzip
+
+from graph import INFINITY, as_cost
+from output import OutputWriter, output_stream
+
+class DeltaWriter:
+    """
+    Writes forwarding tables as the entries that differ from the last table written.
+    The previous table is kept as a copy. When its layout matches the new one,
+    whole rows are compared as arrays and only rows that differ are scanned.
+    """
+    ## Create a writer for one log.
+    #  @param sort Write routers and destinations in sorted order instead of table order.
+    #  @param hop_text Function formatting the router ID of a next hop, or None, for the log.
+    def __init__(self, sort=False, hop_text=str):
+        self.sort = sort
+        self.hop_text = hop_text
+        self.previous = None
+
+    ## Format an entry of the log.
+    def _line(self, router, target, cost, hop):
+        if cost == INFINITY:
+            return f"{router} {target} None inf\n"
+        return f"{router} {target} {self.hop_text(hop)} {as_cost(cost)}\n"
+
+    ## Format the changes of a table since the previous call, the full table on the first one.
+    #  @param table RoutingTable holding the forwarding tables.
+    #  @return Text of the block of the log, led by the log header on the first call.
+    def format(self, table):
+        previous = self.previous
+        routers = sorted(table.sources) if self.sort else table.sources
+        header = ''
+        order = ''
+        if not self.sort and (previous is None or previous.sources != table.sources or
+                              previous.targets != table.targets):
+            order = f" order\n{' '.join(map(str, table.sources))}\n{' '.join(map(str, table.targets))}"
+        if previous is None:
+            header = f"delta {'sorted' if self.sort else 'listed'}\n"
+            lines = self._changed_entries(table, routers, None)
+        elif previous.ids == table.ids and previous.sources == table.sources and \
+                previous.target_set == table.target_set:
+            lines = self._changed_rows(table, routers, previous)
+        else:
+            lines = self._changed_entries(table, routers, previous)
+        self.previous = table.copy()
+        return f"{header}table {len(lines)}{order}\n" + ''.join(lines)
+
+    ## Write the changes of a table since the previous call, the full table on the first one.
+    #  @param table RoutingTable holding the forwarding tables.
+    #  @param output Open OutputWriter or file object.
+    def write(self, table, output):
+        output.write(self.format(table))
+
+    ## Compare the rows of two tables sharing their layout.
+    def _changed_rows(self, table, routers, previous):
+        lines = []
+        ids, width, target_set = table.ids, table.width, table.target_set
+        cost, next_hop = table.cost, table.next_hop
+        old_cost, old_next_hop = previous.cost, previous.next_hop
+        for router in routers:
+            start, end = table.bounds(router)
+            if cost[start:end] == old_cost[start:end] and next_hop[start:end] == old_next_hop[start:end]:
+                continue
+            for i in range(width):
+                k = start + i
+                if (cost[k] != old_cost[k] or next_hop[k] != old_next_hop[k]) and ids[i] in target_set:
+                    hop = next_hop[k]
+                    lines.append(self._line(router, ids[i], cost[k], ids[hop] if hop >= 0 else None))
+        return lines
+
+    ## Compare two tables entry by entry, after routers were added or removed.
+    #  @param previous RoutingTable written before, None to write every entry.
+    def _changed_entries(self, table, routers, previous):
+        lines = []
+        targets = sorted(table.targets) if self.sort else table.targets
+        if previous is not None:
+            # Destinations that left the table have lost their route
+            targets = targets + [target for target in previous.targets if target not in table.target_set]
+        for router in routers:
+            for target in targets:
+                entry = _entry(table, router, target)
+                if previous is None:
+                    if entry[0] != INFINITY:
+                        lines.append(self._line(router, target, *entry))
+                elif entry != _entry(previous, router, target):
+                    lines.append(self._line(router, target, *entry))
+        if previous is not None:
+            lines.extend(f"{router}\n" for router in previous.sources if router not in table.rows)
+        return lines
+
+## Read the route of a router to a target, unreachable if either is not in the table.
+#  @return Tuple (cost as stored, router ID of the next hop or None).
+def _entry(table, router, target):
+    i = table.index.get(target)
+    if i is None or router not in table.rows or target not in table.target_set:
+        return INFINITY, None
+    k = table.rows[router] * table.width + i
+    hop = table.next_hop[k]
+    return table.cost[k], table.ids[hop] if hop >= 0 else None
+
+## Open a log or output file, gzip compressed when its name ends with .gz.
+def _open(file_path, mode):
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, mode + 't')
+    return open(file_path, mode)
+
+## Stream the blocks of a delta log.
+#  @param file_path Path of the log.
+#  @return Generator of (sort, tables, messages) tuples, one per block. tables maps
+#          each router to a dictionary of destination to (next hop text, cost text)
+#          and is updated in place from block to block, messages is the text of the
+#          message lines of the block. Rows follow the order given by the log, a
+#          destination without a route is kept as None to hold its position.
+def iter_delta_log(file_path):
+    with _open(file_path, 'r') as file:
+        header = file.readline().split()
+        if len(header) != 2 or header[0] != 'delta' or header[1] not in ('sorted', 'listed'):
+            raise ValueError(f"{file_path} is not a delta log")
+        sort = header[1] == 'sorted'
+        tables = {}
+        messages = None
+        for line in file:
+            if not line.startswith('table '):
+                if messages is not None:
+                    messages.append(line)
+                continue
+            if messages is not None:
+                yield sort, tables, ''.join(messages)
+            header = line.split()
+            if len(header) == 3 and header[2] == 'order':
+                _reorder(tables, next(file).split(), next(file).split())
+            for _ in range(int(header[1])):
+                parts = next(file).split()
+                router = int(parts[0])
+                if len(parts) == 1:
+                    tables.pop(router, None)
+                elif parts[3] == 'inf':
+                    row = tables.get(router)
+                    if row is not None and int(parts[1]) in row:
+                        row[int(parts[1])] = None
+                else:
+                    tables.setdefault(router, {})[int(parts[1])] = (parts[2], parts[3])
+            messages = []
+        if messages is not None:
+            yield sort, tables, ''.join(messages)
+
+## Lay out the rows of the tables in the order of a block of the log.
+#  Routers of the tables the block does not list stay behind the others until
+#  the block removes them.
+#  @param tables Tables as yielded by iter_delta_log, updated in place.
+#  @param routers Router IDs of the block as text, in table order.
+#  @param targets Destination IDs of the block as text, in table order.
+def _reorder(tables, routers, targets):
+    targets = [int(target) for target in targets]
+    rows = {}
+    for router in map(int, routers):
+        row = tables.get(router, {})
+        rows[router] = {target: row.get(target) for target in targets}
+    rows.update((router, row) for router, row in tables.items() if router not in rows)
+    tables.clear()
+    tables.update(rows)
+
+## Format the forwarding tables of a block like the full text output.
+#  @param sort Whether routers and destinations are listed in sorted order.
+#  @param tables Tables of the block, as yielded by iter_delta_log.
+#  @return Text of the tables, one 'destination next_hop cost' line per entry and a
+#          blank line after each router.
+def format_tables(sort, tables):
+    chunks = []
+    for router in (sorted(tables) if sort else tables):
+        row = tables[router]
+        chunks.extend(f"{target} {entry[0]} {entry[1]}\n" for target, entry in
+                      (sorted(row.items()) if sort else row.items()) if entry is not None)
+        chunks.append("\n")
+    return ''.join(chunks)
+
+## Rebuild the full text output from a delta log.
+#  @param log_path Path of the delta log.
+#  @param output_file_path Path of the output file, or an open OutputWriter.
+def rebuild_output(log_path, output_file_path):
+    with output_stream(output_file_path, 'w') as output:
+        for sort, tables, messages in iter_delta_log(log_path):
+            output.write(format_tables(sort, tables))
+            output.write(messages)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rebuild the full text output from a delta log.")
+    parser.add_argument('log_file', help="Delta log written with --delta.")
+    parser.add_argument('output_file', help="File the full tables and message paths are written to.")
+    parser.add_argument('--gzip', action='store_true', help="Write the output as a gzip stream.")
+    args = parser.parse_args()
+
+    with OutputWriter(args.output_file, 'w', args.gzip) as output:
+        rebuild_output(args.log_file, output)
@@ -0,0 +1,102 @@
+## @file dense
+#  Vectorized all-pairs routing backend for dense topologies using NumPy.
+#  NumPy is optional, the scripts fall back to the pure Python algorithms without it.
+from array import array
+
+from graph import CompactGraph, RoutingTable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+## Minimum number of nodes before the automatic backend selection considers NumPy.
+DENSE_MIN_NODES = 64
+## Minimum link density (links / possible links) for the automatic selection of NumPy.
+DENSE_THRESHOLD = 0.25
+
+## Compute the link density of a topology.
+#  @param node_count Number of nodes.
+#  @param link_count Number of undirected links.
+#  @return Ratio of links to possible links, between 0 and 1 for simple graphs.
+def density(node_count, link_count):
+    if node_count < 2:
+        return 0.0
+    return 2.0 * link_count / (node_count * (node_count - 1))
+
+## Choose the routing backend for a topology.
+#  @param backend Requested backend: 'python', 'numpy' or 'auto'.
+#  @param node_count Number of nodes.
+#  @param link_count Number of undirected links.
+#  @return 'python' or 'numpy'.
+def choose_backend(backend, node_count, link_count):
+    if backend == 'numpy' and np is None:
+        raise ImportError("The numpy backend requires NumPy to be installed.")
+    if backend == 'auto':
+        if np is not None and node_count >= DENSE_MIN_NODES and density(node_count, link_count) >= DENSE_THRESHOLD:
+            return 'numpy'
+        return 'python'
+    return backend
+
+## Compute all-pairs costs, first hops and predecessors with a vectorized Floyd-Warshall.
+#  Each intermediate node relaxes the whole matrix in one broadcast operation.
+#  @param graph CompactGraph, the matrix rows and columns follow its indices.
+#  @return Tuple (cost, first_hop, predecessor) of N x N arrays, cost is inf and
+#          first_hop and predecessor are -1 where unreachable.
+def floyd_warshall(graph):
+    n = graph.node_count
+    offsets = np.frombuffer(graph.offsets, dtype=np.int64)
+    rows = np.repeat(np.arange(n), np.diff(offsets))
+    cols = np.frombuffer(graph.neighbours, dtype=np.int64)
+    cost = np.full((n, n), np.inf)
+    # Parallel links keep the cheapest cost, removed links are infinite
+    np.minimum.at(cost, (rows, cols), np.frombuffer(graph.costs, dtype=np.float64))
+    np.fill_diagonal(cost, 0)
+
+    reachable = np.isfinite(cost)
+    first_hop = np.where(reachable, np.arange(n, dtype=np.int64)[np.newaxis, :], -1)
+    predecessor = np.where(reachable, np.arange(n, dtype=np.int64)[:, np.newaxis], -1)
+    np.fill_diagonal(predecessor, -1)
+    for k in range(n):
+        through_k = cost[:, k, np.newaxis] + cost[np.newaxis, k, :]
+        shorter = through_k < cost
+        if shorter.any():
+            cost = np.where(shorter, through_k, cost)
+            first_hop = np.where(shorter, first_hop[:, k, np.newaxis], first_hop)
+            predecessor = np.where(shorter, predecessor[np.newaxis, k, :], predecessor)
+    return cost, first_hop, predecessor
+
+## Fill a routing table from the all-pairs matrices of a graph.
+#  @param graph CompactGraph the matrices were computed for.
+#  @param table RoutingTable with one row per source.
+#  @param with_predecessors Copy the predecessor matrix as well.
+def _fill_table(graph, table, with_predecessors):
+    cost, first_hop, predecessor = floyd_warshall(graph)
+    for source in table.sources:
+        i = graph.index.get(source)
+        if i is None:
+            continue
+        table.set_row(source, array('d', cost[i].tobytes()), array('q', first_hop[i].astype(np.int64).tobytes()),
+                      array('q', predecessor[i].astype(np.int64).tobytes()) if with_predecessors else None)
+
+## Calculate shortest paths between all nodes with the NumPy backend.
+#  Costs match linkstate.calculate_shortest_paths, ties between paths of equal
+#  cost may be broken differently.
+#  @param graph CompactGraph as returned by linkstate.build_graph.
+#  @param nodes List of nodes in the graph.
+#  @return Mapping of node pairs to their shortest path and cost, backed by a RoutingTable.
+def linkstate_paths(graph, nodes):
+    table = RoutingTable(graph.ids, nodes, with_predecessors=True)
+    _fill_table(graph, table, True)
+    return table.paths()
+
+## Compute distance vectors and next hops for every router with the NumPy backend.
+#  Distances match distancevector.distance_vector_routing, ties between paths of
+#  equal cost may be broken differently.
+#  @param topology List of tuples (r1, r2, dist) representing the topology.
+#  @return Tuples with distance vectors and next hops, backed by a RoutingTable.
+def distance_vector_tables(topology):
+    graph = CompactGraph(topology, merge_parallel=False)
+    table = RoutingTable(graph.ids, graph.ids)
+    _fill_table(graph, table, False)
+    return table.distances(), table.next_hops()
@@ -1,6 +1,23 @@
 ## @file distancevector
 #  This simulates Distance Vector Routing Protocol using the Bellman-Ford algorithm.
-import sys
+import argparse
+from array import array
+from functools import partial
+from heapq import heappush, heappop
+
+import areas
+import checkpoint
+import dense
+import instrumentation
+import parallel
+from delta import DeltaWriter
+from message_router import MessageRouter
+from output import OutputWriter, output_path, output_stream
+from parsers import (iter_change_windows, iter_changes, iter_messages, iter_timed_changes, iter_timed_messages,
+                     read_topology)
+from snapshot import write_snapshot
+from topology import EdgeStore
+from graph import INFINITY, CompactGraph, RoutingTable, as_cost
 
 ## Parse the topology from a file and return it as a list of tuples.
 #  @param file_path Path to the file containing the topology data.
@@ -10,145 +27,191 @@ def parse_topology(file_path):
     Reads the topology from a file and returns it as a list of tuples.
     Each line in the file should be in the format: r1 r2 dist
     """
-    topology = [] # Initialize an empty list to store topology
-    with open(file_path, 'r') as file: # Opens file in read mode
-        for line in file:        # Iterates over each line in the file
-            parts = line.strip().split()    # Splits the line into parts
-            if len(parts) == 3:         # Checks if there are 3 parts
-                r1, r2, cost = parts    # Unpacks the parts into r1, r2, and cost
-                topology.append((int(r1), int(r2), int(cost)))  # Appends the tuple to the topology list
-    return topology   # Returns the list of tuples to make up the topology
+    return read_topology(file_path)
 
-## Implementation of the Bellman-Ford algorithm to compute routing tables.
-#  @param dst Destination router.
-#  @param routers List of all routers.
-#  @param links List of links between routers as tuples (r1, r2, dist).
-#  @return Tuples with distance and next hops for each router.
-def bellman_ford(dst, routers, links):
-    INFINITY = float('inf') # Defines infinite cost
+## Implementation of the Bellman-Ford algorithm on the arrays of a graph.
+#  Instead of relaxing every link in every pass, only the links touching a router
+#  whose distance changed are queued. Queued links are still relaxed in list order,
+#  a link behind the current one in the same pass and the others in the next pass,
+#  so the result and the tie-breaking on next hops are those of full passes. The
+#  search stops as soon as a pass has nothing left to relax.
+#  @param graph CompactGraph built from the links with merge_parallel=False.
+#  @param dst Index of the destination router in the graph.
+#  @return Tuple (distance, nexthop) of arrays indexed like graph.ids.
+def distance_vector_row(graph, dst):
+    n = graph.node_count
+    link_source, link_target, link_cost = graph.link_source, graph.link_target, graph.link_cost
+    offsets, link_ids = graph.offsets, graph.link_ids
     # Initialize all distances as inf and all hops as none
-    distance = {r: INFINITY for r in routers}
-    nexthop = {r: None for r in routers}
+    distance = array('d', [INFINITY]) * n
+    nexthop = array('q', [-1]) * n
 
     # Set the distance of a router and its relative distance to itself as 0.
     distance[dst] = 0
     nexthop[dst] = dst
     
     # Update the next hops for the destination router
-    for r1, r2, dist in links:
+    known = [dst]
+    for position in range(offsets[dst], offsets[dst + 1]):
+        i = link_ids[position]
+        r1, r2, dist = link_source[i], link_target[i], link_cost[i]
+        if dist == INFINITY:    # A removed link reaches nothing
+            continue
         if r1 == dst:   # If the first router is the destination
             nexthop[r2] = r2 
             distance[r2] = dist 
+            known.append(r2)
         elif r2 == dst: # If the second router is the destination
             nexthop[r1] = r1 
             distance[r1] = dist
+            known.append(r1)
+    # Only links touching a router with a known distance can relax anything
+    pending = sorted({link_ids[position] for r in known for position in range(offsets[r], offsets[r + 1])})
     # Iteratively finds the shortest paths
-    for _ in range(len(routers) - 1):
-        for r1, r2, dist in links:
+    rounds = relaxations = 0
+    for _ in range(n - 1):
+        if not pending:
+            break
+        rounds += 1
+        queued = set(pending)
+        next_pass = set()
+
+        # Queue the links of a changed router for the rest of this pass or the next one
+        def requeue(router, current):
+            for position in range(offsets[router], offsets[router + 1]):
+                j = link_ids[position]
+                if j <= current:
+                    next_pass.add(j)
+                elif j not in queued:
+                    queued.add(j)
+                    heappush(pending, j)
+
+        while pending:
+            i = heappop(pending)
+            r1, r2, dist = link_source[i], link_target[i], link_cost[i]
             # If the distance to r2 through r1 is shorter
             if distance[r1] + dist < distance[r2]:
                 distance[r2] = distance[r1] + dist
-                nexthop[r2] = nexthop[r1] if nexthop[r1] is not None else r1
+                nexthop[r2] = nexthop[r1] if nexthop[r1] >= 0 else r1
+                requeue(r2, i)
             # If the distance to r1 through r2 is shorter
             if distance[r2] + dist < distance[r1]:
                 distance[r1] = distance[r2] + dist
-                nexthop[r1] = nexthop[r2] if nexthop[r2] is not None else r2
+                nexthop[r1] = nexthop[r2] if nexthop[r2] >= 0 else r2
+                requeue(r1, i)
+        # Every link queued in this pass was relaxed once
+        relaxations += len(queued)
+        pending = sorted(next_pass)
 
+    if instrumentation.active is not None:
+        instrumentation.count('bellman_ford_runs')
+        instrumentation.count('bellman_ford_rounds', rounds)
+        instrumentation.count('edge_relaxations', relaxations)
     return distance, nexthop
 
+## Implementation of the Bellman-Ford algorithm to compute routing tables.
+#  @param dst Destination router.
+#  @param routers List of all routers.
+#  @param links List of links between routers as tuples (r1, r2, dist).
+#  @return Tuples with distance and next hops for each router.
+def bellman_ford(dst, routers, links):
+    graph = CompactGraph(links, nodes=routers, merge_parallel=False)
+    distance, nexthop = distance_vector_row(graph, graph.index[dst])
+    return ({r: as_cost(distance[i]) for i, r in enumerate(graph.ids)},
+            {r: graph.ids[nexthop[i]] if nexthop[i] >= 0 else None for i, r in enumerate(graph.ids)})
+
+## Compute the routing table of every router of a graph.
+#  @param graph CompactGraph built from the links with merge_parallel=False.
+#  @param workers Number of processes the destinations are spread over.
+#  @return RoutingTable with one row per destination router.
+def distance_vector_table(graph, workers=1):
+    table = RoutingTable(graph.ids, graph.ids)
+    instrumentation.count('destinations_recomputed', graph.node_count)
+    rows = parallel.map_rows(graph, distance_vector_row, range(graph.node_count), workers)
+    for router, (distance, nexthop) in zip(graph.ids, rows):
+        table.set_row(router, distance, nexthop)
+    return table
+
 ## Simulate distance vector routing protocol.
 #  @param topology List of tuples representing the topology.
-#  @return Tuples with distance vectors and next hops.
-def distance_vector_routing(topology):
+#  @param workers Number of processes the destinations are spread over.
+#  @return Tuples with distance vectors and next hops, backed by a RoutingTable.
+def distance_vector_routing(topology, workers=1):
     """
     Simulates the Distance Vector Routing Protocol using the Bellman-Ford algorithm.
     """
-    # Creates a list of routers from the topology
-    routers = list(set([link[0] for link in topology] + [link[1] for link in topology]))
-    links = topology
-
-    distance_vectors = {}
-    next_hops = {}
+    # Intern the routers in sorted order, so tables of successive topologies
+    # share one layout, and index their links
+    routers = sorted(set([link[0] for link in topology] + [link[1] for link in topology]))
+    graph = CompactGraph(topology, nodes=routers, merge_parallel=False)
     # For every router, calculate the shortest paths to all other routers
-    for router in routers:
-        # Utilize the Bellman-Ford algorithm to calculate shortest paths and next hops
-        distance_vectors[router], next_hops[router] = bellman_ford(router, routers, links)
-
-    return distance_vectors, next_hops
+    table = distance_vector_table(graph, workers)
+    return table.distances(), table.next_hops()
 
 ## Write the routing table and paths for messages to an output file.
+#  Messages are routed through a MessageRouter, so each (source, destination)
+#  pair is walked once and its path is reused while the next hops it was read
+#  from are unchanged. The tables and message paths are formatted first and
+#  written in one call.
 #  @param distance_vectors Distance vectors for each router.
-#  @param next_hops Next hop information for each router.
-#  @param messages List of message tuples to be routed.
-#  @param output_file_path Path to the output file.
-#  @param append_mode Boolean flag to append to the file if True.
-def write_output_file(distance_vectors, next_hops, messages, output_file_path='output.txt', append_mode=False):
+#  @param next_hops Next hop information for each router, as returned by distance_vector_routing.
+#  @param messages Iterable of message tuples to be routed, or a MessageRouter kept across calls.
+#  @param output_file_path Path to the output file, or an open OutputWriter.
+#  @param append_mode Boolean flag to append to the file if True, unused for an OutputWriter.
+#  @param delta_writer Optional DeltaWriter, the tables are then written as the entries
+#         changed since its previous table.
+def write_output_file(distance_vectors, next_hops, messages, output_file_path='output.txt', append_mode=False,
+                      delta_writer=None):
     """
     Writes the forwarding table and paths for messages to the output file.
     """
-    mode = 'a' if append_mode else 'w'
-    with open(output_file_path, mode) as file:
+    chunks = []
+    if delta_writer is not None:
+        # Only the entries changed since the previous table
+        chunks.append(delta_writer.format(next_hops.table))
+    else:
         # Iterate over each router to create a forwarding table
         for router in sorted(distance_vectors.keys()):
             for dst in sorted(distance_vectors[router].keys()):
                 if distance_vectors[router][dst] != float('inf'):
                     next_hop = next_hops[router].get(dst, None)
                     cost = distance_vectors[router][dst]
-                    file.write(f"{dst} {next_hop if next_hop else 'None'} {cost}\n")
-            file.write("\n")
-        # Iterate over each message to write its path.
-        for src, dst, message_text in messages:
-            if src in next_hops and dst in next_hops[src] and dst in distance_vectors[src] and distance_vectors[src][dst] != float('inf'):
-                path = [src]
-                current = src
-                while current != dst:
-                    next_router = next_hops[current].get(dst, None)
-                    if not next_router:  
-                        path = None
-                        break
-                    path.append(next_router)
-                    current = next_router
-                
-                if path:
-                    cost = distance_vectors[src][dst]
-                    hops_str = ' '.join(map(str, path))
-                    file.write(f"from {src} to {dst} cost {cost} hops {hops_str} message {message_text}.\n")
-                else:
-                    file.write(f"from {src} to {dst} cost infinite hops unreachable message {message_text}.\n")
-            else:
-                file.write(f"from {src} to {dst} cost infinite hops unreachable message {message_text}.\n")
-
-            file.write("\n")
+                    chunks.append(f"{dst} {next_hop if next_hop else 'None'} {cost}\n")
+            chunks.append("\n")
+    # Iterate over each message to write its path.
+    if not isinstance(messages, MessageRouter):
+        messages = MessageRouter(messages, follow_next_hops=True)
+    routes = messages.route(next_hops.table)
+    for src, dst, message_text in messages.messages:
+        hops_str, cost = routes[(src, dst)]
+        if hops_str is not None:
+            chunks.append(f"from {src} to {dst} cost {cost} hops {hops_str} message {message_text}.\n")
+        else:
+            chunks.append(f"from {src} to {dst} cost infinite hops unreachable message {message_text}.\n")
+        chunks.append("\n")
+    with output_stream(output_file_path, 'a' if append_mode else 'w') as file:
+        file.write(''.join(chunks))
 
 ## Read changes from a file.
 #  @param changes_file_path Path to the file containing changes.
+#  @param timed Return (time, r1, r2, cost) tuples with the '@time' timestamps of the lines.
 #  @return List of change tuples.
-def read_changes(changes_file_path):
-    changes = []
-    with open(changes_file_path, 'r') as file:
-        for line in file:
-            parts = line.strip().split()
-            if len(parts) == 3:
-                r1, r2, cost = map(int, parts)
-                changes.append((r1, r2, cost))
-    return changes
+def read_changes(changes_file_path, timed=False):
+    if timed:
+        return list(iter_timed_changes(changes_file_path))
+    return list(iter_changes(changes_file_path))
 
 ## Read messages from a file.
 #  @param file_path Path to the file containing messages.
+#  @param timed Return (time, source, destination, message) tuples with the '@time' timestamps of the lines.
 #  @return List of message tuples.
-def read_messages(file_path):
+def read_messages(file_path, timed=False):
     """
     Reads messages from a file and returns them as a list of tuples.
     """
-    messages_list = [] 
-    with open(file_path, 'r') as msg_file:
-        for line in msg_file:
-            parts = line.strip().split(' ', 2) 
-            if len(parts) == 3:
-                src, dest, message = parts
-                src, dest = int(src), int(dest)
-                messages_list.append((src, dest, message))
-    return messages_list
+    if timed:
+        return list(iter_timed_messages(file_path))
+    return list(iter_messages(file_path))
 
 ## Apply changes to the topology.
 #  @param topology Current topology as a list of tuples.
@@ -167,25 +230,244 @@ def apply_changes_to_topology(topology, changes):
     return updated_topology
 
 
-if __name__ == '__main__':
-    if len(sys.argv) != 4:
-        print("Usage: ./dvr <topologyFile> <messageFile> <changesFile>")
-        sys.exit(1)
+## Find the destinations whose routes can be changed by a link change.
+#  The routes towards a destination can only move if the old or the new link
+#  offers one of its endpoints a path at least as cheap as the one it has. Equal
+#  cost paths count too, since the position of the link decides ties.
+#  @param distance_vectors Distance vectors for each router before the change.
+#  @param old_costs Costs of the links being replaced or removed by the change.
+#  @param change Tuple (r1, r2, cost) of the change.
+#  @return List of affected destination routers.
+def affected_destinations(distance_vectors, old_costs, change):
+    r1, r2, cost = change
+    costs = old_costs if cost == -999 else old_costs + [cost]
+    affected = []
+    for router, distance in distance_vectors.items():
+        d1 = distance.get(r1, INFINITY)
+        d2 = distance.get(r2, INFINITY)
+        for dist in costs:
+            if (d1 != INFINITY and d1 + dist <= d2) or (d2 != INFINITY and d2 + dist <= d1):
+                affected.append(router)
+                break
+    return affected
 
-    topology_file = sys.argv[1]
-    message_file = sys.argv[2]
-    changes_file = sys.argv[3]
+## Incrementally update distance vectors and next hops for a single change.
+#  Only the affected destinations are recomputed from scratch on the updated
+#  topology, so a removed link never leaves stale distances behind to count to
+#  infinity. If the change adds or drops a router every table changes and all
+#  destinations are recomputed.
+#  @param topology EdgeStore the change is applied to in place, where it can be
+#         reverted with undo, or a list of tuples that is left unchanged.
+#  @param distance_vectors Distance vectors for each router on that topology.
+#  @param next_hops Next hop information for each router on that topology.
+#  @param change Tuple (r1, r2, cost) to apply, a cost of -999 removes the link.
+#  @param workers Number of processes the affected destinations are spread over.
+#  @return Tuple (updated_topology, distance_vectors, next_hops, destinations, routers) with
+#          the number of destinations recomputed and of routers whose table changed.
+#          Both are also counted as 'destinations_recomputed' and 'routers_touched'.
+def update_distance_vectors(topology, distance_vectors, next_hops, change, workers=1):
+    if isinstance(topology, EdgeStore):
+        # The change record tells which link moved without scanning the topology
+        record = topology.apply(change, move_to_end=True)
+        old_costs = [] if record.old is None else [record.old[2]]
+        updated_topology = topology
+    else:
+        r1, r2, _ = change
+        old_costs = [dist for a, b, dist in topology if (a == r1 and b == r2) or (a == r2 and b == r1)]
+        updated_topology = apply_changes_to_topology(topology, [change])
+    old_table = distance_vectors.table
+    graph = CompactGraph(updated_topology, nodes=old_table.ids, merge_parallel=False)
+    if graph.node_count != old_table.width or any(
+            graph.offsets[i] == graph.offsets[i + 1] for i in range(graph.node_count)):
+        table = distance_vector_table(CompactGraph(updated_topology, merge_parallel=False), workers)
+        instrumentation.count('routers_touched', graph.node_count)
+        return updated_topology, table.distances(), table.next_hops(), graph.node_count, graph.node_count
+
+    affected = affected_destinations(distance_vectors, old_costs, change)
+    instrumentation.count('destinations_recomputed', len(affected))
+    table = old_table.copy()
+    touched = 0
+    rows = parallel.map_rows(graph, distance_vector_row, [graph.index[router] for router in affected], workers)
+    for router, (distance, nexthop) in zip(affected, rows):
+        table.set_row(router, distance, nexthop)
+        # The row of a router holds its routes to every destination
+        start, end = table.bounds(router)
+        if table.cost[start:end] != old_table.cost[start:end] or table.next_hop[start:end] != old_table.next_hop[start:end]:
+            touched += 1
+    instrumentation.count('routers_touched', touched)
+    return updated_topology, table.distances(), table.next_hops(), len(affected), touched
+
+## Run the distance vector simulation.
+#  @param argv List of command line arguments, sys.argv[1:] by default.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate distance vector routing.")
+    parser.add_argument('topology_file', help="File with one 'r1 r2 dist' link per line.")
+    parser.add_argument('message_file', help="File with one 'source destination message' per line.")
+    parser.add_argument('changes_file', help="File with one 'r1 r2 dist' change per line.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Recompute only the destinations affected by each change, --stats reports how "
+                             "many per change and how many routers had their table changed.")
+    parser.add_argument('--backend', choices=['python', 'numpy', 'auto'], default='python',
+                        help="All-pairs routing backend, 'auto' picks numpy for large dense topologies. "
+                             "The numpy backend may break ties between equal cost paths differently.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of processes computing routing tables (python backend).")
+    parser.add_argument('--window', type=int, default=1,
+                        help="Apply the changes in windows of this many lines, coalesced per link, "
+                             "and write the tables once per window (0 for no limit).")
+    parser.add_argument('--window-separators', action='store_true',
+                        help="End a window of changes at each blank line of the changes file.")
+    parser.add_argument('--output', default='output.txt', help="File the tables and message paths are written to.")
+    parser.add_argument('--gzip', action='store_true', help="Write the output as a gzip stream (adds a .gz suffix).")
+    parser.add_argument('--delta', action='store_true',
+                        help="Write the output as a delta log: the tables are written in full once, then only the "
+                             "entries each change modifies (python delta.py rebuilds the full output).")
+    parser.add_argument('--snapshot', metavar='PATH',
+                        help="Write the routing tables in effect after the last change as a binary snapshot (see snapshot.py).")
+    parser.add_argument('--stats', metavar='REPORT',
+                        help="Write phase timings, counters and per-change latencies to REPORT (.csv for CSV, else JSON).")
+    parser.add_argument('--areas', metavar='FILE',
+                        help="Route hierarchically over the areas of FILE, one 'router area' per line, so a change "
+                             "only recomputes its area and the backbone between areas.")
+    parser.add_argument('--area-size', type=int, metavar='N',
+                        help="Route hierarchically over areas of about N routers grown from the topology.")
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help="Save the state of the run to PATH after the initial tables, periodically and at the end.")
+    parser.add_argument('--checkpoint-interval', type=float, default=checkpoint.DEFAULT_INTERVAL,
+                        help="Seconds between two checkpoints, 0 to save one after every window of changes.")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue from the checkpoint given with --checkpoint instead of starting over.")
+    args = parser.parse_args(argv)
+    if args.areas and args.area_size:
+        parser.error("--areas and --area-size are alternatives")
+    if args.area_size is not None and args.area_size < 1:
+        parser.error("--area-size must be at least 1")
+    hierarchical = bool(args.areas or args.area_size)
+    if hierarchical and (args.incremental or args.backend == 'numpy'):
+        parser.error("--areas and --area-size route with their own tables, they cannot be combined with "
+                     "--incremental or --backend numpy")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs the --checkpoint to continue from")
+    if args.stats:
+        instrumentation.enable()
+
+    topology_file = args.topology_file
+    message_file = args.message_file
+    changes_file = args.changes_file
+    output_file = output_path(args.output, args.gzip)
+    settings = checkpoint.run_settings('distancevector', [topology_file, message_file, changes_file, output_file], args,
+                                       ['incremental', 'backend', 'window', 'window_separators', 'delta', 'gzip',
+                                        'areas', 'area_size'])
 
     # Initial setup and routing.
-    initial_topology = parse_topology(topology_file)
-    messages = read_messages(message_file)
-    changes = read_changes(changes_file)
-
-    distance_vectors, next_hops = distance_vector_routing(initial_topology)
-    write_output_file(distance_vectors, next_hops, messages, 'output.txt', append_mode=False)
-
-    # Apply changes to initial setup and redo routing.
-    for change in changes:
-        updated_topology = apply_changes_to_topology(initial_topology, [change])
-        distance_vectors, next_hops = distance_vector_routing(updated_topology)
-        write_output_file(distance_vectors, next_hops, messages, 'output.txt', append_mode=True)
+    with instrumentation.phase('parse'):
+        initial_topology = EdgeStore(parse_topology(topology_file))
+
+    routers = set([link[0] for link in initial_topology] + [link[1] for link in initial_topology])
+    # Areas of the initial topology, every window is routed over them
+    try:
+        area_of = areas.read_areas(args.areas) if args.areas else areas.partition(initial_topology, args.area_size) \
+            if args.area_size else None
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    try:
+        backend = dense.choose_backend(args.backend, len(routers), len(initial_topology))
+    except ImportError as error:
+        parser.error(str(error))
+    if backend == 'numpy':
+        routing = dense.distance_vector_tables
+    else:
+        routing = partial(distance_vector_routing, workers=args.workers)
+
+    start = 0
+    if args.resume:
+        # The initial tables and the tables of the last window the checkpoint saw
+        try:
+            start, state = checkpoint.resume(args.checkpoint, settings, output_file)
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+        initial_topology = state['topology']
+        initial_vectors, initial_hops = state['initial'].distances(), state['initial'].next_hops()
+        next_hops = state['last'].next_hops()
+        area_routing = state['areas']
+    elif hierarchical:
+        with instrumentation.phase('bellman_ford'):
+            area_routing = areas.AreaRouting(initial_topology, area_of)
+        # The routing moves from window to window, the initial tables stay as they are
+        initial_table = area_routing.table.copy()
+        initial_vectors, initial_hops = initial_table.distances(), initial_table.next_hops()
+        next_hops = initial_hops
+    else:
+        area_routing = None
+        with instrumentation.phase('bellman_ford'):
+            initial_vectors, initial_hops = routing(initial_topology)
+        next_hops = initial_hops
+    # Messages are parsed once, their paths are cached across changes
+    with instrumentation.phase('parse'):
+        router = MessageRouter.from_file(message_file, follow_next_hops=True)
+    # Forwarding tables in the same order as the full output, with next hops of 0 shown as None
+    delta_writer = DeltaWriter(sort=True, hop_text=lambda hop: hop if hop else 'None') if args.delta else None
+    if args.resume and delta_writer:
+        delta_writer.previous = state['delta']
+
+    checkpointer = checkpoint.Checkpointer(args.checkpoint, settings, args.checkpoint_interval) if args.checkpoint else None
+    def save_checkpoint(output, offset):
+        checkpointer.save(output, offset, {'topology': initial_topology, 'initial': initial_hops.table,
+                                           'last': next_hops.table, 'areas': area_routing,
+                                           'delta': delta_writer.previous if delta_writer else None})
+
+    # One buffered output handle for the whole run
+    with OutputWriter(output_file, 'a' if args.resume else 'w', args.gzip) as output:
+        if not args.resume:
+            with instrumentation.phase('output'):
+                write_output_file(initial_vectors, initial_hops, router, output, delta_writer=delta_writer)
+            if checkpointer:
+                save_checkpoint(output, start)
+
+        # Apply changes to initial setup and redo routing, streaming the changes file
+        # one window at a time.
+        batched = args.window != 1 or args.window_separators
+        offset = start
+        for window, offset in iter_change_windows(changes_file, args.window, args.window_separators,
+                                                  start, offsets=True):
+            with instrumentation.change(window):
+                if batched:
+                    # Collapse repeated and cancelling changes of the same link
+                    window = initial_topology.net_changes(window)
+                savepoint = initial_topology.savepoint()
+                distance_vectors, next_hops = initial_vectors, initial_hops
+                if hierarchical:
+                    for change in window:
+                        initial_topology.apply(change, move_to_end=True)
+                    # Route again the areas whose links differ from the previous window
+                    with instrumentation.phase('bellman_ford'):
+                        area_routing.update(initial_topology)
+                    distance_vectors, next_hops = area_routing.table.distances(), area_routing.table.next_hops()
+                elif args.incremental:
+                    for change in window:
+                        with instrumentation.phase('bellman_ford'):
+                            _, distance_vectors, next_hops, _, _ = update_distance_vectors(
+                                initial_topology, distance_vectors, next_hops, change, args.workers)
+                else:
+                    version = initial_topology.version
+                    for change in window:
+                        initial_topology.apply(change, move_to_end=True)
+                    if initial_topology.version != version:
+                        with instrumentation.phase('bellman_ford'):
+                            distance_vectors, next_hops = routing(initial_topology)
+                # Every window applies to the initial setup, revert it for the next one
+                initial_topology.rollback(savepoint)
+                with instrumentation.phase('output'):
+                    write_output_file(distance_vectors, next_hops, router, output, delta_writer=delta_writer)
+            if checkpointer and checkpointer.due():
+                save_checkpoint(output, offset)
+        if checkpointer:
+            save_checkpoint(output, offset)
+
+    if args.snapshot:
+        write_snapshot(next_hops.table, args.snapshot)
+    if args.stats:
+        instrumentation.disable().write(args.stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+## @file dv_rounds
+#  Synchronous round-based distance vector protocol.
+#  In every round each router advertises its routes as they stood at the end
+#  of the previous round, then processes what its neighbours advertised, so the
+#  number of rounds a change takes to settle is the number of exchanges a real
+#  deployment needs. Routers follow the RIP rules: a route is replaced by a
+#  cheaper one, follows whatever its next hop advertises, and expires when its
+#  next hop stops advertising it. Split horizon, poisoned reverse, the period
+#  of the full updates, the route timeout and the infinity are set per run.
+import argparse
+from array import array
+from collections import namedtuple
+
+from dv_simulator import ENTRY_BYTES, HEADER_BYTES, VectorRouter, vectors_table, verify_vectors
+from graph import INFINITY
+from parsers import iter_changes, read_topology
+from topology import REMOVE_COST, EdgeStore
+
+## Rounds a run is given to converge by default.
+MAX_ROUNDS = 100000
+
+## Statistics of the convergence after the start of the simulation or a change.
+#  change is None for the initial topology, rounds the number of rounds until
+#  the last route changed, updates and entries the advertisements sent and the
+#  routes they carried until then, converged False if max_rounds ran out first.
+RoundReport = namedtuple('RoundReport', 'change rounds updates entries converged')
+
+class RoundRouter(VectorRouter):
+    """
+    Routes of a single router exchanged in rounds.
+    age[i] counts the rounds since the next hop last advertised the route to
+    the router with index i, pending holds the routes to advertise in the next
+    triggered update.
+    """
+    def __init__(self, index, size):
+        super().__init__(index, size)
+        self.age = array('q', [0]) * size
+
+    ## Extend the vector to a router added to the network.
+    def grow(self):
+        super().grow()
+        self.age.append(0)
+
+    ## Change a route, restart its age and remember to advertise it.
+    def set_route(self, dst, distance, hop):
+        super().set_route(dst, distance, hop)
+        self.age[dst] = 0
+
+    ## Apply a change of the link to a neighbour.
+    #  A new or cheaper link triggers the full vector.
+    #  @param neighbour Index of the neighbour.
+    #  @param cost New cost of the link, None if the link was removed.
+    #  @param infinity Cost from which a route counts as unreachable.
+    def change_link(self, neighbour, cost, infinity):
+        if self.update_link(neighbour, cost, infinity):
+            self.pending.update(dst for dst, _ in self.vector())
+
+    ## Build the advertisement of some routes to a neighbour.
+    #  Routes learned from the neighbour are left out with split horizon and
+    #  advertised as unreachable with poisoned reverse.
+    #  @param neighbour Index of the neighbour.
+    #  @param destinations Indices of the routes to advertise.
+    #  @return List of (destination index, cost) tuples.
+    def advertise(self, neighbour, destinations, split_horizon, poisoned_reverse):
+        distance, next_hop = self.distance, self.next_hop
+        if not split_horizon and not poisoned_reverse:
+            return [(dst, distance[dst]) for dst in destinations]
+        entries = []
+        for dst in destinations:
+            if next_hop[dst] != neighbour or dst == neighbour:
+                entries.append((dst, distance[dst]))
+            elif poisoned_reverse:
+                entries.append((dst, INFINITY))
+        return entries
+
+    ## Process an advertisement from a neighbour.
+    #  An entry is taken if it is cheaper than the current route, or if it comes
+    #  from the current next hop, whatever its cost, which also refreshes the route.
+    #  @param sender Index of the neighbour.
+    #  @param entries List of (destination index, cost) tuples.
+    #  @param infinity Cost from which a route counts as unreachable.
+    def receive(self, sender, entries, infinity):
+        link_cost = self.links.get(sender)
+        if link_cost is None:
+            return
+        distance, next_hop, age = self.distance, self.next_hop, self.age
+        for dst, cost in entries:
+            if dst == self.index:
+                continue
+            through = cost + link_cost
+            if through >= infinity:
+                through = INFINITY
+            if next_hop[dst] == sender:
+                age[dst] = 0
+                if through != distance[dst]:
+                    self.set_route(dst, through, sender)
+            elif through < distance[dst]:
+                self.set_route(dst, through, sender)
+
+    ## Age the learned routes by one round and expire the stale ones.
+    #  @param timeout Rounds after which a route its next hop stopped advertising expires.
+    #  @return True if every reachable route was advertised by its next hop this round.
+    def expire(self, timeout):
+        fresh = True
+        age = self.age
+        for dst, hop in enumerate(self.next_hop):
+            if hop < 0 or dst == self.index:
+                continue
+            age[dst] += 1
+            if age[dst] > 1:
+                fresh = False
+            if age[dst] > timeout:
+                self.set_route(dst, INFINITY, -1)
+        return fresh
+
+class RoundSimulator:
+    """
+    Network of RoundRouter instances exchanging advertisements in lockstep.
+    Every period rounds each router advertises all its routes, in the rounds in
+    between only the routes that changed in the previous round. A run ends once
+    a round of full advertisements changed nothing and refreshed every route,
+    from then on every round repeats it. Changes are applied one after the
+    other, each to the topology left by the previous ones.
+    """
+    ## Create the simulator.
+    #  @param topology Iterable of (r1, r2, cost) links.
+    #  @param split_horizon Leave routes out of the advertisements to the neighbour they were learned from.
+    #  @param poisoned_reverse Advertise those routes as unreachable instead.
+    #  @param infinity Cost from which a route counts as unreachable. By default one
+    #         more than the sum of all link costs, which no loop-free route reaches.
+    #  @param period Rounds between two full advertisements, 1 to advertise everything every round.
+    #  @param timeout Rounds after which a route its next hop stopped advertising
+    #         expires, by default six periods like the timers of RIP.
+    #  @param max_rounds Rounds a change is given to converge.
+    def __init__(self, topology, split_horizon=False, poisoned_reverse=False, infinity=None, period=1,
+                 timeout=None, max_rounds=MAX_ROUNDS):
+        if period < 1:
+            raise ValueError("period must be at least one round")
+        timeout = 6 * period if timeout is None else timeout
+        if timeout < period:
+            raise ValueError(f"timeout of {timeout} rounds would expire routes between two full updates every {period}")
+        self.links = list(topology)
+        self.topology = EdgeStore()
+        self.split_horizon = split_horizon
+        self.poisoned_reverse = poisoned_reverse
+        self.fixed_infinity = infinity
+        self.infinity = infinity
+        self.period = period
+        self.timeout = timeout
+        self.max_rounds = max_rounds
+        self.total_cost = 0
+        self.ids = array('q')
+        self.index = {}
+        self.routers = []
+
+    ## Get the index of a router, adding it if it is new.
+    def _router(self, router_id):
+        i = self.index.get(router_id)
+        if i is None:
+            i = len(self.ids)
+            self.index[router_id] = i
+            self.ids.append(router_id)
+            for router in self.routers:
+                router.grow()
+            self.routers.append(RoundRouter(i, len(self.ids)))
+        return i
+
+    ## Change a link of the topology at both of its ends.
+    def _change_link(self, change):
+        r1, r2, cost = change
+        record = self.topology.apply(change)
+        i, j = self._router(r1), self._router(r2)
+        if record.old is not None:
+            self.total_cost -= record.old[2]
+        if record.new is not None:
+            self.total_cost += record.new[2]
+        if self.fixed_infinity is None:
+            self.infinity = self.total_cost + 1
+        if i == j or record.old == record.new:
+            return
+        cost = None if cost == REMOVE_COST else cost
+        self.routers[i].change_link(j, cost, self.infinity)
+        self.routers[j].change_link(i, cost, self.infinity)
+
+    ## Run rounds until the routes settle or max_rounds ran out.
+    #  @param change Change the rounds follow, None for the initial topology.
+    #  @return RoundReport of the rounds.
+    def _converge(self, change):
+        routers, infinity = self.routers, self.infinity
+        split_horizon, poisoned_reverse = self.split_horizon, self.poisoned_reverse
+        report = RoundReport(change, 0, 0, 0, False)
+        updates = entries = 0
+        for round_number in range(1, self.max_rounds + 1):
+            periodic = round_number % self.period == 0
+            # Every advertisement is built before any is processed
+            outbox = []
+            for router in routers:
+                if periodic:
+                    destinations = sorted(router.pending.union(dst for dst, _ in router.vector()))
+                elif router.pending:
+                    destinations = sorted(router.pending)
+                else:
+                    continue
+                router.pending = set()
+                for neighbour in router.links:
+                    advertisement = router.advertise(neighbour, destinations, split_horizon, poisoned_reverse)
+                    if advertisement:
+                        outbox.append((neighbour, router.index, advertisement))
+                        updates += 1
+                        entries += len(advertisement)
+            for neighbour, sender, advertisement in outbox:
+                routers[neighbour].receive(sender, advertisement, infinity)
+            fresh = all([router.expire(self.timeout) for router in routers])
+            if any(router.pending for router in routers):
+                report = RoundReport(change, round_number, updates, entries, False)
+            elif periodic and fresh:
+                return report._replace(converged=True)
+        return report
+
+    ## Bring up the links of the topology, then apply changes one after the other.
+    #  @param changes Iterable of (r1, r2, cost) changes, a cost of REMOVE_COST removes the link.
+    #  @param observer Optional function called with each RoundReport once the
+    #         rounds of a change are over, before the next change is applied.
+    #  @return List of RoundReport records, the first one for the initial topology.
+    def run(self, changes=(), observer=None):
+        for r1, r2, _ in self.links:
+            self._router(r1)
+            self._router(r2)
+        for link in self.links:
+            self._change_link(link)
+        reports = [self._converge(None)]
+        if observer:
+            observer(reports[-1])
+        for change in changes:
+            self._change_link(change)
+            reports.append(self._converge(change))
+            if observer:
+                observer(reports[-1])
+        return reports
+
+    ## Collect the vectors of all routers in a routing table.
+    #  @return RoutingTable with one row per router, like distance_vector_table.
+    def table(self):
+        return vectors_table(self.ids, self.routers)
+
+    ## Compare the vectors of the routers with the centralized computation.
+    #  @return List of (router, destination) pairs whose route is wrong.
+    def verify(self):
+        return verify_vectors(self.topology, self.index, self.routers)
+
+## Simulate a topology and a sequence of changes.
+#  @param topology Iterable of (r1, r2, cost) links.
+#  @param changes Iterable of (r1, r2, cost) changes applied one after the other.
+#  @param observer Optional function called with the simulator and each RoundReport.
+#  @param options Keyword arguments of RoundSimulator.
+#  @return Tuple (simulator, list of RoundReport records).
+def simulate(topology, changes=(), observer=None, **options):
+    simulator = RoundSimulator(topology, **options)
+    notify = (lambda report: observer(simulator, report)) if observer else None
+    return simulator, simulator.run(changes, notify)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate the distance vector protocol in synchronous rounds.")
+    parser.add_argument('topology_file', help="File with one 'r1 r2 dist' link per line.")
+    parser.add_argument('changes_file', nargs='?', help="File with one 'r1 r2 dist' change per line.")
+    parser.add_argument('--split-horizon', action='store_true',
+                        help="Leave routes out of the advertisements to the neighbour they were learned from.")
+    parser.add_argument('--poisoned-reverse', action='store_true',
+                        help="Advertise routes to the neighbour they were learned from as unreachable.")
+    parser.add_argument('--infinity', type=float,
+                        help="Cost from which a route counts as unreachable, by default the sum of all link costs plus one.")
+    parser.add_argument('--period', type=int, default=1,
+                        help="Rounds between two full advertisements, changed routes are advertised every round.")
+    parser.add_argument('--timeout', type=int,
+                        help="Rounds after which a route that is no longer advertised expires, by default six periods.")
+    parser.add_argument('--max-rounds', type=int, default=MAX_ROUNDS, help="Rounds a change is given to converge.")
+    parser.add_argument('--verify', action='store_true',
+                        help="Check the converged vectors against the centralized computation after every change.")
+    args = parser.parse_args()
+
+    def report(simulator, result):
+        if result.change is None:
+            event = "initial topology"
+        else:
+            event = "change " + ' '.join(map(str, result.change))
+        if result.converged:
+            line = f"{event}: converged in {result.rounds} rounds"
+        else:
+            line = f"{event}: not converged after {simulator.max_rounds} rounds"
+        line += (f", {result.updates} updates, {result.entries} entries, "
+                 f"{result.updates * HEADER_BYTES + result.entries * ENTRY_BYTES} bytes")
+        if args.verify:
+            wrong = simulator.verify()
+            line += ", verified" if not wrong else f", {len(wrong)} routes differ from the centralized tables"
+        print(line)
+
+    changes = iter_changes(args.changes_file) if args.changes_file else ()
+    try:
+        simulate(read_topology(args.topology_file), changes, report, split_horizon=args.split_horizon,
+                 poisoned_reverse=args.poisoned_reverse, infinity=args.infinity, period=args.period,
+                 timeout=args.timeout, max_rounds=args.max_rounds)
+    except ValueError as error:
+        parser.error(str(error))
@@ -0,0 +1,411 @@
+## @file dv_simulator
+#  Distributed distance vector protocol simulated with asyncio.
+#  Every router is an asyncio task that keeps its own distance vector and only
+#  learns about the network from the updates its neighbours put on its inbox
+#  queue. Links delay the updates they carry by a configurable amount of
+#  simulated time. A dispatcher delivers the updates in time order and advances
+#  the clock once every router is idle, so runs are deterministic and never sleep.
+import argparse
+import asyncio
+from array import array
+from collections import namedtuple
+from heapq import heappush, heappop
+from itertools import count
+
+from distancevector import distance_vector_routing
+from graph import INFINITY, RoutingTable
+from parsers import iter_changes, read_topology
+from topology import REMOVE_COST, EdgeStore, edge_key
+
+## Size of the header of an update: sender ID and entry count.
+HEADER_BYTES = 8
+## Size of an entry of an update: destination ID and cost.
+ENTRY_BYTES = 12
+
+## Statistics of the convergence after the start of the simulation or a change.
+#  change is None for the initial topology, time the simulated time from the
+#  event to the delivery of the last update, messages and bytes the updates sent.
+Convergence = namedtuple('Convergence', 'change time messages bytes')
+
+class VectorRouter:
+    """
+    Distance vector of a single router, shared by the simulators.
+    distance[i] and next_hop[i] describe the route to the router with index i,
+    next_hop is -1 while the destination is unreachable. Besides its vector a
+    router only knows the costs of the links to its neighbours. pending holds
+    the routes changed since they were last advertised.
+    """
+    def __init__(self, index, size):
+        self.index = index
+        self.links = {}
+        self.distance = array('d', [INFINITY]) * size
+        self.next_hop = array('q', [-1]) * size
+        self.distance[index] = 0
+        self.next_hop[index] = index
+        self.pending = set()
+
+    ## Extend the vector to a router added to the network.
+    def grow(self):
+        self.distance.append(INFINITY)
+        self.next_hop.append(-1)
+
+    ## Change a route and remember to advertise it.
+    def set_route(self, dst, distance, hop):
+        self.distance[dst] = distance
+        self.next_hop[dst] = -1 if distance == INFINITY else hop
+        self.pending.add(dst)
+
+    ## Get the reachable routes of the router as update entries.
+    def vector(self):
+        return [(dst, distance) for dst, distance in enumerate(self.distance) if distance != INFINITY]
+
+    ## Apply a change of the link to a neighbour to the vector.
+    #  Routes through the neighbour follow the new cost of the link, or become
+    #  unreachable when it is removed.
+    #  @param neighbour Index of the neighbour.
+    #  @param cost New cost of the link, None if the link was removed.
+    #  @param infinity Cost from which a route counts as unreachable.
+    #  @return True if the link is new or cheaper, the neighbour should then get
+    #          the full vector since it may now prefer routes it ignored before.
+    def update_link(self, neighbour, cost, infinity):
+        old_cost = self.links.pop(neighbour, None)
+        if cost is not None:
+            self.links[neighbour] = cost
+        if old_cost is not None:
+            for dst, hop in enumerate(self.next_hop):
+                if hop != neighbour or dst == self.index:
+                    continue
+                distance = INFINITY if cost is None else self.distance[dst] - old_cost + cost
+                self.set_route(dst, INFINITY if distance >= infinity else distance, neighbour)
+        return cost is not None and (old_cost is None or cost < old_cost)
+
+class RouterProcess(VectorRouter):
+    """
+    Update handling of a single router, run as an asyncio task.
+    """
+    def __init__(self, simulator, index, size):
+        super().__init__(index, size)
+        self.simulator = simulator
+        self.inbox = asyncio.Queue()
+        self.last_sent = -INFINITY
+        self.flush_scheduled = False
+
+    ## Process the events of the inbox until the task is cancelled.
+    async def run(self):
+        while True:
+            event = await self.inbox.get()
+            kind = event[0]
+            try:
+                if kind == 'update':
+                    self.receive(event[1], event[2])
+                elif kind == 'link':
+                    self.change_link(event[1], event[2])
+                else:
+                    self.flush_scheduled = False
+                    self.flush()
+            except Exception as error:
+                # Hand the error to the dispatcher instead of leaving it waiting
+                self.simulator.error = error
+            self.simulator.done()
+
+    ## Apply a change of the link to a neighbour.
+    #  A new or cheaper link is answered with the full vector.
+    #  @param neighbour Index of the neighbour.
+    #  @param cost New cost of the link, None if the link was removed.
+    def change_link(self, neighbour, cost):
+        if self.update_link(neighbour, cost, self.simulator.infinity):
+            self.simulator.send(self.index, neighbour, self.vector())
+        self.trigger()
+
+    ## Process an update from a neighbour.
+    #  An entry is taken if it is cheaper than the current route, or if it
+    #  comes from the current next hop, whatever its cost. Entries the router
+    #  can beat are answered, so a neighbour that lost a route learns about the
+    #  alternatives without routers having to keep the vectors of their neighbours.
+    #  @param sender Index of the neighbour.
+    #  @param entries List of (destination index, cost) tuples.
+    def receive(self, sender, entries):
+        link_cost = self.links.get(sender)
+        if link_cost is None:
+            # The link went down while the update was in flight
+            return
+        infinity = self.simulator.infinity
+        distance, next_hop, pending = self.distance, self.next_hop, self.pending
+        reply = []
+        for dst, cost in entries:
+            through = cost + link_cost
+            if through >= infinity:
+                through = INFINITY
+            if next_hop[dst] == sender:
+                if through != distance[dst]:
+                    distance[dst] = through
+                    if through == INFINITY:
+                        next_hop[dst] = -1
+                    pending.add(dst)
+            elif through < distance[dst]:
+                distance[dst] = through
+                next_hop[dst] = sender
+                pending.add(dst)
+            elif distance[dst] + link_cost < cost:
+                reply.append((dst, distance[dst]))
+        if reply:
+            self.simulator.send(self.index, sender, reply)
+        self.trigger()
+
+    ## Schedule a triggered update.
+    #  Changes made while processing the events of one time step go out in a
+    #  single update, sent no sooner than update_interval after the previous one.
+    def trigger(self):
+        if not self.pending or self.flush_scheduled:
+            return
+        self.flush_scheduled = True
+        simulator = self.simulator
+        simulator.schedule(max(simulator.now, self.last_sent + simulator.update_interval), self.index, ('flush',))
+
+    ## Advertise the changed routes to every neighbour.
+    def flush(self):
+        if not self.pending:
+            return
+        entries = [(dst, self.distance[dst]) for dst in sorted(self.pending)]
+        self.pending.clear()
+        self.last_sent = self.simulator.now
+        for neighbour in self.links:
+            self.simulator.send(self.index, neighbour, entries)
+
+class DistanceVectorSimulator:
+    """
+    Network of RouterProcess tasks driven by a simulated clock.
+    Events are kept in a heap by delivery time. The dispatcher hands all events
+    due at the earliest time to the inboxes of their routers, waits until every
+    router has processed them and moves on, until nothing is left in flight.
+    Changes are applied one after the other, each to the topology left by the
+    previous ones.
+    """
+    ## Create the simulator, the router tasks are started by run.
+    #  @param topology Iterable of (r1, r2, cost) links.
+    #  @param delay Default delay of a link in simulated time units.
+    #  @param delays Optional dictionary mapping edge_key(r1, r2) to the delay of that link.
+    #  @param update_interval Minimum simulated time between two triggered updates of a router.
+    #  @param infinity Cost from which a route counts as unreachable. By default one
+    #         more than the sum of all link costs, which no loop-free route reaches.
+    def __init__(self, topology, delay=1.0, delays=None, update_interval=0.0, infinity=None):
+        self.links = list(topology)
+        self.topology = EdgeStore()
+        self.delay = delay
+        self.delays = delays or {}
+        self.update_interval = update_interval
+        self.fixed_infinity = infinity
+        self.infinity = infinity
+        self.total_cost = 0
+        self.ids = array('q')
+        self.index = {}
+        self.routers = []
+        self.now = 0.0
+        self.messages = 0
+        self.bytes = 0
+        self._queue = []
+        self._sequence = count()
+        self.error = None
+        self._busy = 0
+        self._idle = None
+        self._tasks = []
+
+    ## Add a router and start its task.
+    #  @return Index of the router.
+    def _router(self, router_id):
+        i = self.index.get(router_id)
+        if i is None:
+            i = len(self.ids)
+            self.index[router_id] = i
+            self.ids.append(router_id)
+            for process in self.routers:
+                process.grow()
+            self._start(i)
+        return i
+
+    def _start(self, i):
+        process = RouterProcess(self, i, len(self.ids))
+        self.routers.append(process)
+        self._tasks.append(asyncio.get_running_loop().create_task(process.run()))
+
+    ## Change a link of the topology and notify both of its ends.
+    def _change_link(self, change):
+        r1, r2, cost = change
+        record = self.topology.apply(change)
+        i, j = self._router(r1), self._router(r2)
+        if record.old is not None:
+            self.total_cost -= record.old[2]
+        if record.new is not None:
+            self.total_cost += record.new[2]
+        if self.fixed_infinity is None:
+            self.infinity = self.total_cost + 1
+        if i == j or record.old == record.new:
+            return
+        cost = None if cost == REMOVE_COST else cost
+        self.schedule(self.now, i, ('link', j, cost))
+        self.schedule(self.now, j, ('link', i, cost))
+
+    ## Queue an event for a router at a simulated time.
+    def schedule(self, time, router, event):
+        heappush(self._queue, (time, next(self._sequence), router, event))
+
+    ## Send an update over a link.
+    #  @param sender Index of the sending router.
+    #  @param receiver Index of the neighbour.
+    #  @param entries List of (destination index, cost) tuples.
+    def send(self, sender, receiver, entries):
+        delay = self.delays.get(edge_key(self.ids[sender], self.ids[receiver]), self.delay)
+        self.messages += 1
+        self.bytes += HEADER_BYTES + ENTRY_BYTES * len(entries)
+        self.schedule(self.now + delay, receiver, ('update', sender, entries))
+
+    ## Mark an event as processed by its router.
+    def done(self):
+        self._busy -= 1
+        if self._busy == 0:
+            self._idle.set()
+
+    ## Deliver events in time order until none is left.
+    #  @return Simulated time of the last update delivered.
+    async def _converge(self):
+        queue = self._queue
+        last = self.now
+        while queue:
+            self.now = queue[0][0]
+            while queue and queue[0][0] == self.now:
+                _, _, router, event = heappop(queue)
+                if event[0] == 'update':
+                    last = self.now
+                self._busy += 1
+                self.routers[router].inbox.put_nowait(event)
+            self._idle.clear()
+            await self._idle.wait()
+            if self.error is not None:
+                raise self.error
+        return last
+
+    ## Measure the convergence of the events scheduled at the current time.
+    async def _measure(self, change):
+        messages, sent_bytes, start = self.messages, self.bytes, self.now
+        last = await self._converge()
+        return Convergence(change, last - start, self.messages - messages, self.bytes - sent_bytes)
+
+    ## Bring up the links of the topology, then apply changes one after the other.
+    #  The router tasks are stopped when the run ends, a simulator runs once.
+    #  @param changes Iterable of (r1, r2, cost) changes, a cost of REMOVE_COST removes the link.
+    #  @param observer Optional function called with each Convergence record once
+    #         the network has converged, before the next change is applied.
+    #  @return List of Convergence records, the first one for the initial topology.
+    async def run(self, changes=(), observer=None):
+        self._idle = asyncio.Event()
+        try:
+            # Start every router with a vector of the final size instead of growing them all
+            for r1, r2, _ in self.links:
+                for router_id in (r1, r2):
+                    if router_id not in self.index:
+                        self.index[router_id] = len(self.ids)
+                        self.ids.append(router_id)
+            for i in range(len(self.ids)):
+                self._start(i)
+            for link in self.links:
+                self._change_link(link)
+            reports = [await self._measure(None)]
+            if observer:
+                observer(reports[-1])
+            for change in changes:
+                self._change_link(change)
+                reports.append(await self._measure(change))
+                if observer:
+                    observer(reports[-1])
+            return reports
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+    ## Collect the vectors of all routers in a routing table.
+    #  @return RoutingTable with one row per router, like distance_vector_table.
+    def table(self):
+        return vectors_table(self.ids, self.routers)
+
+    ## Compare the vectors of the routers with the centralized computation.
+    #  @return List of (router, destination) pairs whose route is wrong.
+    def verify(self):
+        return verify_vectors(self.topology, self.index, self.routers)
+
+## Collect the vectors of routers in a routing table.
+#  @param ids Router IDs of the router indices.
+#  @param routers Routers with distance and next_hop arrays, in index order.
+#  @return RoutingTable with one row per router, like distance_vector_table.
+def vectors_table(ids, routers):
+    table = RoutingTable(ids, ids)
+    for router_id, process in zip(ids, routers):
+        table.set_row(router_id, process.distance, process.next_hop)
+    return table
+
+## Compare the vectors of routers with the centralized computation.
+#  Costs must match. Next hops may break ties differently, they only have to
+#  lead over a link whose cost plus the neighbour's distance is the route's cost.
+#  @param topology Iterable of the (r1, r2, cost) links in effect.
+#  @param index Dictionary mapping router IDs to router indices.
+#  @param routers Routers with distance and next_hop arrays and a links dictionary
+#         of neighbour index to link cost, in index order.
+#  @return List of (router, destination) pairs whose route is wrong.
+def verify_vectors(topology, index, routers):
+    expected, _ = distance_vector_routing(list(topology))
+    wrong = []
+    for router_id, i in index.items():
+        process = routers[i]
+        vector = expected.get(router_id, {})
+        for dst_id, j in index.items():
+            cost = process.distance[j]
+            if cost != vector.get(dst_id, 0 if dst_id == router_id else INFINITY):
+                wrong.append((router_id, dst_id))
+            elif cost != INFINITY and dst_id != router_id:
+                hop = process.next_hop[j]
+                link_cost = process.links.get(hop)
+                if link_cost is None or link_cost + routers[hop].distance[j] != cost:
+                    wrong.append((router_id, dst_id))
+    return wrong
+
+## Simulate a topology and a sequence of changes.
+#  @param topology Iterable of (r1, r2, cost) links.
+#  @param changes Iterable of (r1, r2, cost) changes applied one after the other.
+#  @param observer Optional function called with the simulator and each Convergence record.
+#  @param options Keyword arguments of DistanceVectorSimulator.
+#  @return Tuple (simulator, list of Convergence records).
+def simulate(topology, changes=(), observer=None, **options):
+    async def main():
+        simulator = DistanceVectorSimulator(topology, **options)
+        notify = (lambda convergence: observer(simulator, convergence)) if observer else None
+        return simulator, await simulator.run(changes, notify)
+    return asyncio.run(main())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate the distance vector protocol between router tasks.")
+    parser.add_argument('topology_file', help="File with one 'r1 r2 dist' link per line.")
+    parser.add_argument('changes_file', nargs='?', help="File with one 'r1 r2 dist' change per line.")
+    parser.add_argument('--delay', type=float, default=1.0, help="Delay of every link in simulated time units.")
+    parser.add_argument('--update-interval', type=float, default=0.0,
+                        help="Minimum simulated time between two triggered updates of a router.")
+    parser.add_argument('--infinity', type=float,
+                        help="Cost from which a route counts as unreachable, by default the sum of all link costs plus one.")
+    parser.add_argument('--verify', action='store_true',
+                        help="Check the converged vectors against the centralized computation after every change.")
+    args = parser.parse_args()
+
+    def report(simulator, convergence):
+        if convergence.change is None:
+            event = "initial topology"
+        else:
+            event = "change " + ' '.join(map(str, convergence.change))
+        line = f"{event}: converged in {convergence.time:g}, {convergence.messages} messages, {convergence.bytes} bytes"
+        if args.verify:
+            wrong = simulator.verify()
+            line += ", verified" if not wrong else f", {len(wrong)} routes differ from the centralized tables"
+        print(line)
+
+    changes = iter_changes(args.changes_file) if args.changes_file else ()
+    simulate(read_topology(args.topology_file), changes, report, delay=args.delay,
+             update_interval=args.update_interval, infinity=args.infinity)
@@ -0,0 +1,242 @@
+## @file event_simulator
+#  Discrete-event replay of message traffic over a changing topology.
+#  Link changes and message transmissions happen at the timestamps of their
+#  input lines. Messages are forwarded hop by hop, every router looking up the
+#  next hop in the link state table in effect when the message reaches it, and
+#  every hop takes the delay of its link. Events wait in a priority queue keyed
+#  by time, the input files are streamed so only messages in flight are held.
+import argparse
+import math
+from array import array
+from collections import namedtuple
+from heapq import heappush, heappop
+from itertools import count
+
+import instrumentation
+from linkstate import affected_sources, apply_change_to_graph, build_graph, calculate_shortest_paths, shortest_path_tree
+from output import OutputWriter
+from parsers import iter_timed_changes, iter_timed_messages, read_topology
+from topology import EdgeStore, edge_key
+
+## Status of a message still travelling.
+IN_FLIGHT = 0
+## Status of a message that reached its destination.
+DELIVERED = 1
+## Status of a message dropped by a router without a route to its destination.
+UNREACHABLE = 2
+## Status of a message dropped after max_hops hops.
+HOP_LIMIT = 3
+## Names of the statuses, indexed by status.
+STATUS_NAMES = ('in flight', 'delivered', 'unreachable', 'hop limit')
+
+# Events sharing a timestamp apply link changes first, then deliver the hops in
+# flight, then send new messages
+_CHANGE, _HOP, _SEND = 0, 1, 2
+
+## Summary of a replay.
+#  events is the number of events processed, counts the number of messages per
+#  status name, latency a dictionary of mean, max and percentile latencies of
+#  the delivered messages.
+Summary = namedtuple('Summary', 'events messages counts latency')
+
+class EventSimulator:
+    """
+    Priority queue of timestamped link changes and message hops.
+    Routing follows the shortest path trees of linkstate. A change only marks
+    the trees it affects as stale, a stale tree is recomputed when the next
+    message reaches its router, so bursts of changes between messages cost one
+    repair per router that still forwards traffic. Per message the send time,
+    latency, hop count and status are kept in flat arrays, per link the number
+    of messages forwarded over it.
+    """
+    ## Compute the initial routing tables.
+    #  @param topology Iterable of (r1, r2, cost) links.
+    #  @param delay Delay of a hop in time units.
+    #  @param delays Optional dictionary mapping edge_key(r1, r2) to the delay of that link.
+    #  @param max_hops Hops after which a message is dropped, by default the number of routers.
+    def __init__(self, topology, delay=1.0, delays=None, max_hops=None):
+        edges = EdgeStore(topology)
+        layout = sorted(edges.nodes())
+        self.graph = build_graph(edges, layout)
+        self.table = calculate_shortest_paths(self.graph, layout).table
+        self.stale = bytearray(len(layout))
+        self.delay = delay
+        self.delays = delays or {}
+        self.max_hops = len(layout) if max_hops is None else max_hops
+        self.now = 0.0
+        self.events = 0
+        self.source = array('q')
+        self.destination = array('q')
+        self.sent = array('d')
+        self.latency = array('d')
+        self.hops = array('q')
+        self.status = bytearray()
+        self.load = {}
+
+    ## Apply a link change to the topology and mark the trees it affects as stale.
+    #  Stale trees are never reported as affected again, they are already due
+    #  for a recompute.
+    #  @param change Tuple (r1, r2, cost), a cost of -999 removes the link.
+    def change(self, change):
+        old_cost = apply_change_to_graph(self.graph, change)
+        self.table.widen(self.graph.ids)
+        for source in affected_sources(self.table, change, old_cost, self.stale):
+            self.stale[self.table.rows[source]] = 1
+
+    ## Recompute a stale shortest path tree.
+    #  @param u Index of the router, which is also its row in the table.
+    def _repair(self, u):
+        self.table.set_row(self.table.sources[u], *shortest_path_tree(self.graph, self.table.sources[u]))
+        self.stale[u] = 0
+
+    ## Replay timestamped changes and messages.
+    #  Both inputs must be sorted by time. A later call continues the replay
+    #  with inputs timestamped after the events of the previous one.
+    #  @param changes Iterable of (time, r1, r2, cost) changes.
+    #  @param messages Iterable of (time, source, destination, message) messages.
+    #  @return Summary of all messages sent so far.
+    def run(self, changes=(), messages=()):
+        queue = []
+        sequence = count()
+        streams = [iter(changes), iter(messages)]
+        # Only the next line of each input waits in the queue
+        self._pull(queue, sequence, _CHANGE, streams[0], self.now)
+        self._pull(queue, sequence, _SEND, streams[1], self.now)
+        table, graph, delays, delay = self.table, self.graph, self.delays, self.delay
+        ids, index, width, next_hop = graph.ids, graph.index, table.width, table.next_hop
+        rows = len(table.sources)
+        sent, latency, hops, status, load = self.sent, self.latency, self.hops, self.status, self.load
+        stale = self.stale
+        max_hops = self.max_hops
+        events = 0
+        while queue:
+            entry = heappop(queue)
+            now, kind = entry[0], entry[1]
+            events += 1
+            if kind == _HOP:
+                _, _, _, message, u, d = entry
+            elif kind == _CHANGE:
+                item = entry[3]
+                self.change(item[1:])
+                # A change can add routers and replace the arrays of the table
+                ids, width, next_hop = graph.ids, table.width, table.next_hop
+                self._pull(queue, sequence, _CHANGE, streams[0], now)
+                continue
+            else:
+                _, src, dest, _ = entry[3]
+                message = len(sent)
+                self.source.append(src)
+                self.destination.append(dest)
+                sent.append(now)
+                latency.append(math.nan)
+                hops.append(0)
+                status.append(IN_FLIGHT)
+                self._pull(queue, sequence, _SEND, streams[1], now)
+                u = index.get(src, -1)
+                d = index.get(dest, -1)
+                if u < 0 or d < 0:
+                    status[message] = DELIVERED if src == dest else UNREACHABLE
+                    if src == dest:
+                        latency[message] = 0.0
+                    continue
+            # The message is at router u, heading for d
+            if u == d:
+                status[message] = DELIVERED
+                latency[message] = now - sent[message]
+            elif hops[message] >= max_hops:
+                status[message] = HOP_LIMIT
+            else:
+                if u >= rows:
+                    status[message] = UNREACHABLE
+                    continue
+                if stale[u]:
+                    self._repair(u)
+                v = next_hop[u * width + d]
+                if v < 0:
+                    status[message] = UNREACHABLE
+                    continue
+                key = (u, v) if u < v else (v, u)
+                load[key] = load.get(key, 0) + 1
+                hops[message] += 1
+                if delays:
+                    arrival = now + delays.get(edge_key(ids[u], ids[v]), delay)
+                else:
+                    arrival = now + delay
+                heappush(queue, (arrival, _HOP, next(sequence), message, v, d))
+        if events:
+            self.now = now
+        self.events += events
+        instrumentation.count('events', events)
+        return self.summary()
+
+    ## Queue the next item of an input stream.
+    def _pull(self, queue, sequence, kind, stream, now):
+        item = next(stream, None)
+        if item is None:
+            return
+        if item[0] < now:
+            raise ValueError(f"input at time {item[0]} follows an event at time {now}, inputs must be sorted by time")
+        heappush(queue, (item[0], kind, next(sequence), item))
+
+    ## Get the number of messages forwarded over each link.
+    #  @return Dictionary mapping edge_key(r1, r2) to the number of messages.
+    def link_load(self):
+        ids = self.graph.ids
+        return {(ids[u], ids[v]) if ids[u] <= ids[v] else (ids[v], ids[u]): total
+                for (u, v), total in self.load.items()}
+
+    ## Summarize the messages sent so far.
+    #  @param percentiles Percentiles of the delivered latencies to report.
+    #  @return Summary of the replay.
+    def summary(self, percentiles=(50, 90, 99)):
+        counts = dict.fromkeys(STATUS_NAMES, 0)
+        for status in self.status:
+            counts[STATUS_NAMES[status]] += 1
+        delivered = sorted(value for value, status in zip(self.latency, self.status) if status == DELIVERED)
+        latency = {}
+        if delivered:
+            latency['mean'] = sum(delivered) / len(delivered)
+            latency['max'] = delivered[-1]
+            for percentile in percentiles:
+                latency[f"p{percentile}"] = delivered[min(len(delivered) - 1, len(delivered) * percentile // 100)]
+        return Summary(self.events, len(self.status), counts, latency)
+
+    ## Write one line per message: source, destination, send time, status, latency and hops.
+    #  @param output Path of the report file.
+    def write_messages(self, output):
+        with OutputWriter(output, 'w') as file:
+            file.write("source,destination,sent,status,latency,hops\n")
+            file.write(''.join(
+                f"{src},{dest},{sent:g},{STATUS_NAMES[status]},{'' if math.isnan(latency) else f'{latency:g}'},{hops}\n"
+                for src, dest, sent, status, latency, hops in
+                zip(self.source, self.destination, self.sent, self.status, self.latency, self.hops)))
+
+    ## Write one line per link with the number of messages forwarded over it.
+    #  @param output Path of the report file.
+    def write_link_load(self, output):
+        with OutputWriter(output, 'w') as file:
+            file.write("r1,r2,messages\n")
+            file.write(''.join(f"{r1},{r2},{total}\n" for (r1, r2), total in sorted(self.link_load().items())))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay timestamped messages and link changes hop by hop.")
+    parser.add_argument('topology_file', help="File with one 'r1 r2 cost' link per line.")
+    parser.add_argument('messages_file', help="File with one '[@time] source destination message' per line.")
+    parser.add_argument('changes_file', nargs='?', help="File with one '[@time] r1 r2 cost' change per line.")
+    parser.add_argument('--delay', type=float, default=1.0, help="Delay of every hop in time units.")
+    parser.add_argument('--max-hops', type=int, help="Hops after which a message is dropped, by default the number of routers.")
+    parser.add_argument('--messages-report', metavar='CSV', help="Write the latency and hops of every message to CSV.")
+    parser.add_argument('--links-report', metavar='CSV', help="Write the number of messages forwarded over every link to CSV.")
+    args = parser.parse_args()
+
+    simulator = EventSimulator(read_topology(args.topology_file), args.delay, max_hops=args.max_hops)
+    changes = iter_timed_changes(args.changes_file) if args.changes_file else ()
+    summary = simulator.run(changes, iter_timed_messages(args.messages_file))
+    print(f"{summary.events} events, {summary.messages} messages, "
+          + ', '.join(f"{total} {name}" for name, total in summary.counts.items() if total))
+    if summary.latency:
+        print("latency " + ', '.join(f"{name} {value:g}" for name, value in summary.latency.items()))
+    if args.messages_report:
+        simulator.write_messages(args.messages_report)
+    if args.links_report:
+        simulator.write_link_load(args.links_report)
@@ -0,0 +1,347 @@
+## @file graph
+#  Compact array-backed graph and routing table shared by the routing modules.
+#  Router IDs are interned to dense indices and all per node and per route data
+#  lives in flat arrays from the array module instead of nested dictionaries.
+from array import array
+from collections.abc import Mapping
+
+INFINITY = float('inf')
+
+## Convert a stored cost back to the value the routing modules report.
+#  @param value Cost read from a float array.
+#  @return Integer cost when the value is integral, float('inf') if unreachable.
+def as_cost(value):
+    return int(value) if value.is_integer() else value
+
+class CompactGraph:
+    """
+    Undirected graph in compressed sparse row (CSR) form.
+    The neighbours of the node with index i are neighbours[offsets[i]:offsets[i + 1]],
+    each slot having its cost in costs and the position of the link it came from
+    in link_ids. The links themselves are kept in link_source, link_target and
+    link_cost in the order they were given. Removed links keep their slot with
+    an infinite cost, so the neighbour order of a node never changes.
+    """
+    ## Build the graph from a list of links.
+    #  @param links Iterable of tuples (r1, r2, cost).
+    #  @param nodes Optional nodes to intern first, in this order.
+    #  @param merge_parallel If True a second link between the same pair of nodes
+    #         updates the cost of the first one instead of adding a new slot.
+    def __init__(self, links=(), nodes=(), merge_parallel=True):
+        self.ids = array('q')
+        self.index = {}
+        self.link_source = array('q')
+        self.link_target = array('q')
+        self.link_cost = array('d')
+        for node in nodes:
+            self._intern(node)
+
+        adjacency = [[] for _ in self.ids]
+        positions = {} if merge_parallel else None
+        for r1, r2, cost in links:
+            i = self._intern(r1)
+            j = self._intern(r2)
+            while len(adjacency) < len(self.ids):
+                adjacency.append([])
+            link_id = self._add_link(i, j, cost)
+            self._stage(adjacency, positions, i, j, cost, link_id)
+            if i != j:
+                self._stage(adjacency, positions, j, i, cost, link_id)
+
+        self.offsets = array('q', [0])
+        self.neighbours = array('q')
+        self.costs = array('d')
+        self.link_ids = array('q')
+        for slots in adjacency:
+            for j, cost, link_id in slots:
+                self.neighbours.append(j)
+                self.costs.append(cost)
+                self.link_ids.append(link_id)
+            self.offsets.append(len(self.neighbours))
+
+    ## Stage a directed slot while building the adjacency.
+    def _stage(self, adjacency, positions, i, j, cost, link_id):
+        if positions is None:
+            adjacency[i].append((j, cost, link_id))
+        elif (i, j) in positions:
+            position = positions[(i, j)]
+            adjacency[i][position] = (j, cost, adjacency[i][position][2])
+        else:
+            positions[(i, j)] = len(adjacency[i])
+            adjacency[i].append((j, cost, link_id))
+
+    ## Return the index of a node, interning it if it is new.
+    def _intern(self, node):
+        i = self.index.get(node)
+        if i is None:
+            i = len(self.ids)
+            self.index[node] = i
+            self.ids.append(node)
+            if hasattr(self, 'offsets'):
+                self.offsets.append(self.offsets[-1])
+        return i
+
+    ## Record a link and return its position.
+    def _add_link(self, i, j, cost):
+        self.link_source.append(i)
+        self.link_target.append(j)
+        self.link_cost.append(cost)
+        return len(self.link_cost) - 1
+
+    ## Number of nodes in the graph.
+    @property
+    def node_count(self):
+        return len(self.ids)
+
+    ## Find the slot of the directed edge from index i to index j.
+    #  @return Slot position, or -1 if the nodes were never linked.
+    def slot(self, i, j):
+        for position in range(self.offsets[i], self.offsets[i + 1]):
+            if self.neighbours[position] == j:
+                return position
+        return -1
+
+    ## Get the current cost of the link between two nodes.
+    #  @param r1 First router ID.
+    #  @param r2 Second router ID.
+    #  @return Cost of the link, or None if there is no such link.
+    def link_cost_between(self, r1, r2):
+        if r1 not in self.index or r2 not in self.index:
+            return None
+        position = self.slot(self.index[r1], self.index[r2])
+        if position < 0 or self.costs[position] == INFINITY:
+            return None
+        return as_cost(self.costs[position])
+
+    ## List the neighbours of a node.
+    #  @param node Router ID.
+    #  @return List of (neighbour ID, cost) tuples in slot order.
+    def neighbours_of(self, node):
+        i = self.index.get(node)
+        if i is None:
+            return []
+        return [(self.ids[self.neighbours[position]], as_cost(self.costs[position]))
+                for position in range(self.offsets[i], self.offsets[i + 1])
+                if self.costs[position] != INFINITY]
+
+    ## Add, update or remove the link between two nodes in place.
+    #  Updating or removing a link only rewrites its cost, adding a link between
+    #  nodes that were never linked inserts a slot at the end of both ranges. The
+    #  neighbour order thus differs from that of a graph built from the new links,
+    #  and a search may break ties between paths of equal cost differently on it.
+    #  @param r1 First router ID.
+    #  @param r2 Second router ID.
+    #  @param cost New cost, or None to remove the link.
+    #  @return Previous cost of the link, or None if there was no such link.
+    def set_link(self, r1, r2, cost):
+        old_cost = self.link_cost_between(r1, r2)
+        if cost is None and old_cost is None:
+            return None
+        stored = INFINITY if cost is None else cost
+        i = self._intern(r1)
+        j = self._intern(r2)
+        position = self.slot(i, j)
+        if position < 0:
+            link_id = self._add_link(i, j, stored)
+            self._insert_slot(i, j, stored, link_id)
+            if i != j:
+                self._insert_slot(j, i, stored, link_id)
+        else:
+            self.link_cost[self.link_ids[position]] = stored
+            self.costs[position] = stored
+            if i != j:
+                self.costs[self.slot(j, i)] = stored
+        return old_cost
+
+    ## Insert a directed slot at the end of the range of index i.
+    def _insert_slot(self, i, j, cost, link_id):
+        position = self.offsets[i + 1]
+        self.neighbours.insert(position, j)
+        self.costs.insert(position, cost)
+        self.link_ids.insert(position, link_id)
+        for k in range(i + 1, len(self.offsets)):
+            self.offsets[k] += 1
+
+class RoutingTable:
+    """
+    Routing results of a set of sources in flat arrays.
+    Row r holds the routes of sources[r] to every node of the graph the table was
+    made for, entry r * width + i being the route to ids[i]. Unreachable entries
+    have an infinite cost, missing next hops and predecessors are -1. The
+    distances(), next_hops() and paths() views read the arrays like the nested
+    dictionaries the output functions expect.
+    """
+    ## Create an empty table.
+    #  @param ids Router IDs of the graph indices, in index order.
+    #  @param sources Sources of the rows, in the order the views list them.
+    #  @param targets Destinations listed by the row views, defaults to sources.
+    #  @param with_predecessors Keep a predecessor array to rebuild full paths.
+    def __init__(self, ids, sources, targets=None, with_predecessors=False):
+        self.ids = array('q', ids)
+        self.index = {node: i for i, node in enumerate(self.ids)}
+        self.width = len(self.ids)
+        self.sources = list(sources)
+        self.rows = {source: r for r, source in enumerate(self.sources)}
+        self.targets = self.sources if targets is None else list(targets)
+        self.target_set = set(self.targets)
+        size = len(self.sources) * self.width
+        self.cost = array('d', [INFINITY]) * size
+        self.next_hop = array('q', [-1]) * size
+        self.predecessor = array('q', [-1]) * size if with_predecessors else None
+
+    ## Get the slice bounds of the row of a source.
+    def bounds(self, source):
+        start = self.rows[source] * self.width
+        return start, start + self.width
+
+    ## Store the routes of a source.
+    #  @param source Source of the row.
+    #  @param cost Array('d') of costs indexed like ids.
+    #  @param next_hop Array('q') of next hop indices.
+    #  @param predecessor Optional array('q') of predecessor indices.
+    def set_row(self, source, cost, next_hop, predecessor=None):
+        start, end = self.bounds(source)
+        self.cost[start:end] = cost
+        self.next_hop[start:end] = next_hop
+        if self.predecessor is not None and predecessor is not None:
+            self.predecessor[start:end] = predecessor
+
+    ## Extend the rows to cover nodes added to the graph since the table was made.
+    #  @param ids Router IDs of the graph indices, the current ids must be a prefix.
+    def widen(self, ids):
+        added = len(ids) - self.width
+        if added <= 0:
+            return
+        cost = array('d')
+        next_hop = array('q')
+        predecessor = array('q') if self.predecessor is not None else None
+        for r in range(len(self.sources)):
+            start = r * self.width
+            end = start + self.width
+            cost.extend(self.cost[start:end])
+            cost.extend(array('d', [INFINITY]) * added)
+            next_hop.extend(self.next_hop[start:end])
+            next_hop.extend(array('q', [-1]) * added)
+            if predecessor is not None:
+                predecessor.extend(self.predecessor[start:end])
+                predecessor.extend(array('q', [-1]) * added)
+        for node in ids[self.width:]:
+            self.index[node] = len(self.ids)
+            self.ids.append(node)
+        self.width = len(self.ids)
+        self.cost, self.next_hop, self.predecessor = cost, next_hop, predecessor
+
+    ## Make an independent copy of the table.
+    def copy(self):
+        table = RoutingTable.__new__(RoutingTable)
+        table.ids = array('q', self.ids)
+        table.index = dict(self.index)
+        table.width = self.width
+        table.sources = list(self.sources)
+        table.rows = dict(self.rows)
+        table.targets = table.sources if self.targets is self.sources else list(self.targets)
+        table.target_set = set(self.target_set)
+        table.cost = array('d', self.cost)
+        table.next_hop = array('q', self.next_hop)
+        table.predecessor = array('q', self.predecessor) if self.predecessor is not None else None
+        return table
+
+    ## Get the cost from a source to a target.
+    #  @return Cost, or float('inf') if the target is unreachable.
+    def cost_of(self, source, target):
+        i = self.index.get(target)
+        if i is None:
+            return 0 if source == target else INFINITY
+        return as_cost(self.cost[self.rows[source] * self.width + i])
+
+    ## Get the next hop from a source towards a target.
+    #  @return Router ID of the next hop, or None if the target is unreachable.
+    def next_hop_of(self, source, target):
+        i = self.index.get(target)
+        if i is None:
+            return None
+        hop = self.next_hop[self.rows[source] * self.width + i]
+        return self.ids[hop] if hop >= 0 else None
+
+    ## Rebuild the path from a source to a target from the predecessor array.
+    #  @return List of router IDs from source to target, empty if unreachable.
+    def path(self, source, target):
+        if source == target:
+            return [source]
+        i = self.index.get(target)
+        start = self.rows[source] * self.width
+        if i is None or self.cost[start + i] == INFINITY:
+            return []
+        path = []
+        while i >= 0:
+            path.append(self.ids[i])
+            i = self.predecessor[start + i]
+        path.reverse()
+        return path
+
+    ## View the table as {source: {target: cost}}.
+    def distances(self):
+        return _TableView(self, _DistanceRow)
+
+    ## View the table as {source: {target: next hop}}.
+    def next_hops(self):
+        return _TableView(self, _NextHopRow)
+
+    ## View the table as {source: {target: (path, cost)}}.
+    def paths(self):
+        return _TableView(self, _PathRow)
+
+class _TableView(Mapping):
+    """Read-only mapping from each source to a row view of a RoutingTable."""
+    def __init__(self, table, row_type):
+        self.table = table
+        self._row_type = row_type
+
+    def __getitem__(self, source):
+        if source not in self.table.rows:
+            raise KeyError(source)
+        return self._row_type(self.table, source)
+
+    def __iter__(self):
+        return iter(self.table.sources)
+
+    def __len__(self):
+        return len(self.table.sources)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+class _Row(Mapping):
+    """Read-only mapping from each target to the route of one source."""
+    def __init__(self, table, source):
+        self.table = table
+        self.source = source
+
+    def __getitem__(self, target):
+        if target not in self.table.target_set:
+            raise KeyError(target)
+        return self.value(target)
+
+    def __iter__(self):
+        return iter(self.table.targets)
+
+    def __len__(self):
+        return len(self.table.targets)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+class _DistanceRow(_Row):
+    def value(self, target):
+        return self.table.cost_of(self.source, target)
+
+class _NextHopRow(_Row):
+    def value(self, target):
+        return self.table.next_hop_of(self.source, target)
+
+class _PathRow(_Row):
+    def value(self, target):
+        if target == self.source:
+            return ([target], 0)
+        path = self.table.path(self.source, target)
+        return (path, self.table.cost_of(self.source, target) if path else INFINITY)
@@ -0,0 +1,135 @@
+## @file instrumentation
+#  Opt-in timing and counters of the routing runs.
+#  Nothing is recorded until enable() installs a Stats collector. The routing
+#  code reports through the module functions, which do nothing while no
+#  collector is active, so an uninstrumented run only pays for a None check.
+import csv
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+## Upper bounds in seconds of the buckets of the per-change latency histogram.
+HISTOGRAM_BOUNDS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10)
+
+## Collector of the current run, None when instrumentation is off.
+active = None
+
+class Stats:
+    """
+    Wall time per phase, event counters and per-change latencies of a run.
+    Phases entered several times accumulate their time. Every change records
+    its latency and the counters it incremented.
+    """
+    def __init__(self):
+        self.phases = {}
+        self.counters = Counter()
+        self.changes = []
+
+    ## Time a phase.
+    #  @param name Name of the phase, e.g. 'parse' or 'output'.
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    ## Time the handling of a change and record the counters it incremented.
+    #  @param change Change or window of changes, recorded as text.
+    @contextmanager
+    def change(self, change):
+        before = Counter(self.counters)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.changes.append({'change': _describe(change), 'seconds': seconds,
+                                 'counters': dict(self.counters - before)})
+
+    ## Count the changes per latency bucket.
+    #  @param bounds Increasing upper bounds of the buckets in seconds.
+    #  @return List of (upper bound, count) tuples, the last bound is float('inf').
+    def histogram(self, bounds=HISTOGRAM_BOUNDS):
+        bounds = list(bounds) + [float('inf')]
+        counts = [0] * len(bounds)
+        for record in self.changes:
+            counts[next(i for i, bound in enumerate(bounds) if record['seconds'] <= bound)] += 1
+        return list(zip(bounds, counts))
+
+    ## Build the report of the run.
+    #  @return Dictionary with phases, counters, histogram and changes.
+    def report(self):
+        return {
+            'phases': dict(self.phases),
+            'counters': dict(self.counters),
+            'histogram': [{'le': 'inf' if bound == float('inf') else bound, 'count': count}
+                          for bound, count in self.histogram()],
+            'changes': self.changes,
+        }
+
+    ## Write the report to a file.
+    #  @param file_path Path of the report.
+    #  @param report_format 'json' or 'csv', by default 'csv' for a .csv path and 'json' otherwise.
+    def write(self, file_path, report_format=None):
+        if report_format is None:
+            report_format = 'csv' if file_path.endswith('.csv') else 'json'
+        report = self.report()
+        if report_format == 'json':
+            with open(file_path, 'w') as file:
+                json.dump(report, file, indent=2)
+            return
+        with open(file_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['section', 'name', 'value'])
+            writer.writerows(['phase', name, seconds] for name, seconds in report['phases'].items())
+            writer.writerows(['counter', name, value] for name, value in report['counters'].items())
+            writer.writerows(['histogram', bucket['le'], bucket['count']] for bucket in report['histogram'])
+            writer.writerows(['change', record['change'], record['seconds']] for record in report['changes'])
+
+## Describe a change or a window of changes as text.
+def _describe(change):
+    if change and isinstance(change[0], tuple):
+        return '; '.join(_describe(item) for item in change)
+    return ' '.join(map(str, change))
+
+## Start collecting statistics.
+#  @return The new active Stats collector.
+def enable():
+    global active
+    active = Stats()
+    return active
+
+## Stop collecting statistics.
+#  @return The Stats collector that was active, or None.
+def disable():
+    global active
+    collector, active = active, None
+    return collector
+
+## Increment a counter of the active collector.
+#  @param name Name of the counter.
+#  @param amount Value added to the counter.
+def count(name, amount=1):
+    if active is not None:
+        active.counters[name] += amount
+
+## Time a phase with the active collector, does nothing while instrumentation is off.
+@contextmanager
+def phase(name):
+    if active is None:
+        yield
+    else:
+        with active.phase(name):
+            yield
+
+## Time a change with the active collector, does nothing while instrumentation is off.
+@contextmanager
+def change(item):
+    if active is None:
+        yield
+    else:
+        with active.change(item):
+            yield
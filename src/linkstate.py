@@ -1,17 +1,33 @@
 ## @file linkstate
 #  This simulates linkstate Routing Protocol using the Dijkstra algorithm.
-import sys
-from dijkstar import Graph, find_path, NoPathError
+import argparse
+from array import array
+from functools import partial
+from heapq import heappush, heappop
+from itertools import count
+
+import areas
+import checkpoint
+import dense
+import instrumentation
+import parallel
+from delta import DeltaWriter
+from message_router import MessageRouter
+from output import OutputWriter, output_path, output_stream
+from parsers import iter_change_windows, read_topology
+from snapshot import write_snapshot
+from topology import EdgeStore
+from graph import INFINITY, CompactGraph, RoutingTable, as_cost
 
 ## Build a graph from a list of edges.
+#  Neighbours are kept in insertion order so that ties between equal cost paths
+#  are broken the same way on every run.
 #  @param edges List of tuples (source, destination, cost).
-#  @return Graph object populated with edges and costs.
-def build_graph(edges):
-    graph = Graph()
-    for src, dest, cost in edges:
-        graph.add_edge(src, dest, {'cost': cost})
-        graph.add_edge(dest, src, {'cost': cost})
-    return graph
+#  @param nodes Optional nodes to give the first indices, so that tables of
+#         successive topologies share one layout.
+#  @return CompactGraph with one slot per neighbour, a repeated edge updates its cost.
+def build_graph(edges, nodes=()):
+    return CompactGraph(edges, nodes)
 
 ## Populate link-state information for all nodes.
 #  @param edges Initial list of edges in the network.
@@ -27,70 +43,284 @@ def populate_linkstate_info(edges):
         lsi_database[node] = complete_lsi  
     return list(complete_lsi)
 
-## Cost for edge traversal.
-#  @param u Source node.
-#  @param v Destination node.
-#  @param edge Edge data.
-#  @param prev_edge Previous edge data
-#  @return Cost of the edge.
-def edge_cost_func(u, v, edge, prev_edge):
-    return edge['cost']
+## Compute the shortest path tree rooted at a single source.
+#  Heap based Dijkstra search over the CSR arrays of the graph. Entries with equal
+#  cost leave the heap in the order they were pushed and a node only changes
+#  predecessor on a strictly cheaper path, so the tree matches the paths of a per
+#  target search.
+#  @param graph CompactGraph as returned by build_graph.
+#  @param source Root node of the tree.
+#  @return Tuple (cost, first_hop, predecessor) of arrays indexed like graph.ids.
+def shortest_path_tree(graph, source):
+    n = graph.node_count
+    cost = array('d', [INFINITY]) * n
+    first_hop = array('q', [-1]) * n
+    predecessor = array('q', [-1]) * n
+    s = graph.index.get(source)
+    if s is None:
+        return cost, first_hop, predecessor
+    offsets, neighbours, costs = graph.offsets, graph.neighbours, graph.costs
+    visited = bytearray(n)
+    counter = count()
+    cost[s] = 0
+    first_hop[s] = s
+    visit_queue = [(0, next(counter), s)]
+    while visit_queue:
+        cost_to_u, _, u = heappop(visit_queue)
+        if visited[u]:
+            continue
+        visited[u] = 1
+        for position in range(offsets[u], offsets[u + 1]):
+            v = neighbours[position]
+            if visited[v]:
+                continue
+            # Removed links have an infinite cost and never relax anything
+            cost_to_v = cost_to_u + costs[position]
+            if cost_to_v < cost[v]:
+                cost[v] = cost_to_v
+                predecessor[v] = u
+                first_hop[v] = v if u == s else first_hop[u]
+                heappush(visit_queue, (cost_to_v, next(counter), v))
+    if instrumentation.active is not None:
+        # Every entry pushed was popped and every settled node scanned all its links
+        instrumentation.count('spf_runs')
+        instrumentation.count('heap_pops', next(counter))
+        instrumentation.count('edge_relaxations', sum(offsets[u + 1] - offsets[u] for u in range(n) if visited[u]))
+    return cost, first_hop, predecessor
+
+## Search the distance between two nodes from both ends at once.
+#  The side with the cheaper queue head advances, and the search stops once
+#  the two heads together cost at least the best meeting found.
+#  @param graph CompactGraph as returned by build_graph.
+#  @param s Index of the source.
+#  @param t Index of the target.
+#  @return Tuple (distance, backward, bound): the distance, the exact distances to
+#          the target of the nodes the backward search settled, and a lower bound
+#          on the distance to the target of every other node.
+def _bidirectional_distance(graph, s, t):
+    offsets, neighbours, costs = graph.offsets, graph.neighbours, graph.costs
+    labels = ({s: 0}, {t: 0})
+    settled = (set(), set())
+    queues = ([(0, s)], [(0, t)])
+    best = 0 if s == t else INFINITY
+    while queues[0] and queues[1] and queues[0][0][0] + queues[1][0][0] < best:
+        side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+        cost_to_u, u = heappop(queues[side])
+        if u in settled[side]:
+            continue
+        settled[side].add(u)
+        label, other = labels[side], labels[1 - side]
+        for position in range(offsets[u], offsets[u + 1]):
+            v = neighbours[position]
+            cost_to_v = cost_to_u + costs[position]
+            if cost_to_v < label.get(v, INFINITY):
+                label[v] = cost_to_v
+                heappush(queues[side], (cost_to_v, v))
+            if v in other and cost_to_v + other[v] < best:
+                best = cost_to_v + other[v]
+    instrumentation.count('nodes_settled', len(settled[0]) + len(settled[1]))
+    backward = {v: labels[1][v] for v in settled[1]}
+    # Unsettled nodes are at least as far as the head of the backward queue,
+    # or unreachable once that queue ran empty
+    bound = queues[1][0][0] if queues[1] else INFINITY
+    return best, backward, bound
+
+## Find the shortest path between two nodes.
+#  A bidirectional search finds the distance, then a forward search identical
+#  to shortest_path_tree, but stopping at the target and never queueing a node
+#  whose cost plus its bound to the target exceeds that distance, rebuilds the
+#  path. Nodes on shortest paths are never skipped and are reached in the same
+#  order as in a full search, so ties are broken exactly as in the table.
+#  @param graph CompactGraph as returned by build_graph.
+#  @param source Source node.
+#  @param target Target node.
+#  @return Tuple (path, cost), ([], float('inf')) if the target is unreachable.
+def shortest_path_between(graph, source, target):
+    s = graph.index.get(source)
+    t = graph.index.get(target)
+    if s is None or t is None:
+        return [], INFINITY
+    if s == t:
+        return [source], 0
+    instrumentation.count('point_to_point_searches')
+    distance, backward, bound = _bidirectional_distance(graph, s, t)
+    if distance == INFINITY:
+        return [], INFINITY
+    # Leave room for rounding, the sums of float costs depend on their order
+    limit = distance + abs(distance) * 1e-9
+    offsets, neighbours, costs = graph.offsets, graph.neighbours, graph.costs
+    cost = {s: 0}
+    predecessor = {}
+    visited = set()
+    counter = count()
+    visit_queue = [(0, next(counter), s)]
+    while visit_queue:
+        cost_to_u, _, u = heappop(visit_queue)
+        if u in visited:
+            continue
+        if u == t:
+            break
+        visited.add(u)
+        for position in range(offsets[u], offsets[u + 1]):
+            v = neighbours[position]
+            if v in visited:
+                continue
+            cost_to_v = cost_to_u + costs[position]
+            if cost_to_v < cost.get(v, INFINITY):
+                cost[v] = cost_to_v
+                predecessor[v] = u
+                if cost_to_v + backward.get(v, bound) <= limit:
+                    heappush(visit_queue, (cost_to_v, next(counter), v))
+    instrumentation.count('nodes_settled', len(visited))
+    path = [t]
+    while path[-1] != s:
+        path.append(predecessor[path[-1]])
+    path.reverse()
+    return [graph.ids[i] for i in path], as_cost(cost[t])
 
 ## Calculate shortest paths between all nodes.
-#  @param graph Graph object representing the network.
+#  Runs one Dijkstra search per source and stores its tree as a row of a routing
+#  table, as costs, first hops and predecessors. Each tree is stored as soon as
+#  it is computed, paths are only rebuilt from the predecessors when read.
+#  @param graph CompactGraph representing the network.
 #  @param nodes List of nodes in the graph.
-#  @return Dictionary mapping node pairs to their shortest path and cost.
-def calculate_shortest_paths(graph, nodes):
-    results = {}
-    for node in nodes:
-        results[node] = {}
-        for target in nodes:
-            if node != target:
-                try:
-                    result = find_path(graph, node, target, cost_func=edge_cost_func)
-                    results[node][target] = (result.nodes, result.total_cost)
-                except NoPathError:
-                    results[node][target] = ([], float('inf'))
-            else:
-                results[node][target] = ([node], 0)
-    return results
+#  @param workers Number of processes the sources are spread over.
+#  @return Mapping of node pairs to their shortest path and cost, backed by a RoutingTable.
+def calculate_shortest_paths(graph, nodes, workers=1):
+    table = RoutingTable(graph.ids, nodes, with_predecessors=True)
+    instrumentation.count('sources_recomputed', len(table.sources))
+    trees = parallel.iter_rows(graph, shortest_path_tree, table.sources, workers)
+    for node, (cost, first_hop, predecessor) in zip(table.sources, trees):
+        table.set_row(node, cost, first_hop, predecessor)
+    return table.paths()
 
 ## Print shortest paths to an output file.
-#  @param paths Dictionary of shortest paths and costs.
-#  @param messages_file_path Path to the file containing messages.
-#  @param output_file_path Path to the output file.
-def print_shortest_paths(paths, messages_file_path, output_file_path):
-    messages_dict = {}
-    with open(messages_file_path, 'r') as msg_file:
-        for line in msg_file:
-            parts = line.strip().split(' ', 2)
-            if len(parts) == 3:
-                src, dest = map(int, parts[:2])
-                message = parts[2]
-                messages_dict[(src, dest)] = message
-    with open(output_file_path, 'a') as file:
-        for (src, dest), message in messages_dict.items():
-            if src in paths and dest in paths[src] and paths[src][dest][0]:
-                path, cost = paths[src][dest]
-                hops_str = ' '.join(map(str, path))
-                file.write(f"from {src} to {dest} cost {cost} hops {hops_str} message {message}\n")
+#  Messages are routed through a MessageRouter, so each (source, destination)
+#  pair is looked up once and its path is reused while the source's tree is
+#  unchanged. The lines of all messages are formatted first and written in one call.
+#  @param paths Mapping of shortest paths and costs, as returned by calculate_shortest_paths.
+#  @param messages_file_path Path to the file containing messages, or a MessageRouter
+#         kept across calls to reuse its paths.
+#  @param output_file_path Path to the output file, or an open OutputWriter.
+#  @param changed_sources Optional sources whose trees changed since the previous call.
+def print_shortest_paths(paths, messages_file_path, output_file_path, changed_sources=None):
+    if isinstance(messages_file_path, MessageRouter):
+        router = messages_file_path
+    else:
+        router = MessageRouter.from_file(messages_file_path, unique_pairs=True)
+    routes = router.route(paths.table, changed_sources)
+    chunks = []
+    for src, dest, message in router.messages:
+        hops_str, cost = routes[(src, dest)]
+        if hops_str is not None:
+            chunks.append(f"from {src} to {dest} cost {cost} hops {hops_str} message {message}\n\n")
+        else:
+            chunks.append(f"from {src} to {dest} cost infinite hops unreachable message {message}\n\n")
+    with output_stream(output_file_path) as file:
+        file.write(''.join(chunks))
+
+## Print the paths of messages found with point to point searches.
+#  Writes the lines print_shortest_paths writes for the same graph, without
+#  computing a single full tree. Only routers of the table are routed, as in
+#  the table a message from or to any other router is unreachable.
+#  @param graph CompactGraph as returned by build_graph.
+#  @param nodes Routers the table would hold.
+#  @param messages_file_path Path to the file containing messages, or a MessageRouter.
+#  @param output_file_path Path to the output file, or an open OutputWriter.
+def print_message_paths(graph, nodes, messages_file_path, output_file_path):
+    if isinstance(messages_file_path, MessageRouter):
+        router = messages_file_path
+    else:
+        router = MessageRouter.from_file(messages_file_path, unique_pairs=True)
+    routes = {}
+    chunks = []
+    for src, dest, message in router.messages:
+        if (src, dest) not in routes:
+            if src in nodes and dest in nodes:
+                routes[(src, dest)] = shortest_path_between(graph, src, dest)
             else:
-                file.write(f"from {src} to {dest} cost infinite hops unreachable message {message}\n")
-            file.write("\n")
+                routes[(src, dest)] = ([], INFINITY)
+        path, cost = routes[(src, dest)]
+        if path:
+            chunks.append(f"from {src} to {dest} cost {cost} hops {' '.join(map(str, path))} message {message}\n\n")
+        else:
+            chunks.append(f"from {src} to {dest} cost infinite hops unreachable message {message}\n\n")
+    with output_stream(output_file_path) as file:
+        file.write(''.join(chunks))
+
+## Format the forwarding table of one source.
+#  @param ids Router IDs of the graph indices.
+#  @param targets List of (destination, index) pairs in the order they are listed.
+#  @param cost Array of costs holding the row of the source from start.
+#  @param next_hop Array of next hop indices laid out like cost.
+#  @param start Position of the row of the source in the arrays.
+#  @return Text of one 'destination next_hop cost' line per reachable destination and a blank line.
+def _format_table(ids, targets, cost, next_hop, start=0):
+    chunks = [f"{dest} {ids[next_hop[start + i]]} {as_cost(cost[start + i])}\n"
+              for dest, i in targets if cost[start + i] != INFINITY]
+    chunks.append("\n")
+    return ''.join(chunks)
 
 ## Print shortest path forwarding tables to an output file.
 #  This function iterates over all source nodes in the network, listing the next hop and total cost for each destination reachable from the source.
-#  @param paths Dictionary mapping source and destination nodes with their paths and costs
-#  @param output_file_path String path to output file
+#  The next hops are read from the table, no path is built. The tables are formatted first and written in one call.
+#  @param paths Mapping of source and destination nodes to their paths and costs, backed by a RoutingTable
+#  @param output_file_path String path to output file, or an open OutputWriter
 def print_shortest_paths1(paths, output_file_path):
-    with open(output_file_path, 'a') as file:
-        for src, targets in paths.items():
-            for dest, (path, cost) in targets.items():
-                if len(path) > 1:
-                    file.write(f"{dest} {path[1]} {cost}\n")
-                else:
-                    file.write(f"{dest} {path[0]} {cost}\n")
-            file.write("\n")
+    table = paths.table
+    targets = [(dest, table.index[dest]) for dest in table.targets if dest in table.index]
+    text = ''.join(_format_table(table.ids, targets, table.cost, table.next_hop, table.bounds(src)[0])
+                   for src in table.sources)
+    with output_stream(output_file_path) as file:
+        file.write(text)
+
+## Print the forwarding tables and message paths computing one tree at a time.
+#  Writes what print_shortest_paths1 then print_shortest_paths write for the
+#  table of calculate_shortest_paths. The table of a source is written and the
+#  paths of its messages are read as soon as its tree is computed, then the tree
+#  is dropped, so memory grows with the number of routers and messages instead of
+#  its square.
+#  @param graph CompactGraph as returned by build_graph.
+#  @param nodes Routers the table would hold, in the order of its rows.
+#  @param messages_file_path Path to the file containing messages, or a MessageRouter.
+#  @param output_file_path Path to the output file, or an open OutputWriter.
+#  @param workers Number of processes the trees are computed in.
+def print_streamed_paths(graph, nodes, messages_file_path, output_file_path, workers=1):
+    if isinstance(messages_file_path, MessageRouter):
+        router = messages_file_path
+    else:
+        router = MessageRouter.from_file(messages_file_path, unique_pairs=True)
+    sources = list(nodes)
+    targets = [(dest, graph.index[dest]) for dest in sources]
+    # Destinations of the messages of each source, the only paths kept
+    wanted = {}
+    for src, dest in router.pairs:
+        if src in nodes and dest in nodes:
+            wanted.setdefault(src, []).append(dest)
+    routes = {}
+    instrumentation.count('sources_recomputed', len(sources))
+    with output_stream(output_file_path) as file:
+        trees = parallel.iter_rows(graph, shortest_path_tree, sources, workers)
+        for source, (cost, first_hop, predecessor) in zip(sources, trees):
+            file.write(_format_table(graph.ids, targets, cost, first_hop))
+            for dest in wanted.get(source, ()):
+                t = graph.index[dest]
+                if cost[t] == INFINITY:
+                    continue
+                path = [t]
+                while predecessor[path[-1]] >= 0:
+                    path.append(predecessor[path[-1]])
+                path.reverse()
+                routes[(source, dest)] = (' '.join(str(graph.ids[i]) for i in path), as_cost(cost[t]))
+
+        chunks = []
+        for src, dest, message in router.messages:
+            if (src, dest) in routes:
+                hops_str, cost = routes[(src, dest)]
+                chunks.append(f"from {src} to {dest} cost {cost} hops {hops_str} message {message}\n\n")
+            else:
+                chunks.append(f"from {src} to {dest} cost infinite hops unreachable message {message}\n\n")
+        file.write(''.join(chunks))
 
 ## Apply a single change to the network topology.
 #  @param edges Current list of edges.
@@ -111,49 +341,275 @@ def apply_single_change(edges, change):
     if not found and new_cost != -999:
         edges.append((src, dest, new_cost))  # Add new link
 
-if __name__ == '__main__':
-    if len(sys.argv) != 4:
-        print("Usage: python lsr.py <topologyFile> <messageFile> <changesFile>")
-        sys.exit(1)
+## Apply a single change directly to the graph.
+#  The link is undirected, so the change matches it in either orientation.
+#  @param graph CompactGraph as returned by build_graph.
+#  @param change Tuple (source, destination, cost), a cost of -999 removes the link.
+#  @return Previous cost of the link, or None if the link did not exist.
+def apply_change_to_graph(graph, change):
+    src, dest, new_cost = change
+    return graph.set_link(src, dest, None if new_cost == -999 else new_cost)
+
+## Find the sources whose shortest path tree can be changed by a link change.
+#  A tree is affected if it routes over the link, or if the new cost gives an
+#  endpoint a path at least as cheap as the one it has. Paths of equal cost are
+#  included so the repaired tree is the one a search over the updated graph finds.
+#  That graph keeps the neighbour order of the graph it was built as, see
+#  CompactGraph.set_link, while a full recompute builds the graph again from the
+#  link-state database in another order, so the two may pick different next hops
+#  among paths of equal cost. The costs are the same.
+#  @param table RoutingTable holding the shortest path tree of every source.
+#  @param change Tuple (source, destination, cost) that was applied.
+#  @param old_cost Cost of the link before the change, None if it did not exist.
+#  @param skip Optional flags indexed by table row, rows whose flag is set are not tested.
+#  @return List of affected sources.
+def affected_sources(table, change, old_cost, skip=None):
+    src, dest, new_cost = change
+    if new_cost == -999:
+        new_cost = None
+    if new_cost == old_cost:
+        return []
+    i = table.index.get(src, -1)
+    j = table.index.get(dest, -1)
+    if i < 0 or j < 0:
+        return []
+    affected = []
+    for row, source in enumerate(table.sources):
+        if skip is not None and skip[row]:
+            continue
+        start = table.bounds(source)[0]
+        if old_cost is not None and (table.predecessor[start + j] == i or table.predecessor[start + i] == j):
+            affected.append(source)
+        elif new_cost is not None:
+            src_cost = table.cost[start + i]
+            dest_cost = table.cost[start + j]
+            if (src_cost != INFINITY and src_cost + new_cost <= dest_cost) or \
+               (dest_cost != INFINITY and dest_cost + new_cost <= src_cost):
+                affected.append(source)
+    return affected
+
+## Incrementally update shortest paths after a single change.
+#  Only the trees returned by affected_sources are recomputed, every other row
+#  of the table is kept as it is.
+#  @param graph CompactGraph, updated in place.
+#  @param table RoutingTable of shortest path trees per source, updated in place.
+#  @param change Tuple (source, destination, cost) to apply.
+#  @param workers Number of processes the affected sources are spread over.
+#  @return List of sources whose tree was recomputed.
+def update_shortest_paths(graph, table, change, workers=1):
+    old_cost = apply_change_to_graph(graph, change)
+    table.widen(graph.ids)
+    affected = affected_sources(table, change, old_cost)
+    instrumentation.count('sources_recomputed', len(affected))
+    trees = parallel.map_rows(graph, shortest_path_tree, affected, workers)
+    for source, (cost, first_hop, predecessor) in zip(affected, trees):
+        table.set_row(source, cost, first_hop, predecessor)
+    return affected
+
+## Run the link state simulation.
+#  @param argv List of command line arguments, sys.argv[1:] by default.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate link state routing.")
+    parser.add_argument('topology_file', help="File with one 'source destination cost' link per line.")
+    parser.add_argument('messages_file', help="File with one 'source destination message' per line.")
+    parser.add_argument('changes_file', help="File with one 'source destination cost' change per line.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Repair only the shortest path trees affected by each change. The costs match a "
+                             "full recompute, the next hops may differ between paths of equal cost.")
+    parser.add_argument('--backend', choices=['python', 'numpy', 'auto'], default='python',
+                        help="All-pairs routing backend, 'auto' picks numpy for large dense topologies. "
+                             "The numpy backend may break ties between equal cost paths differently.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of processes computing shortest path trees (python backend).")
+    parser.add_argument('--window', type=int, default=1,
+                        help="Apply the changes in windows of this many lines, coalesced per link, "
+                             "and write the tables once per window (0 for no limit).")
+    parser.add_argument('--window-separators', action='store_true',
+                        help="End a window of changes at each blank line of the changes file.")
+    parser.add_argument('--output', default='output.txt', help="File the tables and message paths are appended to.")
+    parser.add_argument('--delta', action='store_true',
+                        help="Start a new delta log in the output file: the tables are written in full once, then "
+                             "only the entries each change modifies (python delta.py rebuilds the full output).")
+    parser.add_argument('--gzip', action='store_true', help="Write the output as a gzip stream (adds a .gz suffix).")
+    parser.add_argument('--snapshot', metavar='PATH',
+                        help="Write the routing tables in effect after the last change as a binary snapshot (see snapshot.py).")
+    parser.add_argument('--messages-only', action='store_true',
+                        help="Write only the message paths, each found with a bidirectional search instead of full tables.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write each router's table as soon as its tree is computed and keep only the paths of "
+                             "the messages, instead of the trees of all routers (python backend).")
+    parser.add_argument('--areas', metavar='FILE',
+                        help="Route hierarchically over the areas of FILE, one 'router area' per line, so a change "
+                             "only recomputes its area and the backbone between areas.")
+    parser.add_argument('--area-size', type=int, metavar='N',
+                        help="Route hierarchically over areas of about N routers grown from the topology.")
+    parser.add_argument('--stats', metavar='REPORT',
+                        help="Write phase timings, counters and per-change latencies to REPORT (.csv for CSV, else JSON).")
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help="Save the state of the run to PATH after the initial tables, periodically and at the end.")
+    parser.add_argument('--checkpoint-interval', type=float, default=checkpoint.DEFAULT_INTERVAL,
+                        help="Seconds between two checkpoints, 0 to save one after every window of changes.")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue from the checkpoint given with --checkpoint instead of starting over.")
+    args = parser.parse_args(argv)
+    if args.messages_only and (args.delta or args.snapshot):
+        parser.error("--messages-only writes no tables, it cannot be combined with --delta or --snapshot")
+    if args.stream and (args.incremental or args.delta or args.snapshot or args.messages_only or args.backend == 'numpy'):
+        parser.error("--stream keeps no tables, it cannot be combined with --incremental, --delta, --snapshot, "
+                     "--messages-only or --backend numpy")
+    if args.areas and args.area_size:
+        parser.error("--areas and --area-size are alternatives")
+    if args.area_size is not None and args.area_size < 1:
+        parser.error("--area-size must be at least 1")
+    hierarchical = bool(args.areas or args.area_size)
+    if hierarchical and (args.incremental or args.stream or args.messages_only or args.backend == 'numpy'):
+        parser.error("--areas and --area-size route with their own tables, they cannot be combined with "
+                     "--incremental, --stream, --messages-only or --backend numpy")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs the --checkpoint to continue from")
+    if args.stats:
+        instrumentation.enable()
     # Command line arguments.
-    topology_file_path = sys.argv[1]
-    messages_file_path = sys.argv[2]
-    changes_file_path = sys.argv[3]
-    output_file_path = 'output.txt' 
-
-    # Reads the tpology from the file and stores it as a list of edges
-    edges = []
-    with open(topology_file_path, 'r') as file:
-        for line in file:
-            src, dest, cost = map(int, line.strip().split())
-            edges.append((src, dest, cost))
-
-    # Generate the complete topology to simulate routing
-    complete_edges = populate_linkstate_info(edges)
-    network_graph = build_graph(complete_edges)
-    nodes = set(sum(([src, dest] for src, dest, _ in edges), []))
-    paths = calculate_shortest_paths(network_graph, nodes)
-
-    # Writes the initial routing information
-    print_shortest_paths1(paths, output_file_path)
-    print_shortest_paths(paths, messages_file_path, output_file_path)
-
-    # Apply changes and recalculate routing
-    with open(changes_file_path, 'r') as changes_file:
-        for line in changes_file:
-            change = tuple(map(int, line.strip().split()))
-            apply_single_change(edges, change)
-
-            # Recompute with updated topology
+    topology_file_path = args.topology_file
+    messages_file_path = args.messages_file
+    changes_file_path = args.changes_file
+    output_file_path = output_path(args.output, args.gzip)
+    settings = checkpoint.run_settings('linkstate', [topology_file_path, messages_file_path, changes_file_path,
+                                                     output_file_path], args,
+                                       ['incremental', 'backend', 'window', 'window_separators', 'delta', 'gzip',
+                                        'messages_only', 'stream', 'areas', 'area_size'])
+
+    # Reads the tpology from the file and stores it keyed by undirected edge
+    with instrumentation.phase('parse'):
+        edges = EdgeStore(read_topology(topology_file_path))
+
+    nodes = edges.nodes()
+    layout = sorted(nodes)
+    # Areas of the initial topology, kept while the links change
+    try:
+        area_of = areas.read_areas(args.areas) if args.areas else areas.partition(edges, args.area_size) \
+            if args.area_size else None
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    try:
+        backend = dense.choose_backend(args.backend, len(nodes), len(edges))
+    except ImportError as error:
+        parser.error(str(error))
+    if backend == 'numpy':
+        all_pairs_paths = dense.linkstate_paths
+    else:
+        all_pairs_paths = partial(calculate_shortest_paths, workers=args.workers)
+    # Without tables, or with tables written tree by tree, there is nothing to compute ahead of the output
+    route_all_pairs = (lambda graph, nodes: None) if args.messages_only or args.stream else all_pairs_paths
+    start = 0
+    if args.resume:
+        # Pick up the topology and tables of the last window the checkpoint saw
+        try:
+            start, state = checkpoint.resume(args.checkpoint, settings, output_file_path)
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+        edges, network_graph, routing = state['edges'], state['graph'], state['areas']
+        paths = state['table'].paths() if state['table'] is not None else None
+    elif hierarchical:
+        network_graph = None
+        with instrumentation.phase('spf'):
+            routing = areas.AreaRouting(edges, area_of, nodes)
+        paths = routing.table.paths()
+    else:
+        routing = None
+        # Generate the complete topology to simulate routing
+        with instrumentation.phase('populate_linkstate_info'):
             complete_edges = populate_linkstate_info(edges)
-            network_graph = build_graph(complete_edges)
-            paths = calculate_shortest_paths(network_graph, nodes)
+        with instrumentation.phase('build_graph'):
+            network_graph = build_graph(complete_edges, layout)
+        with instrumentation.phase('spf'):
+            paths = route_all_pairs(network_graph, nodes)
+    # Messages are parsed once, their paths are cached across changes
+    with instrumentation.phase('parse'):
+        router = MessageRouter.from_file(messages_file_path, unique_pairs=True)
 
-            print_shortest_paths1(paths, output_file_path)
-            print_shortest_paths(paths, messages_file_path, output_file_path)
+    # The forwarding tables go through a delta writer, if any
+    delta_writer = DeltaWriter() if args.delta else None
+    if args.resume and delta_writer:
+        delta_writer.previous = state['delta']
+    def print_tables(paths, output):
+        if args.messages_only or args.stream:
+            return
+        if delta_writer:
+            delta_writer.write(paths.table, output)
+        else:
+            print_shortest_paths1(paths, output)
 
+    def print_messages(paths, output, changed_sources=None):
+        if args.messages_only:
+            print_message_paths(network_graph, nodes, router, output)
+        elif args.stream:
+            with instrumentation.phase('spf'):
+                print_streamed_paths(network_graph, nodes, router, output, args.workers)
+        else:
+            print_shortest_paths(paths, router, output, changed_sources)
 
+    checkpointer = checkpoint.Checkpointer(args.checkpoint, settings, args.checkpoint_interval) if args.checkpoint else None
+    def save_checkpoint(output, offset):
+        checkpointer.save(output, offset, {'edges': edges, 'graph': network_graph, 'areas': routing,
+                                           'table': paths.table if paths is not None else None,
+                                           'delta': delta_writer.previous if delta_writer else None})
 
+    # One buffered output handle for the whole run
+    with OutputWriter(output_file_path, 'w' if args.delta and not args.resume else 'a', args.gzip) as output:
+        if not args.resume:
+            # Writes the initial routing information
+            with instrumentation.phase('output'):
+                print_tables(paths, output)
+                print_messages(paths, output)
+            if checkpointer:
+                save_checkpoint(output, start)
 
+        # Apply changes and recalculate routing, once per window of changes
+        batched = args.window != 1 or args.window_separators
+        offset = start
+        for window, offset in iter_change_windows(changes_file_path, args.window, args.window_separators,
+                                                  start, offsets=True):
+            with instrumentation.change(window):
+                if batched:
+                    # Collapse repeated and cancelling changes of the same link
+                    window = edges.net_changes(window)
+                changed_sources = set() if args.incremental else None
+                version = edges.version
+                for change in window:
+                    edges.apply(change)
+                    if args.incremental and args.messages_only:
+                        apply_change_to_graph(network_graph, change)
+                    elif args.incremental:
+                        # Repair only the trees that the changed link can affect
+                        with instrumentation.phase('spf'):
+                            changed_sources.update(update_shortest_paths(network_graph, paths.table, change, args.workers))
+                if hierarchical and edges.version != version:
+                    # Route again the areas of the changed links and the backbone
+                    with instrumentation.phase('spf'):
+                        changed_sources = routing.update(edges)
+                    paths = routing.table.paths()
+                elif not args.incremental and edges.version != version:
+                    # Recompute with updated topology
+                    with instrumentation.phase('populate_linkstate_info'):
+                        complete_edges = populate_linkstate_info(edges)
+                    with instrumentation.phase('build_graph'):
+                        network_graph = build_graph(complete_edges, layout)
+                    with instrumentation.phase('spf'):
+                        paths = route_all_pairs(network_graph, nodes)
 
+                with instrumentation.phase('output'):
+                    print_tables(paths, output)
+                    print_messages(paths, output, changed_sources)
+            if checkpointer and checkpointer.due():
+                save_checkpoint(output, offset)
+        if checkpointer:
+            save_checkpoint(output, offset)
 
+    if args.snapshot:
+        write_snapshot(paths.table, args.snapshot)
+    if args.stats:
+        instrumentation.disable().write(args.stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+## @file message_router
+#  Batched message routing with a path cache reused across table versions.
+#  Messages are parsed once and grouped by (source, destination) pair, so each
+#  path is built once per table version. Built paths are kept between versions
+#  and only rebuilt when a routing table row they were read from has changed.
+from array import array
+from hashlib import blake2b
+
+from graph import INFINITY
+from parsers import iter_messages
+
+class MessageRouter:
+    """
+    Routes a fixed set of messages against successive routing tables.
+    Paths are either read from the predecessor tree of the source (link state)
+    or walked hop by hop through the next hops of every router on the way
+    (distance vector).
+    """
+    ## Group the messages by (source, destination) pair.
+    #  @param messages Iterable of (source, destination, message) tuples.
+    #  @param unique_pairs Keep only the last message of each pair, at the position of the first one.
+    #  @param follow_next_hops Walk the next hops of each router instead of the source's tree.
+    def __init__(self, messages, unique_pairs=False, follow_next_hops=False):
+        if unique_pairs:
+            latest = {}
+            for src, dest, message in messages:
+                latest[(src, dest)] = message
+            self.messages = [(src, dest, message) for (src, dest), message in latest.items()]
+        else:
+            self.messages = list(messages)
+        self.pairs = list(dict.fromkeys((src, dest) for src, dest, _ in self.messages))
+        self.follow_next_hops = follow_next_hops
+        self._routes = {}
+        self._depends = {}
+        self._digests = {}
+        self._ids = None
+        self._sources = None
+
+    ## Parse a messages file into a router.
+    #  @param file_path Path to the file containing messages.
+    #  @return MessageRouter for the messages of the file.
+    @classmethod
+    def from_file(cls, file_path, unique_pairs=False, follow_next_hops=False):
+        return cls(iter_messages(file_path), unique_pairs, follow_next_hops)
+
+    ## Route every pair against a table version.
+    #  Pairs that only read unchanged rows keep their route. Pairs that read a
+    #  changed row keep it too if the entries their path was built from are
+    #  the same, only the others are rebuilt.
+    #  @param table RoutingTable of the current version.
+    #  @param changed_rows Optional sources whose rows changed since the previous
+    #         call, when not given changed rows are found by comparing row digests.
+    #  @return Dictionary mapping each pair to (hops string or None if unreachable, cost).
+    def route(self, table, changed_rows=None):
+        if self._ids != table.ids or self._sources != table.sources:
+            # Another layout, none of the cached entries can be compared
+            self._routes.clear()
+            self._digests.clear()
+            self._ids = array('q', table.ids)
+            self._sources = list(table.sources)
+            changed = set()
+        elif changed_rows is not None:
+            changed = set(changed_rows)
+            for row in changed:
+                self._digests.pop(row, None)
+        else:
+            changed = {row for row, digest in self._digests.items() if self._digest(table, row) != digest}
+            for row in changed:
+                del self._digests[row]
+
+        links = table.next_hop if self.follow_next_hops else table.predecessor
+        for pair in self.pairs:
+            if pair in self._routes:
+                rows, cost_position, positions, values = self._depends[pair]
+                if changed.isdisjoint(rows):
+                    continue
+                if (table.cost[cost_position], *[links[p] for p in positions]) != values:
+                    self._routes[pair], self._depends[pair] = self._build(table, *pair)
+            else:
+                self._routes[pair], self._depends[pair] = self._build(table, *pair)
+            # Track the rows read by the route for the next version
+            for row in self._depends[pair][0]:
+                if row not in self._digests:
+                    self._digests[row] = self._digest(table, row)
+        return self._routes
+
+    ## Compute a digest of the row of a source.
+    def _digest(self, table, row):
+        start, end = table.bounds(row)
+        digest = blake2b(memoryview(table.cost)[start:end], digest_size=16)
+        digest.update(memoryview(table.next_hop)[start:end])
+        if table.predecessor is not None:
+            digest.update(memoryview(table.predecessor)[start:end])
+        return digest.digest()
+
+    ## Build the route of a pair.
+    #  @return Tuple ((hops string or None, cost), dependencies) where the
+    #          dependencies are the rows read, the position of the cost, the
+    #          positions of the next hops or predecessors read and their values.
+    def _build(self, table, src, dest):
+        if src not in table.rows or dest not in table.target_set:
+            return (None, INFINITY), ((), 0, (), None)
+        width = table.width
+        start = table.rows[src] * width
+        cost_position = start + table.index[dest]
+        cost = table.cost_of(src, dest)
+        if not self.follow_next_hops:
+            # The path is read from the predecessors in the row of the source
+            path = table.path(src, dest)
+            positions = tuple(start + table.index[node] for node in path[1:])
+            route = (' '.join(map(str, path)), cost) if path else (None, INFINITY)
+            values = (table.cost[cost_position], *[table.predecessor[p] for p in positions])
+            return route, ((src,), cost_position, positions, values)
+
+        # The path is walked through the next hops of every router on the way
+        path = [src]
+        positions = []
+        route = None
+        if cost == INFINITY:
+            route = (None, INFINITY)
+        current = src
+        while route is None and current != dest:
+            positions.append(table.rows[current] * width + table.index[dest])
+            next_router = table.next_hop_of(current, dest)
+            if not next_router:
+                route = (None, INFINITY)
+                break
+            path.append(next_router)
+            current = next_router
+        if route is None:
+            route = (' '.join(map(str, path)), cost)
+        rows = tuple(self._sources[p // width] for p in positions) or (src,)
+        values = (table.cost[cost_position], *[table.next_hop[p] for p in positions])
+        return route, (rows, cost_position, tuple(positions), values)
@@ -1,11 +1,174 @@
+## @file network
+#  Network of routers read from the topology, messages and changes files, and
+#  an on-demand routing engine that only computes the routes it is asked for.
+from collections import OrderedDict
+
+import instrumentation
+from graph import INFINITY, CompactGraph, as_cost
+from distancevector import distance_vector_row, distance_vector_table
+from linkstate import apply_change_to_graph, shortest_path_tree
+from parsers import iter_messages, load_topology
+
+## Number of trees a RoutingEngine keeps by default.
+DEFAULT_CAPACITY = 1024
+
+class RoutingEngine:
+    """
+    Routes computed on first query and kept in a least recently used cache.
+    A query computes the tree of the router it starts from, a shortest path tree
+    for link state and the Bellman-Ford vector of distance_vector_row for
+    distance vector, so a workload that only routes a few messages touches a few
+    trees instead of the whole table. A change drops the cached trees it can
+    affect, the others keep serving queries.
+    """
+    ## Create an engine over a graph.
+    #  @param graph CompactGraph of the network, changes are applied to it in place.
+    #  @param protocol 'ls' for shortest path trees, 'dv' for Bellman-Ford vectors.
+    #  @param capacity Number of trees kept, the least recently used is evicted first.
+    def __init__(self, graph, protocol='ls', capacity=DEFAULT_CAPACITY):
+        if protocol not in ('ls', 'dv'):
+            raise ValueError(f"unknown protocol {protocol!r}, expected 'ls' or 'dv'")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.graph = graph
+        self.protocol = protocol
+        self.capacity = capacity
+        self.trees = OrderedDict()
+        self.computed = 0
+
+    ## Get the tree of a router, computing it on a miss.
+    #  @param node Router the routes of the tree start from.
+    #  @return Tuple of arrays indexed like graph.ids, (cost, first_hop, predecessor)
+    #          for link state and (distance, nexthop) for distance vector, None if
+    #          the router is not in the graph.
+    def tree(self, node):
+        tree = self.trees.get(node)
+        if tree is not None:
+            self.trees.move_to_end(node)
+            instrumentation.count('engine_hits')
+            return tree
+        i = self.graph.index.get(node)
+        if i is None:
+            return None
+        if self.protocol == 'ls':
+            tree = shortest_path_tree(self.graph, node)
+        else:
+            tree = distance_vector_row(self.graph, i)
+        self.computed += 1
+        instrumentation.count('engine_misses')
+        self.trees[node] = tree
+        if len(self.trees) > self.capacity:
+            self.trees.popitem(last=False)
+            instrumentation.count('engine_evictions')
+        return tree
+
+    ## Find the position of the entry of a route in its tree.
+    #  @return Tuple (tree, position), position being -1 if the route is unknown.
+    def _entry(self, src, dst):
+        tree = self.tree(src)
+        i = self.graph.index.get(dst, -1)
+        if tree is None or i < 0 or i >= len(tree[0]):
+            return tree, -1
+        return tree, i
+
+    ## Get the cost from a source to a destination.
+    #  @return Cost, or float('inf') if the destination is unreachable.
+    def cost_of(self, src, dst):
+        if src == dst:
+            return 0
+        tree, i = self._entry(src, dst)
+        return INFINITY if i < 0 else as_cost(tree[0][i])
+
+    ## Get the next hop from a source towards a destination.
+    #  @return Router ID of the next hop, or None if the destination is unreachable.
+    def next_hop(self, src, dst):
+        tree, i = self._entry(src, dst)
+        if i < 0 or tree[1][i] < 0:
+            return None
+        return self.graph.ids[tree[1][i]]
+
+    ## Get the path and cost from a source to a destination.
+    #  Link state paths follow the predecessors of the source's tree. Distance
+    #  vector paths follow the next hop of every router on the way, like the
+    #  messages of distancevector, which computes the trees of those routers.
+    #  @return Tuple (list of router IDs, cost), ([], float('inf')) if unreachable.
+    def route(self, src, dst):
+        if src == dst:
+            return [src], 0
+        tree, i = self._entry(src, dst)
+        if i < 0 or tree[0][i] == INFINITY:
+            return [], INFINITY
+        ids = self.graph.ids
+        if self.protocol == 'ls':
+            path = []
+            k = i
+            while k >= 0:
+                path.append(ids[k])
+                k = tree[2][k]
+            path.reverse()
+        else:
+            path = [src]
+            while path[-1] != dst and len(path) <= len(ids):
+                hop = self.next_hop(path[-1], dst)
+                if hop is None:
+                    return [], INFINITY
+                path.append(hop)
+            if path[-1] != dst:
+                return [], INFINITY
+        return path, as_cost(tree[0][i])
+
+    ## Apply a link change and drop the cached trees it can affect.
+    #  A tree is affected if the old or the new link offers one of its endpoints
+    #  a path at least as cheap as the one it has, which covers trees routing
+    #  over the link and, with equal costs, trees whose ties it could break.
+    #  @param change Tuple (r1, r2, cost), a cost of -999 removes the link.
+    #  @return List of routers whose tree was dropped.
+    def change(self, change):
+        r1, r2, cost = change
+        new_cost = None if cost == -999 else cost
+        old_cost = apply_change_to_graph(self.graph, change)
+        if old_cost == new_cost:
+            return []
+        costs = [value for value in (old_cost, new_cost) if value is not None]
+        i = self.graph.index.get(r1, -1)
+        j = self.graph.index.get(r2, -1)
+        dropped = []
+        for node, tree in self.trees.items():
+            distance = tree[0]
+            d1 = distance[i] if 0 <= i < len(distance) else INFINITY
+            d2 = distance[j] if 0 <= j < len(distance) else INFINITY
+            if any((d1 != INFINITY and d1 + value <= d2) or (d2 != INFINITY and d2 + value <= d1)
+                   for value in costs):
+                dropped.append(node)
+        for node in dropped:
+            del self.trees[node]
+        instrumentation.count('engine_invalidations', len(dropped))
+        return dropped
+
+    ## Drop every cached tree.
+    def clear(self):
+        self.trees.clear()
+
 class Network:
     def __init__(self, topologyFile, messageFile, changesFile):
         self.topologyFile = topologyFile
         self.messageFile = messageFile
         self.changesFile = changesFile
-        self.graph = []
+        self.graph = CompactGraph(merge_parallel=False)
         self.messages = []
-        self.routing_tables = {}
+        self.routing_tables = None
+
+    def build_network(self):
+        node1, node2, cost = load_topology(self.topologyFile)
+        self.graph = CompactGraph(zip(node1, node2, cost), merge_parallel=False)
+
+    def parseMessages(self):
+        self.messages = list(iter_messages(self.messageFile))
+
+    def computeRoutingTables(self):
+        # One flat RoutingTable row per destination router
+        self.routing_tables = distance_vector_table(self.graph)
+        return self.routing_tables
     '''    
     def initRoutingTables(self):
         for source, dest, cost in self.graph:
@@ -16,18 +179,6 @@ class Network:
             self.routing_tables[source][dest] = cost
             self.routing_tables[dest][source] = cost
 
-    def build_network(self):
-        with open(self.topologyFile, 'r') as topology:
-            for line in topology:
-                node1, node2, cost = map(int, line.split())
-                self.graph.append((node1, node2, cost))
-
-    def parseMessages(self):
-        with open(self.messageFile, 'r') as messages:
-            for line in messages:
-                node1, node2, message_text = messages.readline().strip().split(maxsplit=2)
-                self.messages.append((node1, node2, message_text))
-
 
     def computeDV(self, router_id):
     # Use Bellman-Ford algorithm to update routing table based on neighbors' distance vectors
@@ -57,24 +208,18 @@ class Network:
                     self.routing_tables[router_id][dest] = new_cost
                     print(f"Updated cost to {dest} through {source} to {new_cost}")
     ''' 
-    def bellman_ford(self, dst, routers, links):
-        INFINITY = float('inf')
-        distance = {}
-        nexthop = {}
-        
-        for r in routers:
-            distance[r] = INFINITY
-            nexthop[r] = None
-
-        distance[dst] = 0
-
-        #for _ in range(len(routers) - 1):
-        for (r1, r2, dist) in links:
-            if distance[r1] + dist < distance[r2]:
-                distance[r2] = distance[r1] + dist
-                nexthop[r2] = r1
-
-        return distance, nexthop
+    def bellman_ford(self, dst):
+        # Distances and next hops towards dst as arrays indexed like self.graph.ids
+        return distance_vector_row(self.graph, self.graph.index[dst])
+
+    def routing_engine(self, protocol='dv', capacity=DEFAULT_CAPACITY):
+        # Link state merges repeated links into one, distance vector keeps each of them
+        graph = self.graph
+        if protocol == 'ls':
+            ids = graph.ids
+            graph = CompactGraph(zip([ids[i] for i in graph.link_source], [ids[i] for i in graph.link_target],
+                                     [as_cost(cost) for cost in graph.link_cost]), graph.ids)
+        return RoutingEngine(graph, protocol, capacity)
     ''' 
     def print_routing_tables(self):
         for router, table in self.routing_tables.items():
@@ -0,0 +1,91 @@
+## @file output
+#  Buffered output stage shared by the routing modules.
+#  A run keeps one large-buffered handle open, optionally gzip compressed, and
+#  every table is formatted in memory and handed to it in a single write.
+import gzip
+import io
+import os
+from contextlib import contextmanager
+
+## Buffer size of the output handle.
+BUFFER_SIZE = 1 << 20
+
+class OutputWriter:
+    """
+    Text sink kept open for a whole run.
+    Writes go through a BUFFER_SIZE buffer, and through gzip when compress is
+    True, so the file sees a few large writes instead of one per line.
+    """
+    ## Open the sink.
+    #  @param path Path of the output file.
+    #  @param mode 'w' to truncate the file, 'a' to append to it.
+    #  @param compress Write a gzip stream instead of plain text.
+    def __init__(self, path, mode='a', compress=False):
+        self.path = path
+        self.compress = compress
+        self._open(mode)
+
+    def _open(self, mode):
+        if self.compress:
+            raw = gzip.GzipFile(self.path, mode + 'b')
+            self.file = io.TextIOWrapper(io.BufferedWriter(raw, BUFFER_SIZE))
+        else:
+            self.file = open(self.path, mode, buffering=BUFFER_SIZE)
+
+    ## Write a formatted chunk.
+    #  @param text String to write.
+    def write(self, text):
+        self.file.write(text)
+
+    ## Flush buffered data to the file.
+    def flush(self):
+        self.file.flush()
+
+    ## Write everything buffered through to the disk.
+    #  A gzip stream ends its member and goes on in a new one, so the file can
+    #  be cut at the returned size and appended to again.
+    #  @return Size of the file in bytes.
+    def checkpoint(self):
+        if self.compress:
+            self.file.close()
+            self._open('a')
+        else:
+            self.file.flush()
+        descriptor = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+        return os.path.getsize(self.path)
+
+    ## Flush and close the sink.
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+## Get the path of the output file for a run.
+#  @param path Requested output path.
+#  @param compress Whether the output is gzip compressed.
+#  @return The path, with a .gz suffix added for compressed output.
+def output_path(path, compress):
+    if compress and not path.endswith('.gz'):
+        return path + '.gz'
+    return path
+
+## Give access to a writable stream for an output argument.
+#  Paths are opened in the given mode for the duration of the block, open
+#  writers and file objects are used as they are and left open.
+#  @param output Path of the output file, or an object with a write method.
+#  @param mode Mode used when output is a path.
+@contextmanager
+def output_stream(output, mode='a'):
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, mode) as file:
+            yield file
+    else:
+        yield output
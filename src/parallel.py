@@ -0,0 +1,72 @@
+## @file parallel
+#  Process pool execution of the per router routing computations.
+#  The graph reaches the workers once per pool: forked workers inherit it from
+#  the parent process, other platforms pickle it once per worker through the pool
+#  initializer. Tasks only carry the router keys of a chunk. Counters the rows
+#  increment in a worker are sent back with the chunk and added to the parent's.
+import multiprocessing
+from collections import Counter
+
+import instrumentation
+
+## Graph and row function of the current pool, set in each worker.
+_shared = {}
+
+## Install the graph and row function in a worker process.
+#  @param graph CompactGraph the rows are computed on.
+#  @param row_function Function called as row_function(graph, key).
+#  @param collect_stats Start an instrumentation collector in the worker.
+def _init_worker(graph, row_function, collect_stats=False):
+    _shared['graph'] = graph
+    _shared['row_function'] = row_function
+    if collect_stats and instrumentation.active is None:
+        instrumentation.enable()
+
+## Compute the rows of a chunk of keys in a worker process.
+#  @param keys List of keys passed to the row function.
+#  @return Tuple (rows in the order of keys, counters incremented or None).
+def _compute_chunk(keys):
+    graph = _shared['graph']
+    row_function = _shared['row_function']
+    collector = instrumentation.active
+    before = Counter(collector.counters) if collector is not None else None
+    rows = [row_function(graph, key) for key in keys]
+    return rows, (collector.counters - before) if collector is not None else None
+
+## Compute one row per key, spread over a pool of worker processes.
+#  Rows are yielded in the order of keys whatever the number of workers, so the
+#  results and the output files do not depend on the scheduling. A row can be
+#  stored or written and dropped before the next ones are received.
+#  @param graph CompactGraph the rows are computed on.
+#  @param row_function Module level function called as row_function(graph, key).
+#  @param keys Iterable of keys, e.g. source IDs or destination indices.
+#  @param workers Number of worker processes, 1 computes the rows in this process.
+#  @return Generator of rows in the order of keys.
+def iter_rows(graph, row_function, keys, workers=1):
+    keys = list(keys)
+    if workers <= 1 or len(keys) < 2:
+        for key in keys:
+            yield row_function(graph, key)
+        return
+    chunk_size = max(1, len(keys) // (workers * 4))
+    chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+    if 'fork' in multiprocessing.get_all_start_methods():
+        # Set before the pool forks so every worker inherits the graph
+        _init_worker(graph, row_function)
+        pool = multiprocessing.get_context('fork').Pool(workers)
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker,
+                                    initargs=(graph, row_function, instrumentation.active is not None))
+    try:
+        with pool:
+            for chunk_rows, counters in pool.imap(_compute_chunk, chunks):
+                if counters and instrumentation.active is not None:
+                    instrumentation.active.counters.update(counters)
+                yield from chunk_rows
+    finally:
+        _shared.clear()
+
+## Compute one row per key, spread over a pool of worker processes.
+#  @return List of rows in the order of keys, see iter_rows.
+def map_rows(graph, row_function, keys, workers=1):
+    return list(iter_rows(graph, row_function, keys, workers))
@@ -0,0 +1,187 @@
+## @file parsers
+#  Shared input layer for topology, message and change files.
+#  Topologies are parsed in bulk from a memory-mapped file straight into integer
+#  arrays, messages and changes are streamed one line at a time. A message or
+#  change line may start with an '@time' timestamp, read by the timed iterators
+#  and skipped by the others.
+import mmap
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+## Size of the blocks a memory-mapped topology is parsed in.
+BLOCK_SIZE = 1 << 24
+
+## Parse a topology file into integer arrays.
+#  The file is memory-mapped and split in blocks of whole lines. A block whose
+#  lines all hold three integers is converted in one pass, with NumPy when it is
+#  installed, other blocks are parsed line by line and lines without exactly
+#  three fields are skipped.
+#  @param file_path Path to the file with one 'r1 r2 cost' link per line.
+#  @return Tuple (r1, r2, cost) of array('q') with one entry per link.
+def load_topology(file_path):
+    r1 = array('q')
+    r2 = array('q')
+    cost = array('q')
+    with open(file_path, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            return r1, r2, cost
+        with data:
+            start = 0
+            size = len(data)
+            while start < size:
+                end = start + BLOCK_SIZE
+                if end >= size:
+                    end = size
+                else:
+                    # Extend the block to the end of its last line
+                    newline = data.find(b'\n', end)
+                    end = size if newline < 0 else newline + 1
+                _parse_block(data[start:end], r1, r2, cost)
+                start = end
+    return r1, r2, cost
+
+## Check that every line of a block holds exactly three fields.
+#  @param block Block of whole lines, the last one may lack its newline.
+#  @return True if the fields of the block can be converted in bulk.
+def _three_fields_per_line(block):
+    if np is None:
+        return all(len(line.split()) == 3 for line in block.rstrip(b'\n').split(b'\n'))
+    data = np.frombuffer(block, dtype=np.uint8)
+    blank = data <= ord(' ')
+    # A field starts at a non blank byte that follows a blank one or the block start
+    starts = ~blank
+    starts[1:] &= blank[:-1]
+    starts = np.flatnonzero(starts)
+    ends = np.flatnonzero(data == ord('\n'))
+    if len(data) and data[-1] != ord('\n'):
+        ends = np.append(ends, len(data))
+    # Line k holds fields 3k to 3k + 2 if they start between its newline and the previous one
+    return (len(starts) == 3 * len(ends) and bool(np.all(starts[3::3] > ends[:-1]))
+            and bool(np.all(starts[2::3] < ends)))
+
+## Parse a block of whole topology lines into the link arrays.
+#  The fields are only converted in bulk if every line holds three of them,
+#  otherwise fields of misaligned lines would be read as links.
+def _parse_block(block, r1, r2, cost):
+    fields = None
+    if _three_fields_per_line(block):
+        try:
+            if np is not None:
+                fields = array('q', np.fromstring(block, dtype=np.int64, sep=' ').tobytes())
+            else:
+                fields = array('q', map(int, block.split()))
+        except ValueError:
+            pass
+    if fields is not None and len(fields) % 3 == 0:
+        r1.extend(fields[0::3])
+        r2.extend(fields[1::3])
+        cost.extend(fields[2::3])
+        return
+    for line in block.splitlines():
+        parts = line.split()
+        if len(parts) == 3:
+            r1.append(int(parts[0]))
+            r2.append(int(parts[1]))
+            cost.append(int(parts[2]))
+
+## Read a topology file as a list of links.
+#  @param file_path Path to the file with one 'r1 r2 cost' link per line.
+#  @return List of tuples (r1, r2, cost).
+def read_topology(file_path):
+    return list(zip(*load_topology(file_path)))
+
+## Split the optional '@time' timestamp off a message or change line.
+#  @param line Line of the file.
+#  @return Tuple (time or None, rest of the stripped line).
+def _split_timestamp(line):
+    line = line.strip()
+    if line.startswith('@'):
+        stamp, _, rest = line.partition(' ')
+        try:
+            return float(stamp[1:]), rest.lstrip()
+        except ValueError:
+            pass
+    return None, line
+
+## Stream the timestamped changes of a file.
+#  A line without a timestamp happens at the time of the line before it, the
+#  first ones at time 0.
+#  @param file_path Path to the file with one '[@time] r1 r2 cost' change per line.
+#  @return Generator of (time, r1, r2, cost) tuples, lines without three fields are skipped.
+def iter_timed_changes(file_path):
+    time = 0.0
+    with open(file_path, 'r') as file:
+        for line in file:
+            stamp, line = _split_timestamp(line)
+            if stamp is not None:
+                time = stamp
+            parts = line.split()
+            if len(parts) == 3:
+                r1, r2, cost = map(int, parts)
+                yield time, r1, r2, cost
+
+## Stream the changes of a file.
+#  @param file_path Path to the file with one 'r1 r2 cost' change per line.
+#  @return Generator of (r1, r2, cost) tuples, lines without three fields are skipped.
+def iter_changes(file_path):
+    for _, r1, r2, cost in iter_timed_changes(file_path):
+        yield r1, r2, cost
+
+## Stream the changes of a file grouped in windows.
+#  @param file_path Path to the file with one 'r1 r2 cost' change per line.
+#  @param size Number of changes per window, 0 for no limit.
+#  @param separators End a window at each blank line of the file.
+#  @param start Byte offset to start reading at, the end of a window read before.
+#  @param offsets Yield (window, offset) tuples, offset being the byte offset
+#         just after the window, to start a later read from.
+#  @return Generator of non-empty lists of (r1, r2, cost) tuples.
+def iter_change_windows(file_path, size=1, separators=False, start=0, offsets=False):
+    window = []
+    offset = start
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        for line in file:
+            offset += len(line)
+            parts = _split_timestamp(line.decode())[1].split()
+            if len(parts) == 3:
+                r1, r2, cost = map(int, parts)
+                window.append((r1, r2, cost))
+                if len(window) != size:
+                    continue
+            elif not (separators and not parts):
+                continue
+            if window:
+                yield (window, offset) if offsets else window
+                window = []
+    if window:
+        yield (window, offset) if offsets else window
+
+## Stream the timestamped messages of a file.
+#  A line without a timestamp is sent at the time of the line before it, the
+#  first ones at time 0.
+#  @param file_path Path to the file with one '[@time] source destination message' per line.
+#  @return Generator of (time, source, destination, message) tuples.
+def iter_timed_messages(file_path):
+    time = 0.0
+    with open(file_path, 'r') as file:
+        for line in file:
+            stamp, line = _split_timestamp(line)
+            if stamp is not None:
+                time = stamp
+            parts = line.split(' ', 2)
+            if len(parts) == 3:
+                src, dest, message = parts
+                yield time, int(src), int(dest), message
+
+## Stream the messages of a file.
+#  @param file_path Path to the file with one 'source destination message' per line.
+#  @return Generator of (source, destination, message) tuples.
+def iter_messages(file_path):
+    for _, src, dest, message in iter_timed_messages(file_path):
+        yield src, dest, message
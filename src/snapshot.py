@@ -0,0 +1,166 @@
+## @file snapshot
+#  Binary snapshot of a routing table, read through mmap without copying.
+#  The file holds a 32 byte header followed by the arrays of a RoutingTable in
+#  little-endian order: the router IDs of the columns, the sources of the rows,
+#  then one cost (float64, inf when unreachable) and one next hop index (int64,
+#  -1 when unreachable) per (source, destination), and optionally one
+#  predecessor index per entry to rebuild link state paths.
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import INFINITY, as_cost
+
+## Magic bytes at the start of a snapshot.
+MAGIC = b'RTSNAP\x00\x00'
+## Version of the format.
+VERSION = 1
+## Header: magic, version, flags, number of columns, number of rows.
+HEADER = struct.Struct('<8sIIQQ')
+## Flag of a snapshot holding predecessors.
+HAS_PREDECESSORS = 1
+
+## Write the arrays of a routing table to a snapshot.
+#  The snapshot is written to a temporary file first and moved in place, so a
+#  reader never maps a partial file.
+#  @param table RoutingTable to store.
+#  @param file_path Path of the snapshot.
+def write_snapshot(table, file_path):
+    flags = HAS_PREDECESSORS if table.predecessor is not None else 0
+    arrays = [table.ids, array('q', table.sources), table.cost, table.next_hop]
+    if table.predecessor is not None:
+        arrays.append(table.predecessor)
+    temporary = file_path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, flags, table.width, len(table.sources)))
+        for values in arrays:
+            if sys.byteorder != 'little':
+                values = array(values.typecode, values)
+                values.byteswap()
+            file.write(values)
+    os.replace(temporary, file_path)
+
+class Snapshot:
+    """
+    Routing table mapped from a snapshot file.
+    The arrays are memoryviews of the mapping, so opening a snapshot only reads
+    its header and the pages a query touches. The indices of router IDs and rows
+    are built on the first query.
+    """
+    ## Map a snapshot.
+    #  @param file_path Path of the snapshot.
+    def __init__(self, file_path):
+        with open(file_path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError(f"{file_path} is not a routing table snapshot")
+        magic, version, flags, width, rows = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{file_path} is not a routing table snapshot")
+        self.width = width
+        self.rows = rows
+        view = memoryview(self._map)
+        offset = HEADER.size
+        arrays = []
+        for typecode, length in [('q', width), ('q', rows), ('d', rows * width), ('q', rows * width),
+                                 ('q', rows * width if flags & HAS_PREDECESSORS else 0)]:
+            values = view[offset:offset + 8 * length].cast(typecode)
+            if sys.byteorder != 'little':
+                values = array(typecode, values)
+                values.byteswap()
+            arrays.append(values)
+            offset += 8 * length
+        self.ids, self.sources, self.cost, self.next_hops, predecessor = arrays
+        self.predecessor = predecessor if flags & HAS_PREDECESSORS else None
+        self._index = None
+        self._row = None
+
+    ## Release the mapping, views of its arrays must not be used afterwards.
+    def close(self):
+        for name in ('ids', 'sources', 'cost', 'next_hops', 'predecessor'):
+            values = getattr(self, name)
+            if isinstance(values, memoryview):
+                values.release()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    ## Get the position of the entry of a source and destination.
+    #  @return Position in the entry arrays, or -1 if either router is not in the snapshot.
+    def _entry(self, src, dst):
+        if self._index is None:
+            self._index = {node: i for i, node in enumerate(self.ids)}
+            self._row = {source: r for r, source in enumerate(self.sources)}
+        r = self._row.get(src)
+        i = self._index.get(dst)
+        if r is None or i is None:
+            return -1
+        return r * self.width + i
+
+    ## Get the cost from a source to a destination.
+    #  @return Cost, or float('inf') if the destination is unreachable.
+    def cost_of(self, src, dst):
+        k = self._entry(src, dst)
+        if k < 0:
+            return 0 if src == dst else INFINITY
+        return as_cost(self.cost[k])
+
+    ## Get the next hop from a source towards a destination.
+    #  @return Router ID of the next hop, or None if the destination is unreachable.
+    def next_hop(self, src, dst):
+        k = self._entry(src, dst)
+        if k < 0:
+            return None
+        hop = self.next_hops[k]
+        return self.ids[hop] if hop >= 0 else None
+
+    ## Get the path from a source to a destination.
+    #  Link state snapshots rebuild it from the predecessors of the source, other
+    #  snapshots follow the next hops from row to row.
+    #  @return List of router IDs from source to destination, empty if unreachable.
+    def path(self, src, dst):
+        if src == dst:
+            return [src]
+        k = self._entry(src, dst)
+        if k < 0 or self.cost[k] == INFINITY:
+            return []
+        if self.predecessor is not None:
+            start = k - k % self.width
+            i = k - start
+            path = []
+            while i >= 0:
+                path.append(self.ids[i])
+                i = self.predecessor[start + i]
+            path.reverse()
+            return path
+        path = [src]
+        while path[-1] != dst and len(path) <= self.width:
+            hop = self.next_hop(path[-1], dst)
+            if hop is None:
+                return []
+            path.append(hop)
+        return path if path[-1] == dst else []
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Look up routes in a routing table snapshot.")
+    parser.add_argument('snapshot_file', help="Snapshot written with --snapshot.")
+    parser.add_argument('source', type=int, help="Source router.")
+    parser.add_argument('destination', type=int, help="Destination router.")
+    args = parser.parse_args()
+
+    with Snapshot(args.snapshot_file) as snapshot:
+        path = snapshot.path(args.source, args.destination)
+        if path:
+            print(f"from {args.source} to {args.destination} cost {snapshot.cost_of(args.source, args.destination)} "
+                  f"next hop {snapshot.next_hop(args.source, args.destination)} hops {' '.join(map(str, path))}")
+        else:
+            print(f"from {args.source} to {args.destination} cost infinite hops unreachable")
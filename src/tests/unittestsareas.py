@@ -0,0 +1,111 @@
+import filecmp
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import areas
+import distancevector
+import instrumentation
+import linkstate
+from topology import EdgeStore
+
+class TestAreas(unittest.TestCase):
+
+    def setUp(self):
+        """Split a topology in three areas, the last one cut off from the others."""
+        self.links = [(1, 2, 1), (2, 3, 2), (1, 3, 4), (4, 5, 1), (5, 6, 3), (4, 6, 1),
+                      (3, 4, 5), (1, 6, 9), (7, 8, 2)]
+        self.area_of = {1: 'a', 2: 'b', 3: 'a', 4: 'b', 5: 'b', 6: 'b', 7: 'c', 8: 'c'}
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        instrumentation.disable()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def assertFlatCosts(self, routing, edges):
+        nodes = routing.table.sources
+        graph = linkstate.build_graph(linkstate.populate_linkstate_info(edges), sorted(nodes))
+        flat = linkstate.calculate_shortest_paths(graph, nodes)
+        for src in nodes:
+            for dest in nodes:
+                cost = routing.table.cost_of(src, dest)
+                self.assertEqual(cost, flat.table.cost_of(src, dest), (src, dest))
+                path = routing.table.path(src, dest)
+                if path and src != dest:
+                    self.assertEqual(routing.table.next_hop_of(src, dest), path[1])
+                    self.assertEqual(sum(edges.cost(r1, r2) for r1, r2 in zip(path, path[1:])), cost)
+
+    def test_read_areas(self):
+        with open(self.path('areas.txt'), 'w') as file:
+            file.write("# router area\n1 backbone\n\n2 east\n")
+        self.assertEqual(areas.read_areas(self.path('areas.txt')), {1: 'backbone', 2: 'east'})
+        with open(self.path('areas.txt'), 'a') as file:
+            file.write("3\n")
+        with self.assertRaises(ValueError):
+            areas.read_areas(self.path('areas.txt'))
+
+    def test_partition(self):
+        area_of = areas.partition(self.links, 3)
+        self.assertEqual(set(area_of), set(range(1, 9)))
+        self.assertEqual(area_of[1], area_of[2])
+        self.assertNotEqual(area_of[1], area_of[7])
+        for area in set(area_of.values()):
+            self.assertLessEqual(list(area_of.values()).count(area), 3)
+
+    def test_costs_match_flat_routing(self):
+        edges = EdgeStore(self.links)
+        routing = areas.AreaRouting(edges, self.area_of)
+        self.assertEqual(routing.backbone_nodes, [0, 1, 2, 3, 5])
+        self.assertEqual(routing.table.path(2, 5), [2, 3, 4, 5])
+        # Leaving the area and coming back is cheaper than the link inside it
+        self.assertEqual(routing.table.path(1, 3), [1, 2, 3])
+        self.assertEqual(routing.table.cost_of(1, 7), float('inf'))
+        self.assertFlatCosts(routing, edges)
+
+    def test_change_routes_only_its_area(self):
+        edges = EdgeStore(self.links)
+        routing = areas.AreaRouting(edges, self.area_of)
+        stats = instrumentation.enable()
+        edges.apply((5, 6, 1))
+        changed = routing.update(edges)
+        self.assertEqual(stats.counters['areas_recomputed'], 1)
+        self.assertTrue({5, 6} <= changed)
+        self.assertFlatCosts(routing, edges)
+        # A link between areas only routes the backbone again
+        edges.apply((3, 4, -999))
+        routing.update(edges)
+        self.assertEqual(stats.counters['areas_recomputed'], 1)
+        self.assertFlatCosts(routing, edges)
+        self.assertEqual(routing.update(edges), set())
+
+    def test_routers_join_and_leave(self):
+        edges = EdgeStore(self.links)
+        routing = areas.AreaRouting(edges, self.area_of)
+        edges.apply((8, 9, 1))
+        self.assertIsNone(routing.update(edges))
+        self.assertIn(9, routing.table.sources)
+        edges.apply((7, 8, -999))
+        self.assertIsNone(routing.update(edges))
+        self.assertNotIn(7, routing.table.sources)
+        self.assertFlatCosts(routing, edges)
+
+    def test_outputs_match_flat_runs(self):
+        tests = os.path.dirname(os.path.abspath(__file__))
+        for name in ('topology.txt', 'message.txt', 'changes.txt', 'expected_outputls.txt', 'expected_output.txt'):
+            shutil.copy(os.path.join(tests, name), self.directory.name)
+        arguments = [self.path('topology.txt'), self.path('message.txt'), self.path('changes.txt'), '--area-size', '2']
+        linkstate.main([*arguments, '--output', self.path('ls.txt')])
+        distancevector.main([*arguments, '--output', self.path('dv.txt')])
+        self.assertTrue(filecmp.cmp(self.path('ls.txt'), self.path('expected_outputls.txt'), shallow=False))
+        self.assertTrue(filecmp.cmp(self.path('dv.txt'), self.path('expected_output.txt'), shallow=False))
+        with self.assertRaises(SystemExit):
+            linkstate.main([*arguments, '--output', self.path('ls.txt'), '--incremental'])
+
+if __name__ == '__main__':
+    unittest.main()
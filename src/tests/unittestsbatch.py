@@ -0,0 +1,71 @@
+import filecmp
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import batch
+import instrumentation
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        """Copy the test scenarios to a scratch directory next to a manifest."""
+        self.directory = tempfile.TemporaryDirectory()
+        tests = os.path.dirname(os.path.abspath(__file__))
+        for name in os.listdir(tests):
+            if name.endswith('.txt'):
+                shutil.copy(os.path.join(tests, name), self.directory.name)
+        self.manifest = self.path('manifest.txt')
+        with open(self.manifest, 'w') as file:
+            file.write("# protocol topology messages changes output\n\n"
+                       "ls topology.txt message.txt changes.txt ls1.txt\n"
+                       "dv topology.txt message.txt changes.txt dv1.txt\n"
+                       "ls topology2.txt message3.txt changes.txt ls3.txt --incremental\n"
+                       "dv topology2.txt message3.txt changes.txt dv3.txt --stats " + self.path('stats.json') + "\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def assertOutputs(self):
+        for output, expected in [('ls1.txt', 'expected_outputls.txt'), ('dv1.txt', 'expected_output.txt'),
+                                 ('ls3.txt', 'expected_output3ls.txt'), ('dv3.txt', 'expected_output3.txt')]:
+            self.assertTrue(filecmp.cmp(self.path(output), self.path(expected), shallow=False), output)
+
+    def test_read_manifest(self):
+        scenarios = batch.read_manifest(self.manifest)
+        self.assertEqual([scenario.protocol for scenario in scenarios], ['ls', 'dv', 'ls', 'dv'])
+        self.assertEqual(scenarios[2].topology, self.path('topology2.txt'))
+        self.assertEqual(scenarios[2].options, ('--incremental',))
+        with open(self.manifest, 'a') as file:
+            file.write("ospf topology.txt message.txt changes.txt out.txt\n")
+        with self.assertRaises(ValueError):
+            batch.read_manifest(self.manifest)
+
+    def test_outputs_match_separate_runs(self):
+        results = batch.run_batch(batch.read_manifest(self.manifest))
+        self.assertEqual([result.error for result in results], [None] * 4)
+        self.assertOutputs()
+        self.assertTrue(os.path.exists(self.path('stats.json')))
+        self.assertIsNone(instrumentation.active)
+
+    def test_process_pool(self):
+        results = batch.run_batch(batch.read_manifest(self.manifest), workers=2)
+        self.assertEqual([result.scenario.output for result in results],
+                         [self.path(name) for name in ('ls1.txt', 'dv1.txt', 'ls3.txt', 'dv3.txt')])
+        self.assertOutputs()
+
+    def test_failures_are_reported(self):
+        scenarios = batch.read_manifest(self.manifest)
+        broken = scenarios[0]._replace(topology=self.path('missing.txt'))
+        results = batch.run_batch([broken, scenarios[1]])
+        self.assertIn('FileNotFoundError', results[0].error)
+        self.assertIsNone(results[1].error)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+from benchmark import generators
+from benchmark.suite import benchmark_topology
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_topologies_are_connected(self):
+        for kind, generator in generators.TOPOLOGIES.items():
+            links = generator(30, seed=1)
+            pairs = [frozenset((r1, r2)) for r1, r2, _ in links]
+            self.assertEqual(len(pairs), len(set(pairs)), kind)
+            distance_vectors, _ = distancevector.distance_vector_routing(links)
+            for router, distances in distance_vectors.items():
+                self.assertNotIn(float('inf'), distances.values(), kind)
+
+    def test_generators_are_seeded(self):
+        links = generators.scale_free_topology(50, seed=3)
+        self.assertEqual(links, generators.scale_free_topology(50, seed=3))
+        changes = generators.change_stream(links, 20, seed=3)
+        self.assertEqual(changes, generators.change_stream(links, 20, seed=3))
+        self.assertEqual(len(generators.message_stream(links, 7)), 7)
+        self.assertEqual(len(generators.grid_topology(3, 4)), 17)
+
+    def test_benchmark_phases(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result = benchmark_topology('ring', 12, directory, repeat=1, messages=5, changes=3)
+            self.assertEqual((result['routers'], result['links']), (12, 12))
+            self.assertIn('calculate_shortest_paths', result['phases'])
+            result = benchmark_topology('ring', 12, directory, repeat=1, routing_limit=10)
+            self.assertEqual(sorted(result['phases']), ['parse', 'parse_messages'])
+
+if __name__ == '__main__':
+    unittest.main()
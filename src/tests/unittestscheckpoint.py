@@ -0,0 +1,140 @@
+import gzip
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import checkpoint
+import distancevector
+import instrumentation
+import linkstate
+from output import OutputWriter
+from parsers import iter_change_windows
+
+## Changes applied by the runs, a link going down and up again around other changes.
+CHANGES = ["2 4 1\n", "2 4 -999\n", "1 3 5\n", "2 4 3\n", "4 5 -999\n", "1 2 9\n"]
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        """Copy the test topologies and messages to a scratch directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        tests = os.path.dirname(os.path.abspath(__file__))
+        for name in ('topology.txt', 'message.txt'):
+            shutil.copy(os.path.join(tests, name), self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        instrumentation.disable()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def write_changes(self, lines):
+        with open(self.path('changes.txt'), 'w') as file:
+            file.writelines(lines)
+
+    def run_script(self, main, output, *options):
+        main([self.path('topology.txt'), self.path('message.txt'), self.path('changes.txt'),
+              '--output', self.path(output), *options])
+
+    def read(self, name):
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(self.path(name), 'rt') as file:
+            return file.read()
+
+    def interrupted_run(self, main, options):
+        """Run over the first windows of changes, append garbage, then resume over all of them."""
+        output = 'resumed.txt.gz' if '--gzip' in options else 'resumed.txt'
+        options = [*options, '--checkpoint', self.path('run.ckpt'), '--checkpoint-interval', '0']
+        self.write_changes(CHANGES[:4])
+        self.run_script(main, 'resumed.txt', *options)
+        # Output written after the last checkpoint, as by a killed run
+        with open(self.path(output), 'ab') as file:
+            file.write(b'garbage')
+        self.write_changes(CHANGES)
+        self.run_script(main, 'resumed.txt', *options, '--resume')
+        return self.read(output)
+
+    def assertResumes(self, main, *options):
+        output = 'full.txt.gz' if '--gzip' in options else 'full.txt'
+        for name in os.listdir(self.directory.name):
+            if name.startswith(('full', 'resumed', 'run')):
+                os.remove(self.path(name))
+        self.write_changes(CHANGES)
+        self.run_script(main, 'full.txt', *options)
+        self.assertEqual(self.interrupted_run(main, options), self.read(output))
+
+    def test_change_windows_offsets(self):
+        self.write_changes(["# links\n"] + CHANGES)
+        windows = list(iter_change_windows(self.path('changes.txt'), 2, offsets=True))
+        self.assertEqual([window for window, _ in windows], list(iter_change_windows(self.path('changes.txt'), 2)))
+        _, offset = windows[0]
+        self.assertEqual(offset, len("# links\n" + CHANGES[0] + CHANGES[1]))
+        self.assertEqual(list(iter_change_windows(self.path('changes.txt'), 2, start=offset)),
+                         [window for window, _ in windows[1:]])
+
+    def test_writer_checkpoint(self):
+        for compress in (False, True):
+            with OutputWriter(self.path('out'), 'w', compress) as output:
+                output.write("first\n")
+                size = output.checkpoint()
+                self.assertEqual(os.path.getsize(self.path('out')), size)
+                output.write("second\n")
+            with open(self.path('out'), 'r+b') as file:
+                file.truncate(size)
+            with OutputWriter(self.path('out'), 'a', compress) as output:
+                output.write("third\n")
+            opener = gzip.open if compress else open
+            with opener(self.path('out'), 'rt') as file:
+                self.assertEqual(file.read(), "first\nthird\n")
+
+    def test_linkstate_resume(self):
+        self.assertResumes(linkstate.main)
+        self.assertResumes(linkstate.main, '--incremental', '--window', '2')
+
+    def test_linkstate_delta_gzip_resume(self):
+        self.assertResumes(linkstate.main, '--delta', '--gzip')
+
+    def test_distancevector_resume(self):
+        self.assertResumes(distancevector.main)
+        self.assertResumes(distancevector.main, '--incremental', '--delta')
+
+    def test_distancevector_gzip_resume(self):
+        self.assertResumes(distancevector.main, '--gzip', '--window', '2')
+
+    def test_area_resume(self):
+        self.assertResumes(linkstate.main, '--area-size', '2')
+        self.assertResumes(distancevector.main, '--area-size', '2', '--delta')
+
+    def test_settings_mismatch(self):
+        self.write_changes(CHANGES)
+        self.run_script(linkstate.main, 'out.txt', '--checkpoint', self.path('run.ckpt'))
+        with self.assertRaises(SystemExit):
+            self.run_script(linkstate.main, 'out.txt', '--checkpoint', self.path('run.ckpt'), '--resume', '--delta')
+        with self.assertRaises(SystemExit):
+            self.run_script(distancevector.main, 'out.txt', '--checkpoint', self.path('run.ckpt'), '--resume')
+
+    def test_resume_checks(self):
+        settings = {'script': 'linkstate'}
+        with open(self.path('out.txt'), 'w') as file:
+            file.write("0123456789")
+        with open(self.path('run.ckpt'), 'wb') as file:
+            pickle.dump({'version': checkpoint.VERSION, 'settings': settings, 'changes_offset': 4,
+                         'output_size': 6, 'state': {}}, file)
+        self.assertEqual(checkpoint.resume(self.path('run.ckpt'), settings, self.path('out.txt')), (4, {}))
+        self.assertEqual(os.path.getsize(self.path('out.txt')), 6)
+        with open(self.path('out.txt'), 'w') as file:
+            file.write("012")
+        with self.assertRaises(ValueError):
+            checkpoint.resume(self.path('run.ckpt'), settings, self.path('out.txt'))
+        with open(self.path('run.ckpt'), 'wb') as file:
+            file.write(b'not a pickle')
+        with self.assertRaises(ValueError):
+            checkpoint.resume(self.path('run.ckpt'), settings, self.path('out.txt'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+import linkstate
+from delta import DeltaWriter, format_tables, iter_delta_log, rebuild_output
+from topology import EdgeStore
+
+class TestDelta(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small topology and a temporary log."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12)]
+        self.directory = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.directory.name, 'log.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_linkstate_changes(self):
+        graph = linkstate.build_graph(self.topology, sorted({1, 2, 3, 4, 5, 6}))
+        paths = linkstate.calculate_shortest_paths(graph, sorted(graph.ids))
+        writer = DeltaWriter()
+        expected = []
+        with open(self.log, 'w') as log:
+            for change in [None, (4, 5, 6), (1, 3, 1), (1, 3, 1)]:
+                if change:
+                    linkstate.update_shortest_paths(graph, paths.table, change)
+                writer.write(paths.table, log)
+                full = io.StringIO()
+                linkstate.print_shortest_paths1(paths, full)
+                expected.append(full.getvalue())
+        blocks = [format_tables(sort, tables) for sort, tables, _ in iter_delta_log(self.log)]
+        self.assertEqual(blocks, expected)
+        with open(self.log) as log:
+            sizes = [int(line.split()[1]) for line in log if line.startswith('table ')]
+        # The full tables once, then only the moved routes, nothing for a repeated change
+        self.assertEqual(sizes[0], 36)
+        self.assertLess(sizes[1], 36)
+        self.assertEqual(sizes[3], 0)
+
+    def test_lost_route_keeps_position(self):
+        # 6 is cut off and joins again, its rows must come back in table order
+        edges = EdgeStore(self.topology)
+        writer = DeltaWriter()
+        expected = []
+        with open(self.log, 'w') as log:
+            for change in [None, (5, 6, -999), (5, 6, 2)]:
+                if change:
+                    edges.apply(change)
+                graph = linkstate.build_graph(linkstate.populate_linkstate_info(edges), sorted({1, 2, 3, 4, 5, 6}))
+                paths = linkstate.calculate_shortest_paths(graph, sorted(graph.ids))
+                writer.write(paths.table, log)
+                full = io.StringIO()
+                linkstate.print_shortest_paths1(paths, full)
+                expected.append(full.getvalue())
+        blocks = [format_tables(sort, tables) for sort, tables, _ in iter_delta_log(self.log)]
+        self.assertEqual(blocks, expected)
+
+    def test_distance_vector_rebuild(self):
+        # Removing the only link of 6 drops it from the tables
+        topologies = [self.topology, self.topology[:-1], self.topology[:-1] + [(3, 7, 2)]]
+        writer = DeltaWriter(sort=True, hop_text=lambda hop: hop if hop else 'None')
+        expected = io.StringIO()
+        with open(self.log, 'w') as log:
+            for topology in topologies:
+                distance_vectors, next_hops = distancevector.distance_vector_routing(topology)
+                distancevector.write_output_file(distance_vectors, next_hops, [(1, 3, 'hi')], log,
+                                                 delta_writer=writer)
+                distancevector.write_output_file(distance_vectors, next_hops, [(1, 3, 'hi')], expected)
+        with open(self.log) as log:
+            self.assertIn("6", log.read().split('table ')[2].splitlines())
+        rebuilt = os.path.join(self.directory.name, 'rebuilt.txt')
+        rebuild_output(self.log, rebuilt)
+        with open(rebuilt) as file:
+            self.assertEqual(file.read(), expected.getvalue())
+
+    def test_joined_partition_rebuild(self):
+        # 0, 4 and 7 only reach 1, 3, 6 and 8 once the last change joins the two parts
+        files = {'topology.txt': "4 7 1\n4 0 3\n6 1 5\n1 3 5\n5 2 5\n5 7 5\n1 8 5\n",
+                 'message.txt': "4 1 hi\n", 'changes.txt': "5 2 -999\n1 3 -999\n7 6 4\n"}
+        for name, text in files.items():
+            with open(os.path.join(self.directory.name, name), 'w') as file:
+                file.write(text)
+        arguments = [os.path.join(self.directory.name, name) for name in files]
+        full = os.path.join(self.directory.name, 'full.txt')
+        open(full, 'w').close()
+        linkstate.main([*arguments, '--output', full])
+        linkstate.main([*arguments, '--output', self.log, '--delta'])
+        rebuilt = os.path.join(self.directory.name, 'rebuilt.txt')
+        rebuild_output(self.log, rebuilt)
+        with open(rebuilt, 'rb') as file, open(full, 'rb') as expected:
+            self.assertEqual(file.read(), expected.read())
+
+    def test_not_a_log(self):
+        with open(self.log, 'w') as log:
+            log.write("1 1 0\n")
+        with self.assertRaises(ValueError):
+            next(iter_delta_log(self.log))
+
+if __name__ == '__main__':
+    unittest.main()
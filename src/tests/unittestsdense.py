@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import dense
+import distancevector
+import linkstate
+
+@unittest.skipIf(dense.np is None, "NumPy is not installed")
+class TestDenseBackend(unittest.TestCase):
+
+    def setUp(self):
+        """Build a small topology with an unreachable pair."""
+        self.edges = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 1), (3, 6, 4), (7, 8, 2)]
+
+    def test_linkstate_costs_match(self):
+        graph = linkstate.build_graph(self.edges)
+        nodes = set(graph.ids)
+        expected = linkstate.calculate_shortest_paths(graph, nodes)
+        actual = dense.linkstate_paths(graph, nodes)
+        for src in nodes:
+            for dest in nodes:
+                self.assertEqual(actual[src][dest][1], expected[src][dest][1])
+        self.assertEqual(actual[1][7], ([], float('inf')))
+        self.assertEqual(actual[1][6], ([1, 4, 5, 6], 3))
+
+    def test_distance_vector_costs_match(self):
+        distance_vectors, next_hops = dense.distance_vector_tables(self.edges)
+        expected_vectors, _ = distancevector.distance_vector_routing(self.edges)
+        self.assertEqual(distance_vectors, expected_vectors)
+        self.assertEqual(next_hops[1][3], 4)
+        self.assertIsNone(next_hops[1][8])
+
+    def test_backend_selection(self):
+        self.assertEqual(dense.choose_backend('auto', 6, 7), 'python')
+        self.assertEqual(dense.choose_backend('auto', 100, 2000), 'numpy')
+        self.assertEqual(dense.choose_backend('auto', 100, 200), 'python')
+        self.assertEqual(dense.choose_backend('numpy', 6, 7), 'numpy')
+
+if __name__ == '__main__':
+    unittest.main()
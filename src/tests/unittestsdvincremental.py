@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+import instrumentation
+
+class TestDistanceVectorIncremental(unittest.TestCase):
+
+    def setUp(self):
+        """Compute the routing tables for the test topology."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 1), (3, 6, 4)]
+        self.distance_vectors, self.next_hops = distancevector.distance_vector_routing(self.topology)
+
+    def update(self, change):
+        # Apply the change incrementally and compare with a full recompute
+        topology, distance_vectors, next_hops, destinations, routers = distancevector.update_distance_vectors(
+            self.topology, self.distance_vectors, self.next_hops, change)
+        self.assertEqual((distance_vectors, next_hops), distancevector.distance_vector_routing(topology))
+        return destinations, routers
+
+    def test_bellman_ford_next_hops(self):
+        # 1 reaches 3 over 4-5-6, cheaper than the direct 1-2 link
+        distance, nexthop = distancevector.bellman_ford(1, [1, 2, 3, 4, 5, 6], self.topology)
+        self.assertEqual(distance[3], 7)
+        self.assertEqual(nexthop[3], 4)
+        self.assertEqual(nexthop[1], 1)
+
+    def test_link_removal(self):
+        destinations, routers = self.update((4, 5, -999))
+        self.assertGreater(destinations, 0)
+        self.assertGreater(routers, 0)
+        self.assertEqual(self.distance_vectors[1][5], 2)
+
+    def test_unused_link_change(self):
+        self.assertEqual(self.update((1, 2, 20)), (0, 0))
+
+    def test_touched_routers(self):
+        stats = instrumentation.enable()
+        self.addCleanup(instrumentation.disable)
+        _, distance_vectors, next_hops, destinations, routers = distancevector.update_distance_vectors(
+            self.topology, self.distance_vectors, self.next_hops, (5, 6, 5))
+        # Routers whose own table differs after the change
+        changed = [router for router in distance_vectors if (distance_vectors[router], next_hops[router]) !=
+                   (self.distance_vectors[router], self.next_hops[router])]
+        self.assertGreater(routers, 0)
+        self.assertEqual(routers, len(changed))
+        self.assertLessEqual(routers, destinations)
+        self.assertEqual(stats.counters['routers_touched'], routers)
+        self.assertEqual(stats.counters['destinations_recomputed'], destinations)
+
+    def test_new_router(self):
+        destinations, _ = self.update((6, 7, 2))
+        self.assertEqual(destinations, 7)
+
+if __name__ == '__main__':
+    unittest.main()
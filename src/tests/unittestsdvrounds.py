@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+from dv_rounds import RoundSimulator, simulate
+from topology import REMOVE_COST
+
+class TestRoundSimulator(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small topology with alternative routes."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12)]
+
+    def test_initial_convergence(self):
+        simulator, reports = simulate(self.topology)
+        self.assertTrue(reports[0].converged)
+        self.assertEqual(simulator.verify(), [])
+        distance_vectors, _ = distancevector.distance_vector_routing(self.topology)
+        self.assertEqual(simulator.table().distances(), distance_vectors)
+        # Routes grow by one link per round, the longest route has four links
+        self.assertEqual(reports[0].rounds, 4)
+
+    def test_count_to_infinity(self):
+        line = [(1, 2, 1), (2, 3, 1)]
+        _, plain = simulate(line, [(2, 3, REMOVE_COST)], infinity=16)
+        _, split = simulate(line, [(2, 3, REMOVE_COST)], infinity=16, split_horizon=True)
+        _, poisoned = simulate(line, [(2, 3, REMOVE_COST)], infinity=16, poisoned_reverse=True)
+        # Routers 1 and 2 bounce the route to 3 between them until it reaches the infinity
+        self.assertEqual(plain[1].rounds, 14)
+        self.assertEqual(split[1].rounds, 1)
+        self.assertEqual(poisoned[1].rounds, 1)
+        self.assertGreater(poisoned[1].entries, split[1].entries)
+
+    def test_changes_are_verified(self):
+        changes = [(4, 5, 6), (2, 5, REMOVE_COST), (6, 7, 2), (5, 6, REMOVE_COST), (3, 1, 1)]
+        for options in [{}, {'split_horizon': True}, {'poisoned_reverse': True}, {'split_horizon': True, 'period': 4}]:
+            failures = []
+            simulator, reports = simulate(self.topology, changes,
+                                          lambda simulator, report: failures.extend(simulator.verify()), **options)
+            self.assertEqual(failures, [], options)
+            self.assertTrue(all(report.converged for report in reports), options)
+            self.assertEqual([report.change for report in reports[1:]], changes)
+        self.assertEqual(simulator.table().cost_of(6, 7), 2)
+        self.assertIsNone(simulator.table().next_hop_of(6, 1))
+
+    def test_round_limit(self):
+        _, reports = simulate([(1, 2, 1), (2, 3, 1)], [(2, 3, REMOVE_COST)], infinity=1000, max_rounds=10)
+        self.assertFalse(reports[1].converged)
+        with self.assertRaises(ValueError):
+            RoundSimulator(self.topology, period=5, timeout=2)
+
+if __name__ == '__main__':
+    unittest.main()
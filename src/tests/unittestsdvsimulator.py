@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+from dv_simulator import ENTRY_BYTES, HEADER_BYTES, simulate
+from topology import REMOVE_COST
+
+class TestDistanceVectorSimulator(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small topology with alternative routes."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12)]
+
+    def test_initial_convergence(self):
+        simulator, reports = simulate(self.topology)
+        self.assertEqual(simulator.verify(), [])
+        distance_vectors, _ = distancevector.distance_vector_routing(self.topology)
+        self.assertEqual(simulator.table().distances(), distance_vectors)
+        self.assertIsNone(reports[0].change)
+        self.assertGreater(reports[0].messages, 0)
+        self.assertGreaterEqual(reports[0].bytes, reports[0].messages * (HEADER_BYTES + ENTRY_BYTES))
+
+    def test_changes_are_verified(self):
+        changes = [(4, 5, 6), (2, 5, REMOVE_COST), (6, 7, 2), (5, 6, REMOVE_COST), (3, 1, 1)]
+        failures = []
+        simulator, reports = simulate(self.topology, changes,
+                                      lambda simulator, convergence: failures.extend(simulator.verify()),
+                                      delays={(1, 2): 3.5}, update_interval=1)
+        self.assertEqual(failures, [])
+        self.assertEqual([report.change for report in reports[1:]], changes)
+        # Removing link 5 6 cut routers 6 and 7 off from the rest
+        table = simulator.table()
+        self.assertEqual(table.cost_of(1, 6), float('inf'))
+        self.assertIsNone(table.next_hop_of(6, 1))
+        self.assertEqual(table.cost_of(6, 7), 2)
+
+    def test_link_delays(self):
+        _, fast = simulate(self.topology, delay=1)
+        _, slow = simulate(self.topology, delay=2)
+        self.assertEqual(slow[0].time, 2 * fast[0].time)
+        self.assertEqual(slow[0].messages, fast[0].messages)
+
+if __name__ == '__main__':
+    unittest.main()
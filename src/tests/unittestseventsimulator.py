@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from event_simulator import EventSimulator
+from linkstate import affected_sources
+
+class TestEventSimulator(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small topology with alternative routes."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12)]
+
+    def test_hop_by_hop_delivery(self):
+        simulator = EventSimulator(self.topology, delays={(4, 5): 2.5})
+        summary = simulator.run(messages=[(0, 1, 3, 'a'), (1, 6, 6, 'b'), (2, 3, 9, 'c')])
+        self.assertEqual(summary.counts['delivered'], 2)
+        self.assertEqual(summary.counts['unreachable'], 1)
+        # 1 -> 4 -> 5 -> 2 -> 3, the slow link 4 5 included
+        self.assertEqual(list(simulator.hops), [4, 0, 0])
+        self.assertEqual(simulator.latency[0], 5.5)
+        self.assertEqual(simulator.link_load(), {(1, 4): 1, (4, 5): 1, (2, 5): 1, (2, 3): 1})
+        # Every hop and send is an event
+        self.assertEqual(summary.events, 7)
+
+    def test_table_in_effect_at_each_hop(self):
+        simulator = EventSimulator(self.topology)
+        # The link 2 5 goes down while the first message travels 1 4 5 2 3, at 5
+        # it turns back over 4 1 2, messages sent later go 1 2 3 directly
+        simulator.run([(1.5, 2, 5, -999)], [(0, 1, 3, 'a'), (3, 1, 3, 'b')])
+        self.assertEqual(list(simulator.status), [1, 1])
+        self.assertEqual(list(simulator.hops), [6, 2])
+        self.assertEqual(list(simulator.latency), [6, 2])
+        self.assertEqual(simulator.link_load()[(1, 4)], 2)
+
+    def test_burst_of_changes(self):
+        simulator = EventSimulator(self.topology)
+        simulator.change((4, 5, 20))
+        stale = {simulator.table.sources[row] for row, flag in enumerate(simulator.stale) if flag}
+        self.assertIn(4, stale)
+        # Stale trees are not tested again, their rows are out of date
+        self.assertFalse(stale & set(affected_sources(simulator.table, (4, 5, 1), 20, simulator.stale)))
+        simulator.change((4, 5, 1))
+        simulator.run(messages=[(0, 1, 6, 'a'), (0, 3, 4, 'b')])
+        fresh = EventSimulator(self.topology)
+        fresh.run(messages=[(0, 1, 6, 'a'), (0, 3, 4, 'b')])
+        self.assertEqual((list(simulator.hops), list(simulator.latency)), (list(fresh.hops), list(fresh.latency)))
+
+    def test_unsorted_input(self):
+        simulator = EventSimulator(self.topology)
+        with self.assertRaises(ValueError):
+            simulator.run(messages=[(2, 1, 3, 'a'), (1, 1, 3, 'b')])
+
+    def test_reports(self):
+        simulator = EventSimulator(self.topology)
+        simulator.run(messages=[(0, 1, 6, 'a')])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'messages.csv')
+            simulator.write_messages(path)
+            with open(path) as file:
+                self.assertEqual(file.read().splitlines()[1], "1,6,0,delivered,3,3")
+            path = os.path.join(directory, 'links.csv')
+            simulator.write_link_load(path)
+            with open(path) as file:
+                self.assertEqual(file.read().splitlines()[1:], ["1,4,1", "4,5,1", "5,6,1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from graph import INFINITY, CompactGraph, RoutingTable
+
+class TestCompactGraph(unittest.TestCase):
+
+    def test_merged_parallel_links(self):
+        # The repeated link keeps its slot and takes the last cost
+        graph = CompactGraph([(1, 2, 8), (2, 3, 3), (2, 1, 5)])
+        self.assertEqual(list(graph.ids), [1, 2, 3])
+        self.assertEqual(graph.neighbours_of(2), [(1, 5), (3, 3)])
+        self.assertEqual(graph.link_cost_between(1, 2), 5)
+
+    def test_parallel_links_kept(self):
+        graph = CompactGraph([(1, 2, 8), (2, 3, 3), (2, 1, 5)], merge_parallel=False)
+        self.assertEqual(graph.neighbours_of(2), [(1, 8), (3, 3), (1, 5)])
+        self.assertEqual(list(graph.link_ids[graph.offsets[1]:graph.offsets[2]]), [0, 1, 2])
+
+    def test_set_link(self):
+        graph = CompactGraph([(1, 2, 8), (2, 3, 3)])
+        self.assertEqual(graph.set_link(2, 1, 4), 8)
+        self.assertEqual(graph.set_link(1, 2, None), 4)
+        self.assertIsNone(graph.link_cost_between(1, 2))
+        self.assertIsNone(graph.set_link(3, 4, 1))
+        self.assertEqual(graph.neighbours_of(3), [(2, 3), (4, 1)])
+        self.assertEqual(graph.neighbours_of(4), [(3, 1)])
+        self.assertEqual(list(graph.offsets), [0, 1, 3, 5, 6])
+
+class TestRoutingTable(unittest.TestCase):
+
+    def setUp(self):
+        """Store the routes of source 1 over the line 1 - 2 - 3."""
+        self.table = RoutingTable([1, 2, 3], [1, 3], with_predecessors=True)
+        self.table.set_row(1, array('d', [0, 2, 5]), array('q', [0, 1, 1]), array('q', [-1, 0, 1]))
+
+    def test_views(self):
+        self.assertEqual(self.table.distances()[1], {1: 0, 3: 5})
+        self.assertEqual(self.table.next_hops()[1][3], 2)
+        self.assertEqual(self.table.paths()[1][3], ([1, 2, 3], 5))
+        self.assertEqual(self.table.paths()[3][1], ([], INFINITY))
+        self.assertNotIn(2, self.table.paths()[1])
+
+    def test_widen_and_copy(self):
+        copy = self.table.copy()
+        self.table.widen([1, 2, 3, 4])
+        self.assertEqual(self.table.cost_of(1, 4), INFINITY)
+        self.assertEqual(self.table.path(1, 3), [1, 2, 3])
+        self.assertEqual(copy.width, 3)
+
+if __name__ == '__main__':
+    unittest.main()
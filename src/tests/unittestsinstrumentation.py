@@ -0,0 +1,65 @@
+import csv
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+import instrumentation
+import linkstate
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a small topology and start collecting."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12)]
+        self.stats = instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_linkstate_counters(self):
+        graph = linkstate.build_graph(linkstate.populate_linkstate_info(self.topology))
+        linkstate.calculate_shortest_paths(graph, set(graph.ids))
+        counters = self.stats.counters
+        self.assertEqual(counters['spf_runs'], 6)
+        self.assertEqual(counters['sources_recomputed'], 6)
+        # Each search settles every router and scans both ends of every link
+        self.assertGreaterEqual(counters['heap_pops'], 36)
+        self.assertEqual(counters['edge_relaxations'], 6 * 2 * len(self.topology))
+
+    def test_distance_vector_counters_per_change(self):
+        distance_vectors, next_hops = distancevector.distance_vector_routing(self.topology)
+        with instrumentation.change((4, 5, 6)):
+            distancevector.update_distance_vectors(self.topology, distance_vectors, next_hops, (4, 5, 6))
+        record = self.stats.changes[0]
+        self.assertEqual(record['change'], '4 5 6')
+        self.assertEqual(record['counters']['destinations_recomputed'], record['counters']['bellman_ford_runs'])
+        self.assertEqual(self.stats.counters['bellman_ford_runs'], 6 + record['counters']['bellman_ford_runs'])
+        self.assertEqual(sum(count for _, count in self.stats.histogram()), 1)
+
+    def test_reports(self):
+        with instrumentation.phase('parse'):
+            instrumentation.count('lines', 3)
+        with tempfile.TemporaryDirectory() as directory:
+            self.stats.write(os.path.join(directory, 'stats.json'))
+            with open(os.path.join(directory, 'stats.json')) as file:
+                report = json.load(file)
+            self.assertEqual(report['counters'], {'lines': 3})
+            self.assertIn('parse', report['phases'])
+            self.stats.write(os.path.join(directory, 'stats.csv'))
+            with open(os.path.join(directory, 'stats.csv')) as file:
+                rows = list(csv.reader(file))
+            self.assertIn(['counter', 'lines', '3'], rows)
+
+    def test_disabled(self):
+        instrumentation.disable()
+        with instrumentation.phase('parse'):
+            instrumentation.count('lines')
+        self.assertEqual(self.stats.counters, {})
+        self.assertEqual(self.stats.phases, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import linkstate
+
+class TestLinkStateIncremental(unittest.TestCase):
+
+    def setUp(self):
+        """Build the routing state for the test topology."""
+        edges = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12), (1, 3, 7)]
+        self.graph = linkstate.build_graph(linkstate.populate_linkstate_info(edges))
+        self.nodes = set(sum(([src, dest] for src, dest, _ in edges), []))
+        self.paths = linkstate.calculate_shortest_paths(self.graph, self.nodes)
+
+    def apply_and_compare(self, change):
+        # Repair the affected trees and compare with a full recompute on the same graph
+        affected = linkstate.update_shortest_paths(self.graph, self.paths.table, change)
+        self.assertEqual(self.paths, linkstate.calculate_shortest_paths(self.graph, self.nodes))
+        return affected
+
+    def test_cost_increase_on_tree_link(self):
+        affected = self.apply_and_compare((4, 5, 20))
+        self.assertIn(4, affected)
+
+    def test_link_removal_in_reverse_orientation(self):
+        self.apply_and_compare((5, 4, -999))
+        self.assertIsNone(self.graph.link_cost_between(4, 5))
+
+    def test_new_cheaper_link(self):
+        affected = self.apply_and_compare((3, 6, 1))
+        self.assertIn(6, affected)
+        self.assertEqual(self.paths[3][6], ([3, 6], 1))
+
+    def test_link_to_new_node(self):
+        self.apply_and_compare((6, 9, 2))
+        self.assertEqual(self.paths[4][6], ([4, 5, 6], 13))
+        self.assertEqual(self.paths.table.path(4, 9), [4, 5, 6, 9])
+
+    def test_unused_link_increase_is_skipped(self):
+        affected = self.apply_and_compare((1, 2, 50))
+        self.assertEqual(affected, [])
+
+    def test_unchanged_cost_is_skipped(self):
+        self.assertEqual(self.apply_and_compare((1, 2, 8)), [])
+
+    def test_cli_matches_default_run(self):
+        # Paths of equal cost let the runs pick other next hops, the costs must agree
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        files = {'topology.txt': "1 2 1\n2 3 2\n3 4 2\n4 5 1\n5 6 1\n2 5 2\n6 3 2\n1 3 2\n",
+                 'message.txt': "1 6 hi\n", 'changes.txt': "2 4 -999\n5 1 1\n"}
+        for name, text in files.items():
+            with open(os.path.join(directory.name, name), 'w') as file:
+                file.write(text)
+        outputs = []
+        for options in ([], ['--incremental']):
+            output = os.path.join(directory.name, 'output.txt')
+            open(output, 'w').close()
+            linkstate.main([os.path.join(directory.name, name) for name in files] + ['--output', output, *options])
+            with open(output) as file:
+                outputs.append(file.read().splitlines())
+        self.assertEqual([_without_hops(line) for line in outputs[0]], [_without_hops(line) for line in outputs[1]])
+        # Without equal cost paths both runs write the same output
+        tests = os.path.dirname(os.path.abspath(__file__))
+        output = os.path.join(directory.name, 'output.txt')
+        open(output, 'w').close()
+        linkstate.main([os.path.join(tests, name) for name in ('topology.txt', 'message.txt', 'changes.txt')]
+                       + ['--output', output, '--incremental'])
+        with open(output) as file, open(os.path.join(tests, 'expected_outputls.txt')) as expected:
+            self.assertEqual(file.read(), expected.read())
+
+## Drop the next hops of a table line and the hops of a message line.
+def _without_hops(line):
+    if line.startswith('from '):
+        return line.split(' hops ')[0]
+    parts = line.split()
+    return ' '.join(parts[::2]) if len(parts) == 3 else line
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import linkstate
+
+class TestLinkStateMessagesOnly(unittest.TestCase):
+
+    def setUp(self):
+        """Build a graph with equal cost paths and a router cut off from the others."""
+        edges = [(1, 2, 1), (1, 3, 1), (2, 4, 1), (3, 4, 1), (4, 5, 2), (2, 5, 3), (6, 7, 1)]
+        self.graph = linkstate.build_graph(linkstate.populate_linkstate_info(edges))
+        self.nodes = {1, 2, 3, 4, 5, 6, 7}
+        self.paths = linkstate.calculate_shortest_paths(self.graph, self.nodes)
+
+    def test_paths_match_trees(self):
+        # Ties must be broken like the full trees, not just give the same cost
+        for src in self.nodes:
+            for dest in self.nodes:
+                path, cost = linkstate.shortest_path_between(self.graph, src, dest)
+                expected_path, expected_cost = self.paths[src][dest]
+                self.assertEqual(path, expected_path)
+                if path:
+                    self.assertEqual(cost, expected_cost)
+
+    def test_unreachable(self):
+        self.assertEqual(linkstate.shortest_path_between(self.graph, 1, 7), ([], float('inf')))
+        self.assertEqual(linkstate.shortest_path_between(self.graph, 1, 99), ([], float('inf')))
+        linkstate.apply_change_to_graph(self.graph, (4, 5, -999))
+        linkstate.apply_change_to_graph(self.graph, (2, 5, -999))
+        self.assertEqual(linkstate.shortest_path_between(self.graph, 5, 1), ([], float('inf')))
+
+    def test_same_lines_as_tables(self):
+        with tempfile.TemporaryDirectory() as directory:
+            messages = os.path.join(directory, 'messages.txt')
+            with open(messages, 'w') as file:
+                file.write("1 5 first\n5 1 second\n1 7 third\n3 3 fourth\n1 5 again\n")
+            tables = os.path.join(directory, 'tables.txt')
+            points = os.path.join(directory, 'points.txt')
+            linkstate.print_shortest_paths(self.paths, messages, tables)
+            linkstate.print_message_paths(self.graph, self.nodes, messages, points)
+            with open(tables) as expected, open(points) as actual:
+                self.assertEqual(actual.read(), expected.read())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import linkstate
+
+class TestLinkStateStream(unittest.TestCase):
+
+    def setUp(self):
+        """Build a graph with equal cost paths and two routers cut off from the others."""
+        self.edges = [(1, 2, 1), (1, 3, 1), (2, 4, 1), (3, 4, 1), (4, 5, 2), (2, 5, 3), (6, 7, 1)]
+        self.graph = linkstate.build_graph(linkstate.populate_linkstate_info(self.edges))
+        self.nodes = {1, 2, 3, 4, 5, 6, 7}
+        self.paths = linkstate.calculate_shortest_paths(self.graph, self.nodes)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def read(self, name):
+        with open(self.path(name)) as file:
+            return file.read()
+
+    def test_tables_read_next_hops(self):
+        linkstate.print_shortest_paths1(self.paths, self.path('tables.txt'))
+        expected = []
+        for src, targets in self.paths.items():
+            for dest, (path, cost) in targets.items():
+                # Unreachable destinations are left out of the table
+                if path:
+                    expected.append(f"{dest} {path[1] if len(path) > 1 else path[0]} {cost}\n")
+            expected.append("\n")
+        self.assertEqual(self.read('tables.txt'), ''.join(expected))
+        self.assertNotIn("7 ", self.read('tables.txt').split("\n\n")[0])
+
+    def test_streamed_lines_match_tables(self):
+        with open(self.path('messages.txt'), 'w') as file:
+            file.write("1 5 first\n5 1 second\n1 7 third\n3 3 fourth\n1 5 again\n9 1 fifth\n")
+        linkstate.print_shortest_paths1(self.paths, self.path('tables.txt'))
+        linkstate.print_shortest_paths(self.paths, self.path('messages.txt'), self.path('tables.txt'))
+        for workers in (1, 2):
+            linkstate.print_streamed_paths(self.graph, self.nodes, self.path('messages.txt'),
+                                           self.path(f'stream{workers}.txt'), workers)
+            self.assertEqual(self.read(f'stream{workers}.txt'), self.read('tables.txt'))
+
+    def test_stream_option(self):
+        with open(self.path('topology.txt'), 'w') as file:
+            file.writelines(f"{src} {dest} {cost}\n" for src, dest, cost in self.edges)
+        with open(self.path('messages.txt'), 'w') as file:
+            file.write("1 5 first\n6 7 second\n7 2 third\n")
+        with open(self.path('changes.txt'), 'w') as file:
+            file.write("4 5 -999\n2 6 4\n1 3 -999\n")
+        arguments = [self.path('topology.txt'), self.path('messages.txt'), self.path('changes.txt')]
+        linkstate.main([*arguments, '--output', self.path('tables.txt')])
+        linkstate.main([*arguments, '--output', self.path('stream.txt'), '--stream'])
+        self.assertEqual(self.read('stream.txt'), self.read('tables.txt'))
+        with self.assertRaises(SystemExit):
+            linkstate.main([*arguments, '--output', self.path('stream.txt'), '--stream', '--incremental'])
+
+if __name__ == '__main__':
+    unittest.main()
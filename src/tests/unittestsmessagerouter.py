@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+import linkstate
+from message_router import MessageRouter
+
+class TestMessageRouter(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a topology where 4 reaches 3 through 5 and 1 reaches 6 through 4."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12)]
+        self.messages = [(4, 3, 'first'), (1, 6, 'second'), (4, 3, 'third')]
+
+    def route_distance_vectors(self, router, topology):
+        _, next_hops = distancevector.distance_vector_routing(topology)
+        return dict(router.route(next_hops.table))
+
+    def test_unique_pairs(self):
+        router = MessageRouter(self.messages, unique_pairs=True)
+        self.assertEqual(router.messages, [(4, 3, 'third'), (1, 6, 'second')])
+        router = MessageRouter(self.messages)
+        self.assertEqual(router.messages, self.messages)
+        self.assertEqual(router.pairs, [(4, 3), (1, 6)])
+
+    def test_next_hop_paths(self):
+        router = MessageRouter(self.messages, follow_next_hops=True)
+        routes = self.route_distance_vectors(router, self.topology)
+        self.assertEqual(routes[(4, 3)], ('4 5 2 3', 8))
+        self.assertEqual(routes[(1, 6)], ('1 4 5 6', 14))
+
+    def test_only_changed_paths_are_rebuilt(self):
+        router = MessageRouter(self.messages, follow_next_hops=True)
+        before = self.route_distance_vectors(router, self.topology)
+        # Cheaper 2-3 link, only routes towards 3 or 2 can move
+        updated = distancevector.apply_changes_to_topology(self.topology, [(2, 3, 1)])
+        after = self.route_distance_vectors(router, updated)
+        fresh = self.route_distance_vectors(MessageRouter(self.messages, follow_next_hops=True), updated)
+        self.assertEqual(after, fresh)
+        self.assertEqual(after[(4, 3)], ('4 5 2 3', 6))
+        self.assertIs(after[(1, 6)], before[(1, 6)])
+
+    def test_tree_paths_with_changed_sources(self):
+        router = MessageRouter(self.messages, unique_pairs=True)
+        graph = linkstate.build_graph(self.topology)
+        paths = linkstate.calculate_shortest_paths(graph, set(graph.ids))
+        before = dict(router.route(paths.table))
+        changed = linkstate.update_shortest_paths(graph, paths.table, (5, 6, 1))
+        after = router.route(paths.table, changed)
+        self.assertEqual(after[(1, 6)], ('1 4 5 6', 3))
+        self.assertEqual(after[(4, 3)], before[(4, 3)])
+        self.assertEqual(after, MessageRouter(self.messages, unique_pairs=True).route(paths.table))
+
+if __name__ == '__main__':
+    unittest.main()
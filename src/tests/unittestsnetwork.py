@@ -0,0 +1,87 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+import linkstate
+from graph import CompactGraph
+from message_router import MessageRouter
+from network import Network, RoutingEngine
+
+class TestRoutingEngine(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a topology with equal cost paths."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12), (1, 3, 7)]
+        self.routers = sorted({1, 2, 3, 4, 5, 6})
+
+    def test_linkstate_routes_match_tables(self):
+        engine = RoutingEngine(linkstate.build_graph(self.topology), 'ls')
+        paths = linkstate.calculate_shortest_paths(linkstate.build_graph(self.topology), self.routers)
+        for src in self.routers:
+            for dst in self.routers:
+                self.assertEqual(engine.route(src, dst), paths[src][dst])
+        self.assertEqual(engine.computed, len(self.routers))
+
+    def test_distance_vector_routes_match_messages(self):
+        engine = RoutingEngine(CompactGraph(self.topology, merge_parallel=False), 'dv')
+        _, next_hops = distancevector.distance_vector_routing(self.topology)
+        pairs = [(src, dst) for src in self.routers for dst in self.routers]
+        router = MessageRouter([(src, dst, '') for src, dst in pairs], follow_next_hops=True)
+        routes = router.route(next_hops.table)
+        for src, dst in pairs:
+            hops, cost = routes[(src, dst)]
+            self.assertEqual(engine.route(src, dst), (list(map(int, hops.split())), cost))
+            self.assertEqual(engine.next_hop(src, dst), next_hops[src][dst])
+
+    def test_lazy_and_bounded(self):
+        engine = RoutingEngine(linkstate.build_graph(self.topology), 'ls', capacity=2)
+        self.assertEqual(engine.route(3, 6), ([3, 2, 5, 6], 19))
+        engine.cost_of(3, 4)
+        engine.cost_of(4, 3)
+        engine.cost_of(6, 1)
+        self.assertEqual(list(engine.trees), [4, 6])
+        self.assertEqual(engine.computed, 3)
+        self.assertEqual(engine.route(3, 99), ([], float('inf')))
+
+    def test_change_drops_affected_trees(self):
+        engine = RoutingEngine(linkstate.build_graph(self.topology), 'ls')
+        for src in self.routers:
+            engine.tree(src)
+        # A link far more expensive than the paths it joins cannot move any route
+        self.assertEqual(engine.change((3, 6, 50)), [])
+        dropped = engine.change((4, 5, 20))
+        self.assertIn(4, dropped)
+        self.assertEqual(sorted(dropped + list(engine.trees)), self.routers)
+        graph = linkstate.build_graph(self.topology)
+        for change in [(3, 6, 50), (4, 5, 20)]:
+            linkstate.apply_change_to_graph(graph, change)
+        paths = linkstate.calculate_shortest_paths(graph, self.routers)
+        for src in self.routers:
+            for dst in self.routers:
+                self.assertEqual(engine.route(src, dst), paths[src][dst])
+        engine.change((6, 7, 2))
+        self.assertEqual(engine.route(7, 1), ([7, 6, 5, 2, 1], 26))
+
+    def test_distance_vector_removed_link(self):
+        engine = RoutingEngine(CompactGraph(self.topology, merge_parallel=False), 'dv')
+        self.assertEqual(engine.cost_of(5, 6), 12)
+        engine.change((5, 6, -999))
+        # The removed link keeps its slot, 6 must not be reached over it
+        for router in self.routers[:-1]:
+            self.assertEqual(engine.route(router, 6), ([], float('inf')))
+            self.assertEqual(engine.cost_of(6, router), float('inf'))
+            self.assertIsNone(engine.next_hop(router, 6))
+        self.assertEqual(engine.route(1, 5), ([1, 4, 5], 2))
+
+    def test_network_engine(self):
+        directory = os.path.dirname(os.path.abspath(__file__))
+        network = Network(os.path.join(directory, 'topology.txt'), None, None)
+        network.build_network()
+        engine = network.routing_engine('ls')
+        self.assertEqual(engine.route(1, 5), ([1, 4, 5], 2))
+        self.assertEqual(network.routing_engine('dv').cost_of(1, 5), 2)
+
+if __name__ == '__main__':
+    unittest.main()
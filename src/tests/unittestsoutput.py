@@ -0,0 +1,48 @@
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+import linkstate
+from output import OutputWriter, output_path
+
+class TestOutputWriter(unittest.TestCase):
+
+    def setUp(self):
+        """Compute the tables of a small topology in a scratch directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_tables(self, output):
+        distance_vectors, next_hops = distancevector.distance_vector_routing(self.topology)
+        distancevector.write_output_file(distance_vectors, next_hops, [(2, 1, 'hello')], output)
+        graph = linkstate.build_graph(self.topology)
+        linkstate.print_shortest_paths1(linkstate.calculate_shortest_paths(graph, set(graph.ids)), output)
+
+    def test_writer_matches_path_output(self):
+        path = os.path.join(self.directory.name, 'path.txt')
+        self.write_tables(path)
+        # write_output_file truncates a path, print_shortest_paths1 appends to it
+        with OutputWriter(os.path.join(self.directory.name, 'writer.txt'), 'w') as output:
+            self.write_tables(output)
+        with open(path) as expected, open(os.path.join(self.directory.name, 'writer.txt')) as actual:
+            self.assertEqual(actual.read(), expected.read())
+
+    def test_gzip_sink(self):
+        path = output_path(os.path.join(self.directory.name, 'output.txt'), True)
+        self.assertTrue(path.endswith('.txt.gz'))
+        with OutputWriter(path, 'w', compress=True) as output:
+            output.write("1 1 0\n")
+        with OutputWriter(path, 'a', compress=True) as output:
+            output.write("\n")
+        with gzip.open(path, 'rt') as file:
+            self.assertEqual(file.read(), "1 1 0\n\n")
+
+if __name__ == '__main__':
+    unittest.main()
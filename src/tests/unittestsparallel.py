@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+import linkstate
+import parallel
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        """Build a ring of routers with a few chords."""
+        self.edges = [(i, i % 12 + 1, i % 4 + 1) for i in range(1, 13)] + [(1, 7, 3), (3, 10, 2), (5, 11, 6)]
+
+    def test_rows_keep_key_order(self):
+        graph = linkstate.build_graph(self.edges)
+        keys = list(reversed(graph.ids))
+        self.assertEqual(parallel.map_rows(graph, linkstate.shortest_path_tree, keys, 3),
+                         parallel.map_rows(graph, linkstate.shortest_path_tree, keys, 1))
+
+    def test_rows_stream(self):
+        graph = linkstate.build_graph(self.edges)
+        rows = parallel.iter_rows(graph, linkstate.shortest_path_tree, graph.ids, 2)
+        self.assertEqual(next(rows), linkstate.shortest_path_tree(graph, graph.ids[0]))
+        self.assertEqual(list(rows), parallel.map_rows(graph, linkstate.shortest_path_tree, graph.ids[1:]))
+
+    def test_linkstate_workers(self):
+        graph = linkstate.build_graph(self.edges)
+        nodes = set(graph.ids)
+        self.assertEqual(linkstate.calculate_shortest_paths(graph, nodes, workers=2),
+                         linkstate.calculate_shortest_paths(graph, nodes))
+
+    def test_distance_vector_workers(self):
+        self.assertEqual(distancevector.distance_vector_routing(self.edges, workers=2),
+                         distancevector.distance_vector_routing(self.edges))
+
+if __name__ == '__main__':
+    unittest.main()
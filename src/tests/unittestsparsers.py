@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import parsers
+
+class TestParsers(unittest.TestCase):
+
+    def setUp(self):
+        """Write a topology with a malformed and a blank line."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'topology.txt')
+        with open(self.path, 'w') as file:
+            file.write("1 2 8\n2 3 3\n\n4 5\n4 1 1\r\n5 6 12")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_topology(self):
+        r1, r2, cost = parsers.load_topology(self.path)
+        self.assertEqual(list(zip(r1, r2, cost)), [(1, 2, 8), (2, 3, 3), (4, 1, 1), (5, 6, 12)])
+
+    def test_small_blocks(self):
+        # Blocks always end on a line boundary whatever their size
+        block_size = parsers.BLOCK_SIZE
+        parsers.BLOCK_SIZE = 4
+        try:
+            self.assertEqual(parsers.read_topology(self.path), [(1, 2, 8), (2, 3, 3), (4, 1, 1), (5, 6, 12)])
+        finally:
+            parsers.BLOCK_SIZE = block_size
+
+    def test_misaligned_lines(self):
+        # Fields of a 4 field line and a 2 field line must not be joined into links
+        with open(self.path, 'w') as file:
+            file.write("1 2 3 4\n5 6\n7 8 9\n")
+        self.assertEqual(parsers.read_topology(self.path), [(7, 8, 9)])
+        with open(self.path, 'w') as file:
+            file.write("1 2 3\r\n4 5 6")
+        self.assertEqual(parsers.read_topology(self.path), [(1, 2, 3), (4, 5, 6)])
+
+    def test_empty_topology(self):
+        open(self.path, 'w').close()
+        self.assertEqual(parsers.read_topology(self.path), [])
+
+    def test_iter_messages_and_changes(self):
+        # Every line is read, the old Network.parseMessages skipped every other one
+        messages = parsers.iter_messages(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'message.txt'))
+        self.assertEqual(list(messages), [(2, 1, 'here is a message from 2 to 1'),
+                                          (3, 5, 'this message gets sent from 3 to 5')])
+        changes = parsers.iter_changes(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'changes.txt'))
+        self.assertEqual(next(changes), (2, 4, 1))
+
+    def test_change_windows(self):
+        # The topology file doubles as a changes file, its blank line separates windows
+        self.assertEqual(list(parsers.iter_change_windows(self.path, 3)),
+                         [[(1, 2, 8), (2, 3, 3), (4, 1, 1)], [(5, 6, 12)]])
+        self.assertEqual(list(parsers.iter_change_windows(self.path, 0, separators=True)),
+                         [[(1, 2, 8), (2, 3, 3)], [(4, 1, 1), (5, 6, 12)]])
+        self.assertEqual(len(list(parsers.iter_change_windows(self.path))), 4)
+
+    def test_timestamps(self):
+        # Lines without a timestamp keep the time of the line before them
+        with open(self.path, 'w') as file:
+            file.write("1 2 8\n@2.5 2 3 3\n4 1 1\n@4 3 5 hello @ 5\n")
+        self.assertEqual(list(parsers.iter_timed_changes(self.path)), [(0.0, 1, 2, 8), (2.5, 2, 3, 3), (2.5, 4, 1, 1)])
+        self.assertEqual(list(parsers.iter_changes(self.path)), [(1, 2, 8), (2, 3, 3), (4, 1, 1)])
+        self.assertEqual(list(parsers.iter_timed_messages(self.path))[-1], (4.0, 3, 5, 'hello @ 5'))
+        self.assertEqual(list(parsers.iter_messages(self.path))[-1], (3, 5, 'hello @ 5'))
+
+if __name__ == '__main__':
+    unittest.main()
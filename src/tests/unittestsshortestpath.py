@@ -0,0 +1,66 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import linkstate
+
+INF = float('inf')
+
+class TestShortestPathTree(unittest.TestCase):
+
+    def setUp(self):
+        """Set up two equal cost paths from 1 to 4 and a part 1 cannot reach."""
+        self.links = [(1, 2, 1), (1, 3, 1), (2, 4, 1), (3, 4, 1), (4, 5, 2), (6, 7, 1)]
+        self.graph = linkstate.build_graph(self.links, [1, 2, 3, 4, 5, 6, 7])
+
+    def tree(self, graph, source):
+        # Read the tree back as router IDs, None where unreachable
+        cost, first_hop, predecessor = linkstate.shortest_path_tree(graph, source)
+        ids = graph.ids
+        return ({node: cost[i] for i, node in enumerate(ids)},
+                {node: ids[first_hop[i]] if first_hop[i] >= 0 else None for i, node in enumerate(ids)},
+                {node: ids[predecessor[i]] if predecessor[i] >= 0 else None for i, node in enumerate(ids)})
+
+    def test_hand_computed_tree(self):
+        cost, first_hop, predecessor = self.tree(self.graph, 1)
+        self.assertEqual(cost, {1: 0, 2: 1, 3: 1, 4: 2, 5: 4, 6: INF, 7: INF})
+        # 4 is reached over 2 and 3 at the same cost, the neighbour listed first wins
+        self.assertEqual(first_hop, {1: 1, 2: 2, 3: 3, 4: 2, 5: 2, 6: None, 7: None})
+        self.assertEqual(predecessor, {1: None, 2: 1, 3: 1, 4: 2, 5: 4, 6: None, 7: None})
+
+    def test_tie_follows_neighbour_order(self):
+        links = [self.links[1], self.links[0]] + self.links[2:]
+        _, first_hop, predecessor = self.tree(linkstate.build_graph(links, [1, 2, 3, 4, 5, 6, 7]), 1)
+        self.assertEqual((first_hop[4], predecessor[4], first_hop[5]), (3, 3, 3))
+
+    def test_unknown_source(self):
+        cost, first_hop, _ = self.tree(self.graph, 9)
+        self.assertEqual(set(cost.values()), {INF})
+        self.assertEqual(set(first_hop.values()), {None})
+
+    def test_printed_tables_and_paths(self):
+        paths = linkstate.calculate_shortest_paths(self.graph, [1, 2, 3, 4, 5, 6, 7])
+        output = io.StringIO()
+        linkstate.print_shortest_paths1(paths, output)
+        # Unreachable destinations are left out of the tables
+        self.assertEqual(output.getvalue(), "1 1 0\n2 2 1\n3 3 1\n4 2 2\n5 2 4\n\n"
+                                            "1 1 1\n2 2 0\n3 1 2\n4 4 1\n5 4 3\n\n"
+                                            "1 1 1\n2 1 2\n3 3 0\n4 4 1\n5 4 3\n\n"
+                                            "1 2 2\n2 2 1\n3 3 1\n4 4 0\n5 5 2\n\n"
+                                            "1 4 4\n2 4 3\n3 4 3\n4 4 2\n5 5 0\n\n"
+                                            "6 6 0\n7 7 1\n\n"
+                                            "6 6 1\n7 7 0\n\n")
+        with tempfile.TemporaryDirectory() as directory:
+            messages = os.path.join(directory, 'message.txt')
+            with open(messages, 'w') as file:
+                file.write("1 5 over the tie\n1 7 cut off\n")
+            output = io.StringIO()
+            linkstate.print_shortest_paths(paths, messages, output)
+        self.assertEqual(output.getvalue(), "from 1 to 5 cost 4 hops 1 2 4 5 message over the tie\n\n"
+                                            "from 1 to 7 cost infinite hops unreachable message cut off\n\n")
+
+if __name__ == '__main__':
+    unittest.main()
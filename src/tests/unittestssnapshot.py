@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+import linkstate
+from snapshot import Snapshot, write_snapshot
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a topology with a router cut off from the others."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12), (7, 8, 2)]
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'tables.snap')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_linkstate_paths(self):
+        graph = linkstate.build_graph(self.topology, sorted({1, 2, 3, 4, 5, 6, 7, 8}))
+        paths = linkstate.calculate_shortest_paths(graph, sorted(graph.ids))
+        write_snapshot(paths.table, self.path)
+        with Snapshot(self.path) as snapshot:
+            self.assertIsNotNone(snapshot.predecessor)
+            for src in graph.ids:
+                for dst in graph.ids:
+                    path, cost = paths[src][dst]
+                    self.assertEqual(snapshot.path(src, dst), path)
+                    self.assertEqual(snapshot.cost_of(src, dst), cost)
+                    self.assertEqual(snapshot.next_hop(src, dst), paths.table.next_hop_of(src, dst))
+            self.assertEqual(snapshot.path(3, 6), [3, 2, 5, 6])
+            self.assertIsNone(snapshot.next_hop(1, 7))
+            self.assertIsNone(snapshot.next_hop(1, 99))
+
+    def test_distance_vector_paths(self):
+        distance_vectors, next_hops = distancevector.distance_vector_routing(self.topology)
+        write_snapshot(next_hops.table, self.path)
+        with Snapshot(self.path) as snapshot:
+            self.assertIsNone(snapshot.predecessor)
+            self.assertEqual(snapshot.path(1, 3), [1, 4, 5, 2, 3])
+            self.assertEqual(snapshot.cost_of(1, 3), distance_vectors[1][3])
+            self.assertEqual(snapshot.next_hop(6, 1), next_hops[6][1])
+            self.assertEqual(snapshot.path(8, 1), [])
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'1 2 3\n' * 10)
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
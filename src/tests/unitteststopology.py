@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import distancevector
+from topology import EdgeStore, coalesce_changes, edge_key
+
+class TestEdgeStore(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a store over a small topology."""
+        self.topology = [(1, 2, 8), (2, 3, 3), (2, 5, 4), (4, 1, 1), (4, 5, 1), (5, 6, 12)]
+        self.store = EdgeStore(self.topology)
+
+    def test_keyed_in_either_orientation(self):
+        self.assertEqual(edge_key(5, 2), (2, 5))
+        self.assertEqual(self.store.cost(5, 2), 4)
+        self.assertIn((1, 4), self.store)
+        self.assertIsNone(self.store.cost(1, 3))
+        self.assertEqual(list(self.store), self.topology)
+
+    def test_change_records(self):
+        record = self.store.apply((3, 2, 7))
+        self.assertEqual((record.version, record.key, record.old, record.new), (1, (2, 3), (2, 3, 3), (3, 2, 7)))
+        # Updated in place, as the link state list did
+        self.assertEqual(list(self.store)[1], (3, 2, 7))
+        record = self.store.apply((1, 6, -999))
+        self.assertEqual((record.version, record.old, record.new), (1, None, None))
+        record = self.store.apply((6, 5, -999))
+        self.assertEqual((record.version, record.old, record.new), (2, (5, 6, 12), None))
+        self.assertEqual(len(self.store), 5)
+
+    def test_matches_distance_vector_list(self):
+        for change in [(5, 2, 6), (4, 5, -999), (3, 6, 2), (2, 1, 8)]:
+            self.store.apply(change, move_to_end=True)
+            self.assertEqual(list(self.store), distancevector.apply_changes_to_topology(self.topology, [change]))
+            self.store.undo()
+            self.assertEqual(list(self.store), self.topology)
+
+    def test_compaction_keeps_order(self):
+        expected = list(self.topology)
+        for r1, r2, _ in self.topology[:4]:
+            self.store.apply((r1, r2, -999))
+            expected.remove(next(link for link in expected if link[:2] == (r1, r2)))
+        self.store.apply((6, 1, 2))
+        self.assertEqual(list(self.store), expected + [(6, 1, 2)])
+        # Three removals compacted the slots before the fourth one
+        self.assertEqual(len(self.store.slots), 4)
+        self.assertEqual(self.store.cost(1, 6), 2)
+
+    def test_net_changes(self):
+        flaps = [(2, 5, -999), (5, 2, 4), (1, 3, 2), (3, 1, -999), (6, 5, 12), (4, 5, 9), (1, 2, 7)]
+        self.assertEqual(coalesce_changes(flaps), [(5, 2, 4), (3, 1, -999), (6, 5, 12), (4, 5, 9), (1, 2, 7)])
+        # Restored costs and removals of missing links cancel out
+        self.assertEqual(self.store.net_changes(flaps), [(4, 5, 9), (1, 2, 7)])
+
+    def test_rollback(self):
+        savepoint = self.store.savepoint()
+        for change in [(4, 5, 9), (1, 2, -999), (3, 6, 2), (2, 3, 3)]:
+            self.store.apply(change, move_to_end=True)
+        self.store.rollback(savepoint)
+        self.assertEqual(list(self.store), self.topology)
+        self.assertIsNone(self.store.undo())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+## @file topology
+#  Keyed store of the links of a topology.
+#  Links are indexed by their normalized undirected endpoints, so a change finds
+#  its link in O(1) in either orientation. Iteration keeps the order a plain
+#  list of links would have, which decides ties between equal cost routes.
+from collections import namedtuple
+
+## Cost of a change that removes a link.
+REMOVE_COST = -999
+
+## Record of a change applied to an EdgeStore.
+#  version is the version the change produced, key the normalized endpoints of
+#  the link, old and new the (r1, r2, cost) link before and after the change or
+#  None when there was no link. old_slot and new_slot are the positions of the
+#  link in iteration order, used to undo the change.
+EdgeChange = namedtuple('EdgeChange', 'version key old new old_slot new_slot')
+
+## Normalize the endpoints of an undirected link.
+#  @return Tuple (low, high) of the router IDs.
+def edge_key(r1, r2):
+    return (r1, r2) if r1 <= r2 else (r2, r1)
+
+## Collapse a sequence of changes to the last change of each link.
+#  Applying the result leaves every link with the cost it has after applying
+#  all the changes one by one.
+#  @param changes Iterable of (r1, r2, cost) changes.
+#  @return List of changes, one per link, in the order of their last occurrence.
+def coalesce_changes(changes):
+    latest = {}
+    for change in changes:
+        key = edge_key(change[0], change[1])
+        latest.pop(key, None)
+        latest[key] = change
+    return list(latest.values())
+
+class EdgeStore:
+    """
+    Undirected links keyed by edge_key with O(1) add, update and remove.
+    Links sit in slots in the order they were added, removed links leave an
+    empty slot that is reclaimed once they make up half of the slots. Every
+    change that modifies the store increments version. The last change can be
+    reverted with undo, and all changes made after a savepoint with rollback.
+    """
+    ## Build the store from a list of links.
+    #  A pair of routers listed twice keeps the position of the first link and
+    #  the cost of the last one.
+    #  @param links Iterable of tuples (r1, r2, cost).
+    def __init__(self, links=()):
+        self.slots = []
+        self.index = {}
+        self.version = 0
+        self.last_change = None
+        self._removed = 0
+        self._journal = None
+        for r1, r2, cost in links:
+            key = edge_key(r1, r2)
+            if key in self.index:
+                self.slots[self.index[key]] = (r1, r2, cost)
+            else:
+                self.index[key] = len(self.slots)
+                self.slots.append((r1, r2, cost))
+
+    def __iter__(self):
+        return (link for link in self.slots if link is not None)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, pair):
+        return edge_key(*pair) in self.index
+
+    ## Get the cost of the link between two routers.
+    #  @return Cost of the link, or None if there is no such link.
+    def cost(self, r1, r2):
+        slot = self.index.get(edge_key(r1, r2))
+        return None if slot is None else self.slots[slot][2]
+
+    ## Set of the routers that have at least one link.
+    def nodes(self):
+        return {router for r1, r2, _ in self for router in (r1, r2)}
+
+    ## Reduce a window of changes to the ones that modify the store.
+    #  Changes are coalesced per link, then changes that leave the cost of their
+    #  link as it is, or remove a link that does not exist, are dropped.
+    #  @param changes Iterable of (r1, r2, cost) changes.
+    #  @return List of the remaining changes.
+    def net_changes(self, changes):
+        net = []
+        for r1, r2, cost in coalesce_changes(changes):
+            current = self.cost(r1, r2)
+            if cost != current and (cost != REMOVE_COST or current is not None):
+                net.append((r1, r2, cost))
+        return net
+
+    ## Apply a change to the store.
+    #  The change matches its link in either orientation and the link takes the
+    #  orientation of the change.
+    #  @param change Tuple (r1, r2, cost), a cost of REMOVE_COST removes the link.
+    #  @param move_to_end Move an updated link after all others instead of keeping its position.
+    #  @return EdgeChange describing what was modified, also kept in last_change.
+    def apply(self, change, move_to_end=False):
+        if self._journal is None:
+            self._compact()
+        r1, r2, cost = change
+        key = edge_key(r1, r2)
+        old_slot = self.index.get(key)
+        old = None if old_slot is None else self.slots[old_slot]
+        new = None if cost == REMOVE_COST else (r1, r2, cost)
+        new_slot = old_slot
+        if new is None:
+            if old is not None:
+                self._clear(key, old_slot)
+            new_slot = None
+        elif old is None or move_to_end:
+            if old is not None:
+                self._clear(key, old_slot)
+            new_slot = self.index[key] = len(self.slots)
+            self.slots.append(new)
+        else:
+            self.slots[old_slot] = new
+        if old != new or old_slot != new_slot:
+            self.version += 1
+        self.last_change = EdgeChange(self.version, key, old, new, old_slot, new_slot)
+        if self._journal is not None:
+            self._journal.append(self.last_change)
+        return self.last_change
+
+    ## Revert the last change applied to the store.
+    #  @return EdgeChange that was reverted, or None if there is nothing to undo.
+    def undo(self):
+        change = self.last_change
+        if change is None:
+            return None
+        self.last_change = None
+        if self._journal:
+            self._journal.pop()
+        self._revert(change)
+        return change
+
+    ## Start recording changes so they can be rolled back.
+    #  Slots are not compacted while a savepoint is open.
+    #  @return Savepoint to pass to rollback.
+    def savepoint(self):
+        if self._journal is None:
+            self._journal = []
+        return len(self._journal)
+
+    ## Revert every change applied since a savepoint, last first.
+    #  @param savepoint Value returned by savepoint.
+    def rollback(self, savepoint):
+        while len(self._journal) > savepoint:
+            self._revert(self._journal.pop())
+        self.last_change = None
+        if savepoint == 0:
+            self._journal = None
+
+    ## Revert a change, which must be the last one still applied.
+    def _revert(self, change):
+        if change.new is not None:
+            if change.new_slot == len(self.slots) - 1 and change.new_slot != change.old_slot:
+                self.slots.pop()
+            else:
+                self.slots[change.new_slot] = None
+                self._removed += 1
+            del self.index[change.key]
+        if change.old is not None:
+            if self.slots[change.old_slot] is None:
+                self._removed -= 1
+            self.slots[change.old_slot] = change.old
+            self.index[change.key] = change.old_slot
+        if change.old != change.new or change.old_slot != change.new_slot:
+            self.version += 1
+
+    ## Empty the slot of a link.
+    def _clear(self, key, slot):
+        del self.index[key]
+        self.slots[slot] = None
+        self._removed += 1
+
+    ## Drop the empty slots once they make up half of the store.
+    def _compact(self):
+        if not self._removed or self._removed * 2 < len(self.slots):
+            return
+        self.slots = [link for link in self.slots if link is not None]
+        self.index = {edge_key(r1, r2): slot for slot, (r1, r2, _) in enumerate(self.slots)}
+        self._removed = 0
+        self.last_change = None